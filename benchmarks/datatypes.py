@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measure the cost of building datatypes from a synthetic payload::
+
+    python benchmarks/datatypes.py [posts]
+"""
+
+import sys
+from time import time
+
+from scoopy.datatypes import Topic
+from scoopy.mockserver import make_topic
+
+POSTS = 10000
+
+
+class FakeAPI(object):
+    def __init__(self, lazy):
+        self.lazy = lazy
+
+
+def timed(function, repeat=5):
+    best = None
+    for i in range(repeat):
+        start = time()
+        result = function()
+        elapsed = time() - start
+        if (best is None) or (elapsed < best):
+            best = elapsed
+    return best, result
+
+
+def main():
+    posts = POSTS
+    if len(sys.argv) > 1:
+        posts = int(sys.argv[1])
+    payload = make_topic(1, curated=posts)
+    print("topic with %d curated posts" % posts)
+    for lazy in (False, True):
+        api = FakeAPI(lazy)
+        build, topic = timed(lambda: Topic(api, payload))
+        name, _ = timed(lambda: Topic(api, payload).name)
+        def walk():
+            topic = Topic(api, payload)
+            return [p.source.name for p in topic.curatedPosts]
+        full, _ = timed(walk)
+        print("%-6s build %8.2f ms   build+name %8.2f ms   build+walk posts %8.2f ms" % (
+            lazy and 'lazy' or 'eager', build * 1000, name * 1000, full * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compare the installed JSON decoders on API responses::
+
+    python benchmarks/decoders.py [recorded_response.json ...]
+
+Without arguments, synthetic compilation responses of various sizes
+are used.
+"""
+
+import json
+import sys
+from time import time
+
+from scoopy.decoders import available_decoders, get_decoder
+from scoopy.mockserver import make_post
+
+
+def timed(function, repeat=5):
+    best = None
+    for i in range(repeat):
+        start = time()
+        function()
+        elapsed = time() - start
+        if (best is None) or (elapsed < best):
+            best = elapsed
+    return best
+
+
+def payloads():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            infile = open(path, 'rb')
+            try:
+                yield path, infile.read()
+            finally:
+                infile.close()
+        return
+    for posts in (10, 1000, 10000):
+        body = json.dumps({
+            'success': True,
+            'posts': [make_post(i) for i in range(posts)],
+        })
+        yield 'compilation of %d posts' % posts, body
+
+
+def main():
+    decoders = available_decoders()
+    print("available decoders: %s" % ', '.join(decoders))
+    for name, body in payloads():
+        print("%s (%.1f KB)" % (name, len(body) / 1024.0))
+        for decoder in decoders:
+            loads = get_decoder(decoder)
+            elapsed = timed(lambda: loads(body))
+            print("    %-12s %8.2f ms  %8.1f MB/s" % (
+                decoder, elapsed * 1000, len(body) / elapsed / 1024 / 1024
+            ))
+
+
+if __name__ == '__main__':
+    main()
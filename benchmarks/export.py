@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measure the export throughput of each format on synthetic posts::
+
+    python benchmarks/export.py [posts]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from time import time
+
+from scoopy.datatypes import Post
+from scoopy.export import export
+from scoopy.mockserver import make_post
+
+POSTS = 50000
+
+
+class FakeAPI(object):
+    lazy = False
+    keep_raw = False
+
+
+def main():
+    posts = POSTS
+    if len(sys.argv) > 1:
+        posts = int(sys.argv[1])
+    api = FakeAPI()
+    objects = [Post(api, make_post(i)) for i in range(posts)]
+    directory = tempfile.mkdtemp()
+    print("%d posts" % posts)
+    try:
+        for name in ('posts.ndjson', 'posts.ndjson.gz', 'posts.csv',
+                     'posts.csv.gz', 'posts.columnar'):
+            filepath = os.path.join(directory, name)
+            start = time()
+            export(objects, filepath)
+            elapsed = time() - start
+            size = os.path.getsize(filepath) / 1024.0 / 1024
+            print("%-18s %8.0f posts/s  %7.1f MB  %6.1f MB/s written" % (
+                name, posts / elapsed, size, size / elapsed
+            ))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
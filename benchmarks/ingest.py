@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compare fetching topics from threads of a single process with fetching
+them from worker processes, against a mock server running in its own
+process::
+
+    python benchmarks/ingest.py [-n topics] [-c concurrency] [-p posts]
+"""
+
+import multiprocessing
+import os
+import shutil
+from optparse import OptionParser
+from tempfile import mkdtemp
+from time import time
+
+import oauth2
+
+from scoopy.client import ScoopItAPI
+from scoopy.mockserver import MockServer
+from scoopy.runner import IngestRunner
+from scoopy.transport import PooledTransport
+
+
+def serve(posts, addresses):
+    server = MockServer(posts=posts)
+    addresses.put(server.base_url)
+    server.serve_forever()
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--topics', type='int', default=500)
+    parser.add_option('-c', '--concurrency', type='int', default=4)
+    parser.add_option('-p', '--posts', type='int', default=100)
+    options, args = parser.parse_args()
+    addresses = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(options.posts, addresses))
+    server.daemon = True
+    server.start()
+    base_url = addresses.get()
+    tmpdir = mkdtemp()
+    try:
+        token_file = os.path.join(tmpdir, 'token.db')
+        api = ScoopItAPI('key', 'secret', keep_raw=False, base_url=base_url,
+                         transport=PooledTransport(pool_size=options.concurrency))
+        api.oauth.token = oauth2.Token('token', 'secret')
+        api.save_oauth_token(token_file)
+        topic_ids = range(options.topics)
+
+        start = time()
+        for result in api.topics_many(topic_ids, workers=options.concurrency,
+                                      order='curationDate'):
+            pass
+        elapsed = time() - start
+        print("%-10s %9.1f topics/s" % ('threads', options.topics / elapsed))
+
+        runner = IngestRunner('key', 'secret', token_file,
+                              processes=options.concurrency,
+                              api_options={'base_url': base_url})
+        for result in runner.run(topic_ids, order='curationDate'):
+            pass
+        print("%-10s %9.1f topics/s" % ('processes', runner.throughput))
+        print(runner.report())
+    finally:
+        shutil.rmtree(tmpdir)
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Load test the client against a local mock server: latency percentiles,
+throughput and memory of topic, post, compilation and profile requests
+under growing concurrency::
+
+    python benchmarks/load.py [-n requests] [-c 1,4,16] [-l latency]
+                              [-e error_rate] [-p posts]
+"""
+
+import resource
+import threading
+from optparse import OptionParser
+from time import time
+
+import oauth2
+
+from scoopy.client import ScoopItAPI, ScoopItError
+from scoopy.datatypes import Timestamp
+from scoopy.mockserver import MockServer
+from scoopy.retry import RetryPolicy
+from scoopy.transport import PooledTransport
+
+ENDPOINTS = {
+    'topic': lambda api, i: api.topic(1 + i % 10, order='curationDate'),
+    'post': lambda api, i: api.post(i),
+    'compilation': lambda api, i: api.compilation(Timestamp(0), 30),
+    'profile': lambda api, i: api.profile(1 + i % 10),
+}
+
+
+def memory():
+    """
+    Current and peak resident memory of this process in MB.
+    """
+    try:
+        status = open('/proc/self/status')
+    except IOError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        return peak, peak
+    values = {}
+    try:
+        for line in status:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                values[line[:5]] = int(line.split()[1]) / 1024.0
+    finally:
+        status.close()
+    return values['VmRSS'], values['VmHWM']
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(api, call, requests, concurrency):
+    """
+    Send ``requests`` requests from ``concurrency`` threads.
+
+    :returns: tuple -- (sorted latencies, errors, elapsed seconds)
+    """
+    latencies = []
+    errors = [0]
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    def worker():
+        while True:
+            lock.acquire()
+            try:
+                i = next(counter, None)
+            finally:
+                lock.release()
+            if i is None:
+                return
+            start = time()
+            try:
+                call(api, i)
+            except ScoopItError:
+                errors[0] += 1
+            latencies.append(time() - start)
+    threads = [threading.Thread(target=worker) for i in range(concurrency)]
+    start = time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time() - start
+    latencies.sort()
+    return latencies, errors[0], elapsed
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--requests', type='int', default=1000)
+    parser.add_option('-c', '--concurrency', default='1,4,16')
+    parser.add_option('-l', '--latency', type='float', default=0)
+    parser.add_option('-e', '--error-rate', type='float', default=0)
+    parser.add_option('-p', '--posts', type='int', default=30)
+    options, args = parser.parse_args()
+    levels = [int(level) for level in options.concurrency.split(',')]
+    server = MockServer(latency=options.latency, error_rate=options.error_rate,
+                        posts=options.posts, seed=0)
+    server.start()
+    print("%-12s %5s %9s %9s %9s %7s %9s %9s" % (
+        'endpoint', 'conc', 'p50 ms', 'p99 ms', 'req/s', 'errors', 'RSS MB', 'peak MB'))
+    try:
+        for name in ('topic', 'post', 'compilation', 'profile'):
+            for concurrency in levels:
+                retry = None
+                if options.error_rate:
+                    retry = RetryPolicy(backoff=0.01)
+                api = ScoopItAPI('key', 'secret', keep_raw=False, retry=retry,
+                                 transport=PooledTransport(pool_size=concurrency),
+                                 base_url=server.base_url)
+                api.oauth.token = oauth2.Token('token', 'secret')
+                latencies, errors, elapsed = run(
+                    api, ENDPOINTS[name], options.requests, concurrency
+                )
+                api.oauth.transport.close()
+                rss, peak = memory()
+                print("%-12s %5d %9.2f %9.2f %9.1f %7d %9.1f %9.1f" % (
+                    name, concurrency, percentile(latencies, 0.5) * 1000,
+                    percentile(latencies, 0.99) * 1000, len(latencies) / elapsed,
+                    errors, rss, peak,
+                ))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
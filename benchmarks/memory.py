@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measure the memory held per post object::
+
+    python benchmarks/memory.py [posts]
+"""
+
+import json
+import sys
+
+from scoopy.datatypes import IdentityMap, Post
+from scoopy.mockserver import make_post
+
+POSTS = 2000
+
+
+class FakeAPI(object):
+    lazy = False
+    def __init__(self, keep_raw):
+        self.keep_raw = keep_raw
+
+
+class DictObject(object):
+    """
+    The former, __dict__ based, ScoopItObject: every key is set as an
+    instance attribute and the received data is kept in ``raw``.
+    """
+    def __init__(self, api, raw_data, convert_map):
+        self.api = api
+        self.raw = raw_data
+        for key, value in raw_data.iteritems():
+            if key in convert_map:
+                value = convert_map[key](value)
+            setattr(self, key, value)
+
+
+def dict_post(data):
+    return DictObject(None, data, {
+        'source': lambda d: DictObject(None, d, {}),
+        'publicationDate': lambda d: DictObject(None, {'value': d}, {}),
+        'curationDate': lambda d: DictObject(None, {'value': d}, {}),
+        'comments': lambda d: [DictObject(None, c, {
+            'date': lambda d: DictObject(None, {'value': d}, {}),
+            'author': lambda d: DictObject(None, d, {}),
+        }) for c in d],
+    })
+
+
+def deep_size(obj, seen):
+    """
+    Size of an object and of everything it references, each object
+    being counted once.
+    """
+    if id(obj) in seen or isinstance(obj, (FakeAPI, type)) or obj is None:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.iteritems():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += deep_size(item, seen)
+    else:
+        if hasattr(obj, '__dict__'):
+            size += deep_size(obj.__dict__, seen)
+        for cls in type(obj).__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if slot != '__weakref__' and hasattr(obj, slot):
+                    size += deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def measure(name, build, payloads):
+    objects = [build(p) for p in payloads]
+    print("%-28s %8d bytes/post" % (name, deep_size(objects, set()) // len(objects)))
+
+
+def main():
+    posts = POSTS
+    if len(sys.argv) > 1:
+        posts = int(sys.argv[1])
+    # round-trip through json, so the strings are those a response holds
+    payloads = json.loads(json.dumps([make_post(i) for i in range(posts)]))
+    measure('json data only', lambda p: p, payloads)
+    measure('__dict__ objects + raw', dict_post, payloads)
+    measure('slots objects + raw', lambda p: Post(FakeAPI(True), p), payloads)
+    measure('slots objects, no raw', lambda p: Post(FakeAPI(False), p), payloads)
+    identity = IdentityMap()
+    measure('no raw, shared entities',
+            lambda p: Post.build(FakeAPI(False), p, identity), payloads)
+
+
+if __name__ == '__main__':
+    main()
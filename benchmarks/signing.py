@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compare the cost of signing API requests with oauth2 and with the
+cached-key signer, one by one and in batches::
+
+    python benchmarks/signing.py [requests]
+"""
+
+import sys
+from time import time
+from urllib import urlencode
+
+import oauth2
+
+from scoopy.client import TOPIC_URL
+from scoopy.oauth import OAuth
+
+REQUESTS = 20000
+BATCH = 100
+
+
+def run(name, sign, requests):
+    start = time()
+    sign(requests)
+    elapsed = time() - start
+    print("%-20s %9.1f requests/s %7.1f us/request" % (
+        name, requests / elapsed, elapsed / requests * 1e6))
+
+
+def main():
+    requests = REQUESTS
+    if len(sys.argv) > 1:
+        requests = int(sys.argv[1])
+    oauth = OAuth('key', 'secret')
+    oauth.token = oauth2.Token('token', 'secret')
+    params = {'id': 1234, 'curated': 30, 'order': 'curationDate'}
+    def with_oauth2(count):
+        for i in range(count):
+            oauth.sign(TOPIC_URL + '?' + urlencode(params), 'GET', '',
+                       {'Accept-encoding': 'gzip'})
+    def one_by_one(count):
+        for i in range(count):
+            oauth.prepare(TOPIC_URL, params)
+    def batched(count):
+        batch = [(TOPIC_URL, params, 'GET')] * BATCH
+        for i in range(count // BATCH):
+            oauth.prepare_many(batch)
+    run('oauth2', with_oauth2, requests)
+    run('signer', one_by_one, requests)
+    run('signer, batches', batched, requests)
+
+
+if __name__ == '__main__':
+    main()
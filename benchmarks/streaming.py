@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compare the peak memory of buffered and streamed compilations, each
+mode runs in its own process against a local mock server::
+
+    python benchmarks/streaming.py [posts]
+"""
+
+import resource
+import subprocess
+import sys
+from time import time
+
+import oauth2
+
+from scoopy.client import ScoopItAPI
+from scoopy.datatypes import Post
+from scoopy.mockserver import MockServer
+
+POSTS = 20000
+
+
+def peak_memory():
+    """
+    Peak resident memory of this process in MB. On linux, ru_maxrss
+    carries over from the parent through fork() and exec(), so the
+    high-water mark of the process' own memory is used instead.
+    """
+    try:
+        status = open('/proc/self/status')
+    except IOError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    try:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024.0
+    finally:
+        status.close()
+
+
+def consume(mode, url, posts):
+    api = ScoopItAPI('key', 'secret', keep_raw=False)
+    api.oauth.token = oauth2.Token('token', 'secret')
+    params = {'count': posts}
+    start = time()
+    count = 0
+    if mode == 'buffered':
+        for post in api.call(url, params, lambda response, identity: [
+                Post.build(api, p, identity) for p in response['posts']]):
+            count += 1
+    else:
+        for post in api.stream(url, params, ('posts',), Post):
+            count += 1
+    elapsed = time() - start
+    peak = peak_memory()
+    print("%-10s %6d posts %8.2f s   peak RSS %8.1f MB" % (mode, count, elapsed, peak))
+
+
+def main():
+    if (len(sys.argv) > 1) and (sys.argv[1] in ('buffered', 'streamed')):
+        consume(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+        return
+    posts = POSTS
+    if len(sys.argv) > 1:
+        posts = int(sys.argv[1])
+    server = MockServer()
+    server.start()
+    url = server.base_url + '/api/1/compilation'
+    try:
+        for mode in ('buffered', 'streamed'):
+            subprocess.check_call([sys.executable, __file__, mode, url, str(posts)])
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
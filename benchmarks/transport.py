@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compare the throughput of the available transports against a local
+mock server::
+
+    python benchmarks/transport.py [requests]
+"""
+
+import sys
+import threading
+from time import time
+
+import oauth2
+
+from scoopy.client import ScoopItAPI
+from scoopy.mockserver import MockServer
+from scoopy.transport import Httplib2Transport, PooledTransport
+
+REQUESTS = 2000
+THREADS = 4
+
+
+def run(name, transport, url, requests, threads=1):
+    api = ScoopItAPI('key', 'secret', transport=transport)
+    api.oauth.token = oauth2.Token('token', 'secret')
+    per_thread = requests // threads
+    def worker():
+        for i in range(per_thread):
+            api.request(url, {'id': i})
+    threads = [threading.Thread(target=worker) for i in range(threads)]
+    start = time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time() - start
+    print("%-32s %8.1f req/s" % (name, per_thread * len(threads) / elapsed))
+    transport.close()
+
+
+def main():
+    requests = REQUESTS
+    if len(sys.argv) > 1:
+        requests = int(sys.argv[1])
+    server = MockServer()
+    server.start()
+    url = server.base_url + '/api/1/post'
+    try:
+        # httplib2.Http (shared by oauth2.Client) isn't thread-safe, the
+        # transports are compared from a single thread
+        run('httplib2 (shared client)', Httplib2Transport(), url, requests)
+        run('pooled', PooledTransport(), url, requests)
+        run('pooled, %d threads' % THREADS, PooledTransport(pool_size=THREADS),
+            url, requests, THREADS)
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,835 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.asyncclient
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Non-blocking flavour of :class:`scoopy.client.ScoopItAPI`: a single
+:class:`EventLoop` multiplexes every request, so thousands of them can
+be in flight without using threads::
+
+    api = AsyncScoopItAPI(key, secret, max_concurrency=200)
+    api.load_oauth_token('token.db')
+    topics = api.run(gather([api.topic(i, order='user') for i in ids]))
+"""
+
+import errno
+import heapq
+import select
+import socket
+from collections import deque
+from time import time
+from urlparse import urlsplit
+
+from scoopy.client import BulkResult, ScoopItAPI, ScoopItError
+from scoopy.futures import Future
+from scoopy.instrumentation import CallEvent
+from scoopy.transport import (
+    IDEMPOTENT_METHODS, Response, TransportError, decode_content
+)
+
+__all__ = [
+    'EventLoop',
+    'ResponseParser',
+    'AsyncTransport',
+    'AsyncScoopItAPI',
+]
+
+READ = 0x001
+WRITE = 0x004
+ERROR = 0x008 | 0x010 | 0x020
+
+_CONNECT_PENDING = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+_WOULD_BLOCK = (errno.EAGAIN, errno.EWOULDBLOCK)
+
+
+class _SelectPoller(object):
+    """
+    Fallback for platforms without :func:`select.poll`.
+    """
+    def __init__(self):
+        self.fds = {}
+
+    def register(self, fd, events):
+        self.fds[fd] = events
+    modify = register
+
+    def unregister(self, fd):
+        self.fds.pop(fd, None)
+
+    def poll(self, timeout):
+        readers = [fd for fd, ev in self.fds.items() if ev & READ]
+        writers = [fd for fd, ev in self.fds.items() if ev & WRITE]
+        if timeout is not None:
+            timeout = timeout / 1000.0
+        r, w, x = select.select(readers, writers, readers + writers, timeout)
+        events = {}
+        for fd in r:
+            events[fd] = events.get(fd, 0) | READ
+        for fd in w:
+            events[fd] = events.get(fd, 0) | WRITE
+        for fd in x:
+            events[fd] = events.get(fd, 0) | ERROR
+        return events.items()
+
+
+class EventLoop(object):
+    """
+    A minimal single-threaded I/O loop, dispatching socket events and
+    timers to callbacks.
+    """
+
+    def __init__(self):
+        if hasattr(select, 'poll'):
+            self.poller = select.poll()
+        else:
+            self.poller = _SelectPoller()
+        self.handlers = {}
+        self.timers = []
+        self.ready = deque()
+        self.sequence = 0
+
+    def add_handler(self, fd, handler, events):
+        """
+        Call ``handler(events)`` whenever the file descriptor is ready.
+        """
+        self.handlers[fd] = handler
+        self.poller.register(fd, events | ERROR)
+
+    def update_handler(self, fd, events):
+        self.poller.modify(fd, events | ERROR)
+
+    def remove_handler(self, fd):
+        if self.handlers.pop(fd, None) is not None:
+            self.poller.unregister(fd)
+
+    def call_soon(self, callback, *args):
+        self.ready.append((callback, args))
+
+    def call_later(self, delay, callback, *args):
+        """
+        Call ``callback(*args)`` after ``delay`` seconds, the returned
+        timer can be given to :meth:`cancel`.
+        """
+        self.sequence += 1
+        timer = [time() + delay, self.sequence, callback, args]
+        heapq.heappush(self.timers, timer)
+        return timer
+
+    def cancel(self, timer):
+        timer[2] = None
+
+    def run_once(self):
+        """
+        Wait for a single batch of events and run the due callbacks.
+        """
+        timeout = None
+        if self.ready:
+            timeout = 0
+        elif self.timers:
+            timeout = max(0, self.timers[0][0] - time())
+        if self.handlers or timeout is not None:
+            if timeout is not None:
+                timeout = int(timeout * 1000)
+            try:
+                events = self.poller.poll(timeout)
+            except (select.error, IOError) as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                events = []
+            for fd, event in events:
+                handler = self.handlers.get(fd)
+                if handler is not None:
+                    handler(event)
+        now = time()
+        while self.timers and self.timers[0][0] <= now:
+            deadline, sequence, callback, args = heapq.heappop(self.timers)
+            if callback is not None:
+                callback(*args)
+        for i in range(len(self.ready)):
+            callback, args = self.ready.popleft()
+            callback(*args)
+
+    def run_until_complete(self, future):
+        """
+        Run the loop until the given future is done and return its result.
+        """
+        while not future.done():
+            if not (self.handlers or self.timers or self.ready):
+                raise RuntimeError("nothing left to run, the future can't complete")
+            self.run_once()
+        return future.result()
+
+
+class ResponseParser(object):
+    """
+    Incremental HTTP/1.x response parser.
+    """
+
+    def __init__(self, method='GET'):
+        self.method = method
+        self.buffer = ''
+        self.state = 'status'
+        self.status = None
+        self.reason = None
+        self.headers = []
+        self.body = []
+        self.remaining = None
+        self.will_close = False
+        self.complete = False
+
+    def feed(self, data):
+        """
+        Feed received data to the parser, returns True once the whole
+        response has been received.
+        """
+        self.buffer += data
+        while self.buffer and not self.complete:
+            if not getattr(self, '_parse_' + self.state.replace('-', '_'))():
+                break
+        return self.complete
+
+    def feed_eof(self):
+        """
+        Signal the connection was closed, returns True if the response
+        was complete.
+        """
+        if self.state == 'until-close':
+            self.complete = True
+        return self.complete
+
+    def _line(self):
+        index = self.buffer.find('\r\n')
+        if index < 0:
+            return None
+        line, self.buffer = self.buffer[:index], self.buffer[index+2:]
+        return line
+
+    def _parse_status(self):
+        line = self._line()
+        if line is None:
+            return False
+        parts = line.split(' ', 2)
+        try:
+            self.status = int(parts[1])
+        except (IndexError, ValueError):
+            raise TransportError("malformed status line: %r" % line)
+        self.reason = ''
+        if len(parts) > 2:
+            self.reason = parts[2]
+        self.will_close = parts[0] == 'HTTP/1.0'
+        self.state = 'headers'
+        return True
+
+    def _parse_headers(self):
+        line = self._line()
+        if line is None:
+            return False
+        if line:
+            name, value = line.split(':', 1)
+            self.headers.append((name.strip().lower(), value.strip()))
+            return True
+        headers = dict(self.headers)
+        connection = headers.get('connection', '').lower()
+        if connection == 'close':
+            self.will_close = True
+        elif connection == 'keep-alive':
+            self.will_close = False
+        if (self.method == 'HEAD') or (self.status in (204, 304)) or \
+                (100 <= self.status < 200):
+            self.complete = True
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            self.state = 'chunk-size'
+        elif 'content-length' in headers:
+            self.remaining = int(headers['content-length'])
+            self.state = 'body'
+            self.complete = not self.remaining
+        else:
+            self.will_close = True
+            self.state = 'until-close'
+        return True
+
+    def _parse_body(self):
+        data = self.buffer[:self.remaining]
+        self.buffer = self.buffer[self.remaining:]
+        self.body.append(data)
+        self.remaining -= len(data)
+        if not self.remaining:
+            if self.state == 'body':
+                self.complete = True
+            else:
+                self.state = 'chunk-end'
+        return True
+    _parse_chunk_data = _parse_body
+
+    def _parse_until_close(self):
+        self.body.append(self.buffer)
+        self.buffer = ''
+        return True
+
+    def _parse_chunk_size(self):
+        line = self._line()
+        if line is None:
+            return False
+        try:
+            self.remaining = int(line.split(';', 1)[0], 16)
+        except ValueError:
+            raise TransportError("malformed chunk size: %r" % line)
+        if self.remaining:
+            self.state = 'chunk-data'
+        else:
+            self.state = 'trailer'
+        return True
+
+    def _parse_chunk_end(self):
+        line = self._line()
+        if line is None:
+            return False
+        self.state = 'chunk-size'
+        return True
+
+    def _parse_trailer(self):
+        line = self._line()
+        if line is None:
+            return False
+        if not line:
+            self.complete = True
+        return True
+
+    def response(self):
+        """
+        Return the parsed ``(response, content)`` tuple.
+        """
+        response = Response(self.status, self.reason, self.headers)
+        return response, decode_content(response, ''.join(self.body))
+
+
+class _Connection(object):
+    """
+    A non-blocking, possibly kept-alive, connection to a host.
+    """
+    def __init__(self, key):
+        self.key = key
+        self.socket = None
+        self.requests = 0
+        self.last_used = time()
+
+
+class _Exchange(object):
+    """
+    A single request/response exchange on a connection.
+    """
+    def __init__(self, transport, prepare, future):
+        self.transport = transport
+        self.prepare = prepare
+        self.future = future
+        self.connection = None
+        self.reused = False
+        # whether some of the request went out on the connection
+        self.sent = False
+        self.outgoing = ''
+        self.parser = None
+        self.timer = None
+        self.attempts = 0
+
+    def start(self):
+        loop = self.transport.loop
+        try:
+            uri, method, body, headers = self.prepare()
+            parsed = urlsplit(uri)
+            if parsed.scheme != 'http':
+                raise TransportError(
+                    "unsupported URL scheme for async requests: %s" % parsed.scheme
+                )
+            key = (parsed.hostname, parsed.port or 80)
+            path = parsed.path or '/'
+            if parsed.query:
+                path = '%s?%s' % (path, parsed.query)
+            lines = ['%s %s HTTP/1.1' % (method, path), 'Host: %s' % parsed.netloc]
+            headers = dict(headers or {})
+            if body or method == 'POST':
+                headers['Content-Length'] = str(len(body or ''))
+            for name, value in headers.items():
+                lines.append('%s: %s' % (name, value))
+            self.outgoing = '\r\n'.join(lines) + '\r\n\r\n' + (body or '')
+            self.method = method
+        except Exception as e:
+            self.finish(exception=e)
+            return
+        self.timer = loop.call_later(self.transport.timeout, self.on_timeout)
+        self.send(key)
+
+    def send(self, key):
+        self.attempts += 1
+        self.parser = ResponseParser(self.method)
+        self.pending = self.outgoing
+        self.sent = False
+        self.connection = self.transport.get_connection(key)
+        self.reused = self.connection.socket is not None
+        loop = self.transport.loop
+        if self.reused:
+            loop.add_handler(self.connection.socket.fileno(), self.on_event, WRITE)
+            return
+        try:
+            address = self.transport.resolve(key)
+            sock = socket.socket(address[0], address[1], address[2])
+            sock.setblocking(0)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.connection.socket = sock
+            err = sock.connect_ex(address[4])
+            if err and err not in _CONNECT_PENDING:
+                raise socket.error(err, errno.errorcode.get(err, str(err)))
+        except socket.error as e:
+            self.fail(e)
+            return
+        loop.add_handler(sock.fileno(), self.on_event, WRITE)
+
+    def on_event(self, events):
+        try:
+            if events & WRITE:
+                self.on_writable()
+            elif events & READ:
+                self.on_readable()
+            elif events & ERROR:
+                err = self.connection.socket.getsockopt(
+                    socket.SOL_SOCKET, socket.SO_ERROR
+                )
+                raise socket.error(err, errno.errorcode.get(err, 'connection error'))
+        except (socket.error, TransportError) as e:
+            self.fail(e)
+
+    def on_writable(self):
+        sock = self.connection.socket
+        if self.pending is self.outgoing:
+            err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if err:
+                raise socket.error(err, errno.errorcode.get(err, str(err)))
+        try:
+            sent = sock.send(self.pending)
+        except socket.error as e:
+            if e.args[0] in _WOULD_BLOCK:
+                return
+            raise
+        self.pending = self.pending[sent:]
+        self.sent = True
+        if not self.pending:
+            self.transport.loop.update_handler(sock.fileno(), READ)
+
+    def on_readable(self):
+        sock = self.connection.socket
+        try:
+            data = sock.recv(65536)
+        except socket.error as e:
+            if e.args[0] in _WOULD_BLOCK:
+                return
+            raise
+        if not data:
+            if self.parser.feed_eof():
+                self.parser.will_close = True
+                self.complete()
+                return
+            raise socket.error(errno.ECONNRESET, 'connection closed by peer')
+        if self.parser.feed(data):
+            self.complete()
+
+    def complete(self):
+        connection, self.connection = self.connection, None
+        self.transport.loop.remove_handler(connection.socket.fileno())
+        connection.requests += 1
+        self.transport.release_connection(connection, not self.parser.will_close)
+        try:
+            result = self.parser.response()
+        except TransportError as e:
+            self.finish(exception=e)
+            return
+        self.finish(result=result)
+
+    def fail(self, error):
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            if connection.socket is not None:
+                self.transport.loop.remove_handler(connection.socket.fileno())
+            self.transport.release_connection(connection, False)
+        # a kept-alive connection may have been closed by the server in
+        # the meantime, the request is then sent again on a fresh one:
+        # always if it couldn't be sent, only for idempotent methods if
+        # the server may have received it
+        if self.reused and (self.parser.status is None) and (self.attempts < 2) and \
+                ((not self.sent) or (self.method in IDEMPOTENT_METHODS)):
+            self.send(connection.key)
+            return
+        if not isinstance(error, TransportError):
+            error = TransportError("%s request failed: %s" % (self.method, error))
+        self.finish(exception=error)
+
+    def on_timeout(self):
+        self.timer = None
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            if connection.socket is not None:
+                self.transport.loop.remove_handler(connection.socket.fileno())
+            self.transport.release_connection(connection, False)
+        self.finish(exception=TransportError("request timed out"))
+
+    def finish(self, result=None, exception=None):
+        if self.timer is not None:
+            self.transport.loop.cancel(self.timer)
+            self.timer = None
+        self.transport.exchange_done(self)
+        if exception is not None:
+            self.future.set_exception(exception)
+        else:
+            self.future.set_result(result)
+
+
+class AsyncTransport(object):
+    """
+    Non-blocking HTTP/1.1 transport running on an :class:`EventLoop`.
+    At most ``max_connections`` requests are in flight at once, the
+    following ones are queued, and connections are kept alive per host.
+    Only plain http URLs are supported.
+    """
+
+    def __init__(self, loop, max_connections=100, idle_timeout=60,
+                 max_requests=100, timeout=30):
+        """
+        :param loop: The loop running the requests.
+        :type loop: :class:`EventLoop`.
+        :param max_connections: Maximum number of requests in flight.
+        :type max_connections: int.
+        :param idle_timeout: Seconds after which an idle connection is
+                             discarded instead of being reused.
+        :type idle_timeout: int.
+        :param max_requests: Number of requests after which a connection
+                             is closed (None for unlimited).
+        :type max_requests: int or None.
+        :param timeout: Seconds after which a request is aborted.
+        :type timeout: int.
+        """
+        self.loop = loop
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.active = 0
+        self.queue = deque()
+        self.idle = {}
+        self.addresses = {}
+
+    def request(self, uri, method='GET', body=None, headers=None):
+        """
+        Send a request, returns a :class:`scoopy.futures.Future` holding
+        the ``(response, content)`` tuple.
+        """
+        return self.schedule(lambda: (uri, method, body, headers))
+
+    def schedule(self, prepare):
+        """
+        Send a request built by ``prepare()`` once a slot is available,
+        ``prepare`` must return a ``(uri, method, body, headers)`` tuple.
+        This allows signing requests right before they are sent.
+        """
+        future = Future()
+        exchange = _Exchange(self, prepare, future)
+        if self.active < self.max_connections:
+            self.active += 1
+            exchange.start()
+        else:
+            self.queue.append(exchange)
+        return future
+
+    def exchange_done(self, exchange):
+        self.active -= 1
+        if self.queue:
+            self.active += 1
+            self.loop.call_soon(self.queue.popleft().start)
+
+    def resolve(self, key):
+        address = self.addresses.get(key)
+        if address is None:
+            address = socket.getaddrinfo(key[0], key[1], 0, socket.SOCK_STREAM)[0]
+            self.addresses[key] = address
+        return address
+
+    def get_connection(self, key):
+        idle = self.idle.get(key)
+        now = time()
+        while idle:
+            connection = idle.pop()
+            if now - connection.last_used < self.idle_timeout:
+                return connection
+            connection.socket.close()
+        return _Connection(key)
+
+    def release_connection(self, connection, reusable=True):
+        if (self.max_requests is not None) and \
+                (connection.requests >= self.max_requests):
+            reusable = False
+        if reusable:
+            connection.last_used = time()
+            self.idle.setdefault(connection.key, []).append(connection)
+        elif connection.socket is not None:
+            connection.socket.close()
+            connection.socket = None
+
+    def close(self):
+        """
+        Close every idle connection.
+        """
+        for idle in self.idle.values():
+            for connection in idle:
+                connection.socket.close()
+        self.idle.clear()
+
+
+class AsyncScoopItAPI(ScoopItAPI):
+    """
+    Same as :class:`scoopy.client.ScoopItAPI`, except the API methods
+    (:meth:`profile`, :meth:`topic`, :meth:`post`, :meth:`notifications`,
+    :meth:`compilation`, :meth:`resolve`) return a
+    :class:`scoopy.futures.Future` instead of blocking. Futures can be
+    combined with :func:`scoopy.futures.gather` or awaited in functions
+    decorated with :func:`scoopy.futures.coroutine`, and are resolved by
+    running the loop (see :meth:`run`).
+
+    OAuth token operations stay blocking, and write actions go through
+    the thread-based :attr:`writes` pipeline, their futures are waited
+    for with ``result()`` rather than :meth:`run`.
+
+    Bulk methods (:meth:`topics_many`, :meth:`posts_many`,
+    :meth:`profiles_many`, :meth:`resolve_many`) return a future of all
+    their results. Paging and streaming iterators, and the response
+    cache, are only available with :class:`scoopy.client.ScoopItAPI`.
+    """
+
+    def __init__(self, consumer_key, consumer_secret, loop=None,
+                 max_concurrency=100, timeout=30, **kwargs):
+        """
+        :param consumer_key: The application's API consumer key.
+        :type consumer_key: str.
+        :param consumer_secret: The application's API consumer secret.
+        :param loop: The loop running requests (a new one by default).
+        :type loop: :class:`EventLoop` or None.
+        :param max_concurrency: Maximum number of requests in flight.
+        :type max_concurrency: int.
+        :param timeout: Seconds after which a request is aborted.
+        :type timeout: int.
+
+        Other keyword arguments are those of
+        :class:`scoopy.client.ScoopItAPI`, the ``transport`` one being
+        only used for OAuth token operations.
+        """
+        if kwargs.get('cache') is not None:
+            raise ScoopItError("AsyncScoopItAPI can't use a response cache")
+        super(AsyncScoopItAPI, self).__init__(consumer_key, consumer_secret, **kwargs)
+        if loop is None:
+            loop = EventLoop()
+        self.loop = loop
+        self.async_transport = AsyncTransport(
+            loop, max_connections=max_concurrency, timeout=timeout
+        )
+
+    def request(self, url, params, method='GET', event=None):
+        """
+        Make a request to an API end-point, request will be signed using
+        the current OAuth token right before being sent.
+
+        :returns: :class:`scoopy.futures.Future` -- Data returned by the server.
+        """
+        if (event is None) and self.hooks:
+            event = CallEvent(url, method)
+            return self.track(event, self.request(url, params, method, event))
+        if (self.flights is not None) and (method == 'GET'):
+            return self.flights.call_async(
+                self.request_key(url, params),
+                lambda: self._request(url, params, method, event)
+            )
+        return self._request(url, params, method, event)
+
+    def _request(self, url, params, method, event=None):
+        def prepare():
+            if event is None:
+                url_, body, headers = self.oauth.prepare(url, params, method)
+                return url_, method, body, headers
+            event.timed('network', sent[0])
+            start = time()
+            url_, body, headers = self.oauth.prepare(url, params, method)
+            event.timed('sign', start)
+            sent[0] = time()
+            return url_, method, body, headers
+        # start of the current network phase, waiting for a free
+        # connection included
+        sent = [None]
+        retry = self.retry
+        result = Future()
+        def attempt(number):
+            if retry is not None:
+                try:
+                    retry.before(url)
+                except Exception as e:
+                    result.set_exception(e)
+                    return
+            if event is not None:
+                event.attempts += 1
+                sent[0] = time()
+            self.schedule(prepare).add_done_callback(
+                lambda future: done(number, future)
+            )
+        def done(number, future):
+            status, exception = None, future._exception
+            if exception is None:
+                status = future._result[0]
+            if event is not None:
+                event.timed('network', sent[0])
+                if exception is None:
+                    event.status = status['status']
+                    event.size = len(future._result[1])
+            if retry is not None:
+                retry.after(url, status, exception)
+                if retry.should_retry(method, number, status, exception):
+                    delay = retry.delay(number, status)
+                    retry.retrying(url, number, delay, status, exception)
+                    self.loop.call_later(delay, attempt, number + 1)
+                    return
+            result._complete(future._result, exception)
+        attempt(1)
+        return result.then(lambda response: self.handle_response(
+            response[0], response[1], event
+        ))
+
+    def schedule(self, prepare):
+        """
+        Schedule a request once the rate limiter allows it.
+
+        :param prepare: Function returning the signed request as a
+                        (url, method, body, headers) tuple.
+        :type prepare: callable.
+        :returns: :class:`scoopy.futures.Future` -- (response headers,
+                  response body).
+        """
+        limiter = self.rate_limiter
+        delay = 0
+        if limiter is not None:
+            delay = limiter.reserve()
+        if delay <= 0:
+            return self.async_transport.schedule(prepare)
+        future = Future()
+        def send():
+            sent = self.async_transport.schedule(prepare)
+            sent.add_done_callback(
+                lambda f: future._complete(f._result, f._exception)
+            )
+        self.loop.call_later(delay, send)
+        return future
+
+    def call(self, url, params, convert):
+        if not self.hooks:
+            return self.request(url, params).then(
+                lambda response: convert(response, self.new_identity_map())
+            )
+        event = CallEvent(url)
+        def build(response):
+            start = time()
+            result = convert(response, self.new_identity_map())
+            event.timed('build', start)
+            return result
+        return self.track(event, self.request(url, params, event=event).then(build))
+
+    def track(self, event, future):
+        """
+        Emit an event once a future is done.
+        """
+        def done(future):
+            self.hooks.emit(event.finish(future._exception))
+        future.add_done_callback(done)
+        return future
+
+    def fetch_many(self, fetch, keys, ordered=False, workers=4):
+        """
+        Call ``fetch(key)``, which returns a future, for every key with at
+        most ``workers`` fetches in flight.
+
+        :returns: :class:`scoopy.futures.Future` -- list of
+                  :class:`scoopy.client.BulkResult` objects, in the order
+                  of the keys (whatever ``ordered`` is).
+        """
+        keys = list(keys)
+        results = [None] * len(keys)
+        remaining = [len(keys)]
+        pending = iter(enumerate(keys))
+        future = Future()
+        def start():
+            for index, key in pending:
+                try:
+                    fetched = fetch(key)
+                except Exception as e:
+                    fetched = Future()
+                    fetched.set_exception(e)
+                fetched.add_done_callback(
+                    lambda f, index=index, key=key: done(index, key, f)
+                )
+                return
+        def done(index, key, fetched):
+            if fetched._exception is not None:
+                results[index] = BulkResult(key, error=fetched._exception)
+            else:
+                results[index] = BulkResult(key, fetched._result)
+            remaining[0] -= 1
+            if not remaining[0]:
+                future.set_result(results)
+            else:
+                start()
+        if not keys:
+            future.set_result(results)
+        for i in range(workers):
+            start()
+        return future
+
+    def resolve_many(self, entity, short_names, workers=4):
+        """
+        Same as :meth:`scoopy.client.ScoopItAPI.resolve_many`.
+
+        :returns: :class:`scoopy.futures.Future` -- dict of
+                  :class:`scoopy.client.BulkResult` objects by short name.
+        """
+        results, missing = self._resolve_cached(entity, short_names)
+        fetched = self.fetch_many(
+            lambda key: self.resolve(entity, missing[key][0]),
+            missing.keys(), workers=workers
+        )
+        return fetched.then(
+            lambda fetched: self._resolve_fetched(results, missing, fetched)
+        )
+
+    def iter_pages(self, fetch, since, page_size, prefetch=True):
+        raise ScoopItError("paging iterators need the blocking ScoopItAPI")
+
+    def stream(self, url, params, path, cls):
+        raise ScoopItError("streaming needs the blocking ScoopItAPI")
+
+    def immediate(self, value):
+        future = Future()
+        future.set_result(value)
+        return future
+
+    def run(self, future):
+        """
+        Run the loop until the future is done and return its result.
+        """
+        return self.loop.run_until_complete(future)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.cache
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from time import time
+from urllib import urlencode
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+__all__ = [
+    'CacheEntry',
+    'MemoryCache',
+    'DiskCache',
+    'ResponseCache',
+    'ResolverCache',
+    'request_key',
+]
+
+
+def request_key(url, params, token=None):
+    """
+    Build a key identifying a GET request, parameters order doesn't
+    matter.
+
+    :param token: Key of the OAuth token the request is signed with,
+                  responses of user-scoped end-points depend on it.
+    :type token: str or None.
+    """
+    key = url
+    if params:
+        key = '%s?%s' % (url, urlencode(sorted(params.items())))
+    if token is not None:
+        # digested, so that keys stored on disk don't hold tokens
+        key = '%s %s' % (hashlib.sha1(token).hexdigest()[:16], key)
+    return key
+
+
+class CacheEntry(object):
+    """
+    A cached API response along with its validators.
+    """
+    def __init__(self, content, etag=None, last_modified=None, stored_at=None):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        if stored_at is None:
+            stored_at = time()
+        self.stored_at = stored_at
+        # decoded content, only kept in memory
+        self.data = None
+
+    def __getstate__(self):
+        return (self.content, self.etag, self.last_modified, self.stored_at)
+
+    def __setstate__(self, state):
+        self.content, self.etag, self.last_modified, self.stored_at = state
+        self.data = None
+
+    @property
+    def age(self):
+        return time() - self.stored_at
+
+
+class MemoryCache(object):
+    """
+    In-memory LRU storage for cache entries.
+    """
+
+    def __init__(self, max_entries=1000, max_age=None):
+        """
+        :param max_entries: Maximum number of entries, the least recently
+                            used ones are evicted first.
+        :type max_entries: int.
+        :param max_age: Seconds after which an entry is evicted, even if
+                        it could still be revalidated (defaults to never).
+        :type max_age: int or None.
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        self.lock.acquire()
+        try:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return None
+            if (self.max_age is not None) and (entry.age > self.max_age):
+                self.evictions += 1
+                return None
+            self.entries[key] = entry
+            return entry
+        finally:
+            self.lock.release()
+
+    def set(self, key, entry):
+        self.lock.acquire()
+        try:
+            self.entries.pop(key, None)
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        finally:
+            self.lock.release()
+
+    def delete(self, key):
+        self.lock.acquire()
+        try:
+            self.entries.pop(key, None)
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.entries.clear()
+        finally:
+            self.lock.release()
+
+
+class DiskCache(object):
+    """
+    On-disk storage for cache entries, one file per entry.
+    """
+
+    def __init__(self, directory, max_age=None):
+        """
+        :param directory: Directory holding the entries (created if needed).
+        :type directory: str.
+        :param max_age: Seconds after which an entry is evicted, even if
+                        it could still be revalidated (defaults to never).
+        :type max_age: int or None.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.max_age = max_age
+        self.evictions = 0
+
+    def path(self, key):
+        return os.path.join(
+            self.directory, hashlib.sha1(key).hexdigest() + '.cache'
+        )
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            infile = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            try:
+                stored_key, entry = pickle.load(infile)
+            except Exception:
+                return None
+        finally:
+            infile.close()
+        if stored_key != key:
+            return None
+        if (self.max_age is not None) and (entry.age > self.max_age):
+            self.delete(key)
+            self.evictions += 1
+            return None
+        return entry
+
+    def set(self, key, entry):
+        # write to a temporary file first, so readers never see a
+        # partially written entry
+        path = self.path(key)
+        tmp_path = '%s.%d.%d' % (path, os.getpid(), threading.current_thread().ident)
+        outfile = open(tmp_path, 'wb')
+        try:
+            pickle.dump((key, entry), outfile, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            outfile.close()
+        os.rename(tmp_path, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                os.remove(os.path.join(self.directory, name))
+
+
+class ResponseCache(object):
+    """
+    Cache for API responses, sitting between
+    :meth:`scoopy.client.ScoopItAPI.request` and the OAuth layer.
+
+    Entries younger than ``ttl`` are served without contacting the
+    server. Older ones are revalidated with a conditional request when
+    the server sent an ETag or a Last-Modified header, and downloaded
+    again otherwise.
+    """
+
+    def __init__(self, backend=None, ttl=60):
+        """
+        :param backend: Storage for entries (defaults to a
+                        :class:`MemoryCache`).
+        :type backend: :class:`MemoryCache` or :class:`DiskCache`.
+        :param ttl: Seconds during which an entry is used as is.
+        :type ttl: int.
+        """
+        if backend is None:
+            backend = MemoryCache()
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.lock = threading.Lock()
+
+    def key(self, url, params, token=None):
+        """
+        Build the cache key of a request, see :func:`request_key`.
+        """
+        return request_key(url, params, token)
+
+    def lookup(self, key):
+        """
+        Get the entry for a key and tell whether it can be used as is.
+
+        :returns: tuple -- (:class:`CacheEntry` or None, fresh)
+        """
+        entry = self.backend.get(key)
+        fresh = (entry is not None) and (entry.age < self.ttl)
+        self.count(fresh and 'hits' or 'misses')
+        return entry, fresh
+
+    def conditional_headers(self, entry):
+        """
+        Headers revalidating an entry, empty if it has no validators.
+        """
+        headers = {}
+        if entry.etag is not None:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified is not None:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, key, response, content, data=None):
+        """
+        Store a successful response.
+        """
+        entry = CacheEntry(
+            content,
+            response.get('etag'),
+            response.get('last-modified'),
+        )
+        entry.data = data
+        self.backend.set(key, entry)
+        return entry
+
+    def revalidated(self, key, entry):
+        """
+        Mark an entry as fresh again after a 304 response.
+        """
+        entry.stored_at = time()
+        self.backend.set(key, entry)
+        self.count('revalidations')
+
+    def count(self, counter):
+        self.lock.acquire()
+        try:
+            setattr(self, counter, getattr(self, counter) + 1)
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        """
+        Counters of the cache usage, suitable for exporting.
+
+        :returns: dict.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.backend.evictions,
+        }
+
+
+class ResolverCache(object):
+    """
+    Cache of short name to ID mappings, as returned by
+    :meth:`scoopy.client.ScoopItAPI.resolve`. Short names are case
+    insensitive and the cache can be saved to a file to be reused by
+    later processes.
+    """
+
+    def __init__(self, filepath=None):
+        """
+        :param filepath: File to load mappings from, if it exists, and
+                         to save them to by default.
+        :type filepath: str or None.
+        """
+        self.filepath = filepath
+        self.ids = {}
+        self.lock = threading.Lock()
+        if (filepath is not None) and os.path.exists(filepath):
+            self.load(filepath)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def key(self, entity, short_name):
+        return (entity.lower(), short_name.lower())
+
+    def get(self, entity, short_name):
+        return self.ids.get(self.key(entity, short_name))
+
+    def set(self, entity, short_name, entity_id):
+        self.lock.acquire()
+        try:
+            self.ids[self.key(entity, short_name)] = entity_id
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.ids.clear()
+        finally:
+            self.lock.release()
+
+    def save(self, filepath=None):
+        """
+        Save the mappings to a file (defaults to the one given to the
+        constructor).
+        """
+        if filepath is None:
+            filepath = self.filepath
+        self.lock.acquire()
+        try:
+            ids = dict(self.ids)
+        finally:
+            self.lock.release()
+        tmp_path = '%s.%d' % (filepath, os.getpid())
+        outfile = open(tmp_path, 'wb')
+        try:
+            pickle.dump(ids, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            outfile.close()
+        os.rename(tmp_path, filepath)
+
+    def load(self, filepath):
+        """
+        Load mappings saved by :meth:`save`, they are added to the
+        current ones.
+        """
+        infile = open(filepath, 'rb')
+        try:
+            ids = pickle.load(infile)
+        finally:
+            infile.close()
+        self.lock.acquire()
+        try:
+            self.ids.update(ids)
+        finally:
+            self.lock.release()
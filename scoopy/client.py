@@ -21,18 +21,20 @@
 .. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
 """
 
-try:
-    import json # python >= 2.6
-except ImportError:
-    try:
-        import simplejson as json
-    except ImportError:
-        print("Python < 2.6 and simplejson not found, exiting.")
-        import sys
-        sys.exit(2)
+import Queue
+from collections import deque
+from time import time
 
-from scoopy.datatypes import Notification, Post, User, Topic
+from scoopy.cache import ResolverCache, request_key
+from scoopy.datatypes import (
+    IdentityMap, Notification, Post, Timestamp, User, Topic, TopicStats
+)
+from scoopy.decoders import get_decoder
+from scoopy.futures import SingleFlight, ThreadPool
+from scoopy.instrumentation import CallEvent, Hooks
 from scoopy.oauth import OAuth
+from scoopy.streaming import iter_json_array
+from scoopy.writes import WritePipeline
 
 __all__ = [
     'PROFILE_URL',
@@ -44,6 +46,7 @@ __all__ = [
     'RESOLVER_URL',
     'ScoopItAPI',
     'ScoopItError',
+    'BulkResult',
 ]
 
 BASE_URL = 'http://www.scoop.it'
@@ -61,6 +64,11 @@ ERROR_MESSAGES = {
     '403': 'Forbidden',
     '404': 'Not Found',
     '405': 'Method Not Allowed',
+    '429': 'Too Many Requests',
+    '500': 'Internal Server Error',
+    '502': 'Bad Gateway',
+    '503': 'Service Unavailable',
+    '504': 'Gateway Timeout',
 }
 
 
@@ -71,19 +79,123 @@ class ScoopItError(Exception):
         return repr(self.value)
 
 
+class BulkResult(object):
+    """
+    Outcome of fetching a single item in a bulk operation.
+    """
+    def __init__(self, key, value=None, error=None):
+        """
+        :param key: The requested ID.
+        :param value: The fetched object (None if the fetch failed).
+        :param error: The exception raised while fetching (None on success).
+        :type error: Exception or None.
+        """
+        self.key = key
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __str__(self):
+        if self.error is not None:
+            return "<BulkResult(key=%r, error=%s)>" % (self.key, self.error)
+        return "<BulkResult(key=%r)>" % self.key
+
+
+def _counted(chunks, event):
+    # body chunks, their size added up as the event's size
+    event.size = 0
+    try:
+        for chunk in chunks:
+            event.size += len(chunk)
+            yield chunk
+    finally:
+        chunks.close()
+
+
 class ScoopItAPI(object):
     """
     Main class to access the Scoop.it API.
     """
     #XXX: take care not to duplicate objets actions in ScoopItAPI and objects methods
 
-    def __init__(self, consumer_key, consumer_secret):
+    def __init__(self, consumer_key, consumer_secret, transport=None,
+                 lazy=False, keep_raw=True, identity_map='response', cache=None,
+                 resolver_cache=None, rate_limiter=None, retry=None,
+                 single_flight=False, json_decoder=None, base_url=None,
+                 hooks=(), write_workers=4):
         """
         :param consumer_key: The application's API consumer key.
         :type consumer_key: str.
         :param consumer_secret: The application's API consumer secret.
+        :param transport: The transport used to send requests (defaults
+                          to a :class:`scoopy.transport.PooledTransport`).
+        :type transport: :class:`scoopy.transport.Transport` or None.
+        :param lazy: Convert nested objects (posts of a topic, comments
+                     of a post, ...) on first access instead of when the
+                     response is received.
+        :type lazy: bool.
+        :param keep_raw: Keep the received data in the ``raw`` attribute
+                         of objects, set it to False to save memory.
+        :type keep_raw: bool.
+        :param identity_map: Scope in which repeated entities (users,
+                             topics, posts, sources) share one instance:
+                             'response', 'api' (as long as objects are
+                             in use), or None to always build new ones.
+        :type identity_map: str or None.
+        :param cache: Cache for GET responses.
+        :type cache: :class:`scoopy.cache.ResponseCache` or None.
+        :param resolver_cache: Cache of resolved short names (defaults to
+                               an in-memory one).
+        :type resolver_cache: :class:`scoopy.cache.ResolverCache` or None.
+        :param rate_limiter: Limiter delaying requests to stay under the
+                             API quota.
+        :type rate_limiter: :class:`scoopy.ratelimit.RateLimiter` or None.
+        :param retry: Policy used to send failed requests again.
+        :type retry: :class:`scoopy.retry.RetryPolicy` or None.
+        :param single_flight: Make concurrent identical GET requests share
+                              a single request to the server.
+        :type single_flight: bool.
+        :param json_decoder: Name of the library decoding responses (see
+                             :data:`scoopy.decoders.DECODERS`) or a
+                             function, defaults to the fastest installed.
+        :type json_decoder: str, callable or None.
+        :param base_url: Server to send requests to instead of Scoop.it
+                         (eg: a :class:`scoopy.mockserver.MockServer`).
+        :type base_url: str or None.
+        :param hooks: Functions called with the
+                      :class:`scoopy.instrumentation.CallEvent` of every
+                      call, more can be added to :attr:`hooks` later.
+        :type hooks: list.
+        :param write_workers: Maximum number of write actions sent at
+                              once, see :attr:`writes`.
+        :type write_workers: int.
         """
-        self.oauth = OAuth(consumer_key, consumer_secret)
+        if identity_map not in (None, 'response', 'api'):
+            raise ScoopItError("identity_map can only be None, 'response' or 'api'")
+        self.oauth = OAuth(consumer_key, consumer_secret, transport, base_url)
+        self.lazy = lazy
+        self.keep_raw = keep_raw
+        self.identity_map = identity_map
+        self.cache = cache
+        if resolver_cache is None:
+            resolver_cache = ResolverCache()
+        self.resolver_cache = resolver_cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        if not callable(json_decoder):
+            json_decoder = get_decoder(json_decoder)
+        self.json_decoder = json_decoder
+        self.flights = None
+        if single_flight:
+            self.flights = SingleFlight()
+        self.hooks = Hooks(hooks)
+        self.writes = WritePipeline(self, write_workers)
+        self.identity = None
+        if identity_map == 'api':
+            self.identity = IdentityMap(weak=True)
 
     def get_oauth_request_token(self):
         """
@@ -133,7 +245,7 @@ class ScoopItAPI(object):
         """
         self.oauth.load_token(filepath)
 
-    def request(self, url, params, method='GET'):
+    def request(self, url, params, method='GET', event=None):
         """
         Make a request to an API end-point, request will be signed using
         the current OAuth token.
@@ -144,19 +256,157 @@ class ScoopItAPI(object):
         :type params: dict.
         :param method: The HTTP method used to perform the request.
         :type method: str.
+        :param event: Event recording the request timings, one is
+                      created and emitted if hooks are registered.
+        :type event: :class:`scoopy.instrumentation.CallEvent` or None.
         :returns: dict -- Data returned by the server.
         """
-        status, data = self.oauth.request(url, params, method)
-        data = json.loads(data)
+        if (event is None) and self.hooks:
+            event = CallEvent(url, method)
+            return self.hooks.track(
+                event, lambda: self.request(url, params, method, event)
+            )
+        if (self.flights is not None) and (method == 'GET'):
+            return self.flights.call(
+                self.request_key(url, params),
+                lambda: self._request(url, params, method, event)
+            )
+        return self._request(url, params, method, event)
+
+    def request_key(self, url, params):
+        """
+        Build a key identifying a GET request signed with the current
+        token, see :func:`scoopy.cache.request_key`.
+        """
+        token = self.oauth.token
+        if token is not None:
+            token = token.key
+        return request_key(url, params, token)
+
+    def _request(self, url, params, method, event=None):
+        if (self.cache is None) or (method != 'GET'):
+            status, data = self.send(url, params, method, event=event)
+            return self.handle_response(status, data, event)
+        return self.cached_request(url, params, event)
+
+    def send(self, url, params, method='GET', headers=None, event=None):
+        """
+        Send a signed request once the rate limiter allows it, retrying
+        it according to the retry policy. Each attempt is signed again.
+
+        :returns: tuple -- (response headers, response body)
+        """
+        if self.retry is None:
+            return self._send(url, params, method, headers, event)
+        return self.retry.call(
+            lambda: self._send(url, params, method, headers, event), url, method
+        )
+
+    def _send(self, url, params, method, headers, event=None):
+        if event is None:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return self.oauth.request(url, params, method, headers)
+        if self.rate_limiter is not None:
+            start = time()
+            self.rate_limiter.acquire()
+            event.timed('throttle', start)
+        event.attempts += 1
+        status, content = self.oauth.timed_request(url, params, method, headers, event)
+        event.status = status['status']
+        event.size = len(content)
+        return status, content
+
+    def cached_request(self, url, params, event=None):
+        """
+        Make a GET request through the response cache, stale entries are
+        revalidated when they have validators.
+        """
+        cache = self.cache
+        key = self.request_key(url, params)
+        entry, fresh = cache.lookup(key)
+        headers = None
+        if entry is not None:
+            if fresh:
+                if event is not None:
+                    event.cached = True
+                if entry.data is None:
+                    entry.data = self.handle_response({'status': '200'}, entry.content, event)
+                return entry.data
+            headers = cache.conditional_headers(entry)
+        status, content = self.send(url, params, 'GET', headers, event)
+        if (entry is not None) and (status['status'] == '304'):
+            cache.revalidated(key, entry)
+            if entry.data is None:
+                entry.data = self.handle_response({'status': '200'}, entry.content, event)
+            return entry.data
+        data = self.handle_response(status, content, event)
+        if status['status'] == '200':
+            cache.store(key, status, content, data)
+        return data
+
+    def handle_response(self, status, data, event=None):
+        """
+        Decode the body of an API response.
+
+        :param status: The response headers.
+        :type status: dict.
+        :param data: The response body.
+        :type data: str.
+        :param event: Event recording the decoding time.
+        :type event: :class:`scoopy.instrumentation.CallEvent` or None.
+        :returns: dict -- The decoded data.
+        """
+        if event is None:
+            data = self.json_decoder(data)
+        else:
+            start = time()
+            data = self.json_decoder(data)
+            event.timed('decode', start)
         if not data['success']:
             raise ScoopItError(
                 "%s %s: %s" % (
                     status['status'],
-                    ERROR_MESSAGES[status['status']],
+                    ERROR_MESSAGES.get(status['status'], 'Unexpected Error'),
                     data['error']
                 ))
         return data
 
+    def call(self, url, params, convert):
+        """
+        Request an API end-point and convert its response.
+
+        :param url: The end-point url.
+        :type url: str.
+        :param params: Parameters to pass to the request.
+        :type params: dict.
+        :param convert: Called with the decoded response and an
+                        identity map, its return value is returned.
+        :type convert: callable.
+        """
+        if not self.hooks:
+            return convert(self.request(url, params), self.new_identity_map())
+        event = CallEvent(url)
+        def instrumented():
+            response = self.request(url, params, event=event)
+            start = time()
+            result = convert(response, self.new_identity_map())
+            event.timed('build', start)
+            return result
+        return self.hooks.track(event, instrumented)
+
+    def new_identity_map(self):
+        """
+        Create the identity map used to convert a single response.
+
+        :returns: :class:`scoopy.datatypes.IdentityMap` or None.
+        """
+        if self.identity_map is None:
+            return None
+        # lazy objects keep the map to convert their nested data, its
+        # entries mustn't keep the other objects of the response alive
+        return IdentityMap(parent=self.identity, weak=self.lazy)
+
     def profile(self, profile_id=None, curated=None, curable=None):
         """
         Access a user's profile.
@@ -179,8 +429,8 @@ class ScoopItAPI(object):
             params['curated'] = curated
         if curable is not None:
             params['curable'] = curable
-        response = self.request(PROFILE_URL, params)
-        return User(self, response['user'])
+        return self.call(PROFILE_URL, params,
+                         lambda response, identity: User.build(self, response['user'], identity))
 
     def topic(self, topic_id, curated=None, curable=None,
                   order=None, tag=None, since=None):
@@ -227,22 +477,51 @@ class ScoopItAPI(object):
             params['tag'] = tag
         if since is not None:
             params['since'] = since.value
-        response = self.request(TOPIC_URL, params)
-        return Topic(self, response['topic'], response['stats'])
+        def convert(response, identity):
+            topic = Topic.build(self, response['topic'], identity)
+            topic.stats = TopicStats(self, response['stats'])
+            return topic
+        return self.call(TOPIC_URL, params, convert)
 
-    def topic_reorder(self, topic_id, post_ids, start):
-        #TODO: write ScoopItAPI.topic_reorder() method
-        raise NotImplementedError
+    def write(self, url, target, action, target_id, **params):
+        """
+        Queue a write action in :attr:`writes`, parameters set to None
+        are left out.
+
+        :param target: Kind of object the action applies to ('post' or
+                       'topic').
+        :type target: str.
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        request_params = {'action': action, 'id': target_id}
+        for name, value in params.items():
+            if value is not None:
+                request_params[name] = value
+        return self.writes.submit(url, (target, target_id), request_params)
+
+    def topic_reorder(self, topic_id, post_ids, start=0):
+        """
+        Reorder posts of a topic.
+
+        :param topic_id: The topic's ID.
+        :type topic_id: int.
+        :param post_ids: IDs of the posts, in their new order.
+        :type post_ids: list.
+        :param start: Position of the first post.
+        :type start: int.
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        return self.write(TOPIC_URL, 'topic', 'reorder', topic_id,
+                          postId=list(post_ids), start=start)
 
     def topic_follow(self, topic_id):
-        self._topic_fum('follow', topic_id)
+        return self._topic_fum('follow', topic_id)
     def topic_unfollow(self, topic_id):
-        self._topic_fum('unfollow', topic_id)
+        return self._topic_fum('unfollow', topic_id)
     def topic_markread(self, topic_id):
-        self._topic_fum('markread', topic_id)
+        return self._topic_fum('markread', topic_id)
     def _topic_fum(self, action, topic_id):
-        #TODO: write ScoopItAPI._topic_fum() method
-        raise NotImplementedError
+        return self.write(TOPIC_URL, 'topic', action, topic_id)
 
     def post(self, post_id):
         """
@@ -255,8 +534,8 @@ class ScoopItAPI(object):
         params = {
             'id': post_id,
         }
-        response = self.request(POST_URL, params)
-        return Post(self, response)
+        return self.call(POST_URL, params,
+                         lambda response, identity: Post.build(self, response, identity))
 
     def post_prepare(self, url):
         #TODO: write ScoopItAPI.post_prepare() method
@@ -271,36 +550,78 @@ class ScoopItAPI(object):
         raise NotImplementedError
 
     def post_thank(self, post_id):
-        #TODO: write ScoopItAPI.post_thank() method
-        raise NotImplementedError
+        """
+        Thank the curator of a post.
 
-    def post_accept(self, post_id, title, content, image_url, share_on, topic_id):
-        #TODO: write ScoopItAPI.post_accept() method
-        raise NotImplementedError
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        return self.write(POST_URL, 'post', 'thank', post_id)
+
+    def post_accept(self, post_id, title=None, content=None, image_url=None,
+                    share_on=None, topic_id=None):
+        """
+        Accept a curable post, optionally changing its title, content
+        or image.
+
+        :param share_on: Sharers to share the post on, as expected by
+                         the API.
+        :type share_on: str or None.
+        :param topic_id: Topic the post is accepted in.
+        :type topic_id: int or None.
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        return self.write(POST_URL, 'post', 'accept', post_id, title=title,
+                          content=content, imageUrl=image_url,
+                          shareOn=share_on, topicId=topic_id)
 
     def post_forward(self, post_id, title, content, image_url, share_on, topic_id):
         #TODO: write ScoopItAPI.post_forward() method
         raise NotImplementedError
 
-    def post_refuse(self, post_id, reason):
-        #TODO: write ScoopItAPI.post_refuse() method
-        raise NotImplementedError
+    def post_refuse(self, post_id, reason=None):
+        """
+        Refuse a curable post.
+
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        return self.write(POST_URL, 'post', 'refuse', post_id, reason=reason)
 
     def post_delete(self, post_id):
-        #TODO: write ScoopItAPI.post_delete() method
-        raise NotImplementedError
+        """
+        Delete a curated post.
 
-    def post_edit(self, post_id, tags, title, content, image_url):
-        #TODO: write ScoopItAPI.post_edit() method
-        raise NotImplementedError
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        return self.write(POST_URL, 'post', 'delete', post_id)
+
+    def post_edit(self, post_id, tags=None, title=None, content=None, image_url=None):
+        """
+        Edit a curated post, only the given fields are changed.
+
+        :param tags: The post's new tags.
+        :type tags: list or None.
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        if tags is not None:
+            tags = list(tags)
+        return self.write(POST_URL, 'post', 'edit', post_id, tag=tags,
+                          title=title, content=content, imageUrl=image_url)
 
     def post_pin(self, post_id):
-        #TODO: write ScoopItAPI.post_pin() method
-        raise NotImplementedError
+        """
+        Pin a post on top of its topic.
+
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        return self.write(POST_URL, 'post', 'pin', post_id)
 
     def post_rescoop(self, post_id, topic_id):
-        #TODO: write ScoopItAPI.post_rescoop() method
-        raise NotImplementedError
+        """
+        Rescoop a post in another topic.
+
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        return self.write(POST_URL, 'post', 'rescoop', post_id, destTopicId=topic_id)
 
     def post_share(self, post_id):
         #TODO: write ScoopItAPI.post_share() method
@@ -317,8 +638,8 @@ class ScoopItAPI(object):
         params = {}
         if since is not None:
             params['since'] = since.value
-        response = self.request(NOTIFICATIONS_URL, params)
-        return [Notification(self, n) for n in response['notifications']]
+        return self.call(NOTIFICATIONS_URL, params,
+                         lambda response, identity: [Notification(self, n, identity) for n in response['notifications']])
 
     def compilation(self, since, count):
         """
@@ -335,8 +656,339 @@ class ScoopItAPI(object):
             'since': since.value,
             'count': count,
         }
-        response = self.request(COMPILATION_URL, params)
-        return [Post(self, p) for p in response['posts']]
+        return self.call(COMPILATION_URL, params,
+                         lambda response, identity: [Post.build(self, p, identity) for p in response['posts']])
+
+    def stream_compilation(self, since, count):
+        """
+        Same as :meth:`compilation`, but posts are converted while the
+        response is being received and yielded one at a time, memory
+        use doesn't grow with ``count``.
+
+        :return: iterator -- :class:`scoopy.datatypes.Post` objects.
+        """
+        params = {
+            'since': since.value,
+            'count': count,
+        }
+        return self.stream(COMPILATION_URL, params, ('posts',), Post)
+
+    def stream_topic_posts(self, topic_id, curated, order=None, tag=None,
+                           since=None):
+        """
+        Stream the curated posts of a topic, converting them while the
+        response is being received, see :meth:`topic`.
+
+        :return: iterator -- :class:`scoopy.datatypes.Post` objects.
+        """
+        if (since is None) and (order is None):
+            raise ScoopItError('at least order or since must be specified')
+        params = {
+            'id': topic_id,
+            'curated': curated,
+        }
+        if order is not None:
+            params['order'] = order
+        if tag is not None:
+            params['tag'] = tag
+        if since is not None:
+            params['since'] = since.value
+        return self.stream(TOPIC_URL, params, ('topic', 'curatedPosts'), Post)
+
+    def stream(self, url, params, path, cls):
+        """
+        Make a GET request and yield objects built from the items of an
+        array of the response as they are received.
+
+        Objects only share nested entities through weak references, so
+        the ones the caller doesn't keep are freed right away. Transports
+        which can't stream responses fall back to a regular request.
+
+        :param path: Keys leading to the array in the response.
+        :type path: tuple.
+        :param cls: Type of the objects to build.
+        :type cls: :class:`scoopy.datatypes.ScoopItObject` subclass.
+        """
+        if not self.hooks:
+            return self._stream(url, params, path, cls)
+        return self._tracked_stream(url, params, path, cls)
+
+    def _tracked_stream(self, url, params, path, cls):
+        # the event is emitted once the objects are consumed
+        event = CallEvent(url)
+        objects = self._stream(url, params, path, cls, event)
+        try:
+            for obj in objects:
+                yield obj
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            objects.close()
+            self.hooks.emit(event.finish())
+
+    def _stream(self, url, params, path, cls, event=None):
+        identity = None
+        if self.identity_map is not None:
+            identity = IdentityMap(parent=self.identity, weak=True)
+        if not hasattr(self.oauth.transport, 'stream'):
+            items = self.request(url, params, event=event)
+            for key in path:
+                items = items[key]
+            if event is None:
+                for item in items:
+                    yield cls.build(self, item, identity)
+                return
+            for item in items:
+                start = time()
+                obj = cls.build(self, item, identity)
+                event.timed('build', start)
+                yield obj
+            return
+        if event is None:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            status, chunks = self.oauth.stream(url, params)
+        else:
+            if self.rate_limiter is not None:
+                start = time()
+                self.rate_limiter.acquire()
+                event.timed('throttle', start)
+            event.attempts += 1
+            status, chunks = self.oauth.stream(url, params, event=event)
+            event.status = status['status']
+            chunks = _counted(chunks, event)
+        if status['status'] != '200':
+            self.handle_response(status, ''.join(chunks), event)
+        try:
+            if event is None:
+                for item in iter_json_array(chunks, path):
+                    yield cls.build(self, item, identity)
+            else:
+                for item in iter_json_array(chunks, path):
+                    start = time()
+                    obj = cls.build(self, item, identity)
+                    event.timed('build', start)
+                    yield obj
+            # read the end of the response, so the connection is reused
+            for chunk in chunks:
+                pass
+        finally:
+            chunks.close()
+
+    def iter_compilation(self, since, page_size=30, prefetch=True):
+        """
+        Iterate over the compilation of followed topics of the current
+        user, fetching it one page at a time, see :meth:`compilation`.
+
+        :param since: Only retrieve posts newer than this.
+        :type since: :class:`scoopy.datatypes.Timestamp`.
+        :param page_size: Number of posts requested per page.
+        :type page_size: int.
+        :param prefetch: Fetch the next page in the background while the
+                         current one is being consumed.
+        :type prefetch: bool.
+        :return: iterator -- :class:`scoopy.datatypes.Post` objects.
+        """
+        return self.iter_pages(self.compilation, since, page_size, prefetch)
+
+    def iter_topic_posts(self, topic_id, since, page_size=30, prefetch=True,
+                         **kwargs):
+        """
+        Iterate over the curated posts of a topic, fetching them one page
+        at a time, see :meth:`topic` for the accepted keyword arguments.
+
+        :param topic_id: The topic's ID.
+        :type topic_id: int.
+        :param since: Only retrieve curated posts newer than this.
+        :type since: :class:`scoopy.datatypes.Timestamp`.
+        :param page_size: Number of posts requested per page.
+        :type page_size: int.
+        :param prefetch: Fetch the next page in the background while the
+                         current one is being consumed.
+        :type prefetch: bool.
+        :return: iterator -- :class:`scoopy.datatypes.Post` objects.
+        """
+        def fetch(cursor, count):
+            topic = self.topic(topic_id, curated=count, since=cursor, **kwargs)
+            return getattr(topic, 'curatedPosts', None) or []
+        return self.iter_pages(fetch, since, page_size, prefetch)
+
+    def iter_pages(self, fetch, since, page_size, prefetch=True):
+        """
+        Call ``fetch(cursor, count)`` to get pages of at most ``count``
+        posts newer than the ``since`` cursor, until a page comes back
+        with less than ``count`` posts. Pages are sorted by date, in
+        either order:
+
+        * oldest first: the cursor moves to the newest post of each page.
+          It's left on that date instead of going past it, so posts
+          sharing it which didn't fit in the page are not lost, the ones
+          already seen are skipped when they come back.
+        * newest first: a page holds the newest posts, the ones between
+          the cursor and the page can only be reached by asking for more
+          posts at once, ``count`` is doubled until they all fit. The
+          posts already yielded are skipped.
+
+        :raises: :class:`ScoopItError` if more than ``page_size`` posts
+                 share a date in oldest first pages, they can't all be
+                 reached.
+        """
+        pool = None
+        next_page = None
+        cursor = since
+        count = page_size
+        if prefetch:
+            pool = ThreadPool(1)
+            next_page = pool.submit(fetch, cursor, count)
+        # IDs of the yielded posts which may come back in the next page
+        seen = set()
+        try:
+            while True:
+                if next_page is not None:
+                    page = next_page.result()
+                else:
+                    page = fetch(cursor, count)
+                next_page = None
+                posts = [p for p in page if p.id not in seen]
+                dates = [d for d in map(self._post_date, page) if d is not None]
+                last = (len(page) < count) or (not dates)
+                if not last:
+                    if dates[0] > dates[-1]:
+                        # newest first, the oldest posts are missing
+                        count *= 2
+                        seen.update(p.id for p in posts)
+                    elif not posts:
+                        # the page is full of already seen posts: more
+                        # than page_size posts share the cursor date, the
+                        # following ones can't be reached
+                        raise ScoopItError(
+                            "more than %d posts share the date %s, use a larger "
+                            "page_size" % (page_size, cursor.value)
+                        )
+                    else:
+                        newest = max(dates)
+                        if (cursor is None) or (newest != cursor.value):
+                            seen = set()
+                        cursor = Timestamp(newest)
+                        seen.update(
+                            p.id for p in posts if self._post_date(p) == newest
+                        )
+                    if pool is not None:
+                        next_page = pool.submit(fetch, cursor, count)
+                for post in posts:
+                    yield post
+                if last:
+                    return
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def _post_date(self, post):
+        date = getattr(post, 'curationDate', None)
+        if date is None:
+            date = getattr(post, 'publicationDate', None)
+        if date is None:
+            return None
+        return date.value
+
+    def topics_many(self, topic_ids, ordered=False, workers=4, **kwargs):
+        """
+        Fetch several topics concurrently, see :meth:`topic` for the
+        accepted keyword arguments.
+
+        :param topic_ids: The IDs of the topics to fetch.
+        :type topic_ids: iterable.
+        :param ordered: Yield results in input order instead of
+                        completion order.
+        :type ordered: bool.
+        :param workers: Maximum number of simultaneous requests.
+        :type workers: int.
+        :return: iterator -- :class:`BulkResult` objects holding
+                 (:class:`scoopy.datatypes.Topic`) values.
+        """
+        return self.fetch_many(
+            lambda topic_id: self.topic(topic_id, **kwargs),
+            topic_ids, ordered, workers
+        )
+
+    def posts_many(self, post_ids, ordered=False, workers=4):
+        """
+        Fetch several posts concurrently.
+
+        :param post_ids: The IDs of the posts to fetch.
+        :type post_ids: iterable.
+        :param ordered: Yield results in input order instead of
+                        completion order.
+        :type ordered: bool.
+        :param workers: Maximum number of simultaneous requests.
+        :type workers: int.
+        :return: iterator -- :class:`BulkResult` objects holding
+                 :class:`scoopy.datatypes.Post` values.
+        """
+        return self.fetch_many(self.post, post_ids, ordered, workers)
+
+    def profiles_many(self, profile_ids, ordered=False, workers=4, **kwargs):
+        """
+        Fetch several user profiles concurrently, see :meth:`profile`
+        for the accepted keyword arguments.
+
+        :param profile_ids: The IDs of the profiles to fetch.
+        :type profile_ids: iterable.
+        :param ordered: Yield results in input order instead of
+                        completion order.
+        :type ordered: bool.
+        :param workers: Maximum number of simultaneous requests.
+        :type workers: int.
+        :return: iterator -- :class:`BulkResult` objects holding
+                 :class:`scoopy.datatypes.User` values.
+        """
+        return self.fetch_many(
+            lambda profile_id: self.profile(profile_id, **kwargs),
+            profile_ids, ordered, workers
+        )
+
+    def fetch_many(self, fetch, keys, ordered=False, workers=4):
+        """
+        Call ``fetch(key)`` for every key on a bounded thread pool and
+        yield a :class:`BulkResult` for each of them, failures are
+        reported per key and don't stop the other fetches.
+
+        Only a few keys are submitted ahead of the consumer, so ``keys``
+        can be a lazy iterable of any length.
+        """
+        pool = ThreadPool(workers)
+        keys = iter(keys)
+        window = workers * 2
+        in_flight = deque()
+        completed = Queue.Queue()
+        def submit():
+            for key in keys:
+                future = pool.submit(fetch, key)
+                if not ordered:
+                    future.add_done_callback(
+                        lambda f, key=key: completed.put((key, f))
+                    )
+                in_flight.append((key, future))
+                return
+        try:
+            for i in range(window):
+                submit()
+            while in_flight:
+                if ordered:
+                    key, future = in_flight.popleft()
+                    future.wait()
+                else:
+                    # only the number of futures in flight matters here
+                    key, future = completed.get()
+                    in_flight.pop()
+                submit()
+                if future.exception() is not None:
+                    yield BulkResult(key, error=future.exception())
+                else:
+                    yield BulkResult(key, future.result())
+        finally:
+            pool.shutdown(wait=False)
 
     def test(self):
         #TODO: write ScoopItAPI.test() method
@@ -358,9 +1010,67 @@ class ScoopItAPI(object):
         """
         if entity.lower() not in ('user', 'topic'):
             raise ScoopItError("entity value can only be 'User' or 'Topic'")
+        cached = self.resolver_cache.get(entity, short_name)
+        if cached is not None:
+            return self.immediate(cached)
         params = {
             'type': entity,
             'shortName': short_name,
         }
-        response = self.request(RESOLVER_URL, params)
-        return response['id']
+        def convert(response, identity):
+            self.resolver_cache.set(entity, short_name, response['id'])
+            return response['id']
+        return self.call(RESOLVER_URL, params, convert)
+
+    def resolve_many(self, entity, short_names, workers=4):
+        """
+        Resolve several short names of the same entity type, duplicates
+        are resolved once and names missing from the resolver cache are
+        resolved concurrently.
+
+        :param entity: The type of entity to resolve ('user' or 'topic').
+        :type entity: str.
+        :param short_names: The short names to resolve.
+        :type short_names: iterable.
+        :param workers: Maximum number of simultaneous requests.
+        :type workers: int.
+        :return: dict -- :class:`BulkResult` objects (holding IDs) by
+                 short name.
+        """
+        results, missing = self._resolve_cached(entity, short_names)
+        fetched = self.fetch_many(
+            lambda key: self.resolve(entity, missing[key][0]),
+            missing.keys(), workers=workers
+        )
+        return self._resolve_fetched(results, missing, fetched)
+
+    def _resolve_cached(self, entity, short_names):
+        # results of the cached names, and the missing ones by cache key
+        if entity.lower() not in ('user', 'topic'):
+            raise ScoopItError("entity value can only be 'User' or 'Topic'")
+        results = {}
+        missing = {}
+        for short_name in short_names:
+            if short_name in results:
+                continue
+            cached = self.resolver_cache.get(entity, short_name)
+            if cached is not None:
+                results[short_name] = BulkResult(short_name, cached)
+            else:
+                key = self.resolver_cache.key(entity, short_name)
+                missing.setdefault(key, []).append(short_name)
+                results[short_name] = None
+        return results, missing
+
+    def _resolve_fetched(self, results, missing, fetched):
+        for result in fetched:
+            for short_name in missing[result.key]:
+                results[short_name] = BulkResult(short_name, result.value, result.error)
+        return results
+
+    def immediate(self, value):
+        """
+        Return an already known value the same way API methods return
+        their results.
+        """
+        return value
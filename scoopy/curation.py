@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.curation
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Local buffer of the curable posts of a topic, refilled in the
+background::
+
+    queue = CurationQueue(api, topic_id)
+    for post in queue:
+        if is_relevant(post):
+            queue.accept(post)
+        else:
+            queue.refuse(post, 'off-topic')
+"""
+
+import Queue
+import threading
+from collections import deque
+from time import time
+
+from scoopy.futures import ThreadPool
+
+__all__ = [
+    'CurationQueue',
+]
+
+
+class CurationQueue(object):
+    """
+    Hands out the curable posts of a topic one at a time from a local
+    buffer. The buffer is refilled in the background when it gets below
+    ``low_water`` posts, so getting a post only waits for the network
+    when the buffer is empty.
+
+    Posts already handed out, accepted or refused are never handed out
+    again, even if the server still lists them. Once a decision has been
+    sent, refills started afterwards don't return the post anymore and
+    it's no longer tracked.
+    """
+
+    def __init__(self, api, topic_id, size=50, low_water=10, order='curationDate'):
+        """
+        :param api: The API instance.
+        :type api: :class:`scoopy.client.ScoopItAPI`.
+        :param topic_id: The topic's ID.
+        :type topic_id: int.
+        :param size: Number of curable posts requested per refill, on
+                     top of those handed out or decided but not sent yet.
+        :type size: int.
+        :param low_water: Buffered posts under which a refill starts.
+        :type low_water: int.
+        :param order: Order of the curable posts, see
+                      :meth:`scoopy.client.ScoopItAPI.topic`.
+        :type order: str.
+        """
+        self.api = api
+        self.topic_id = topic_id
+        self.size = size
+        self.low_water = low_water
+        self.order = order
+        self.buffer = deque()
+        # IDs of the posts handed out, accepted or refused (until the
+        # decision is sent)
+        self.taken = set()
+        # ID of the posts whose decision was sent -> number of the refills
+        # started at that time, the running one may still return them
+        self.settled = {}
+        self.started = 0
+        self.pool = ThreadPool(1)
+        self.refilling = None
+        self.refills = 0
+        self.error = None
+        self.condition = threading.Condition()
+        self.condition.acquire()
+        try:
+            self.refill()
+        finally:
+            self.condition.release()
+
+    def refill(self):
+        """
+        Start a background refill, unless one is running (the condition
+        must be held).
+        """
+        if self.refilling is None:
+            self.refilling = self.pool.submit(self._refill)
+
+    def _refill(self):
+        error = None
+        posts = []
+        self.condition.acquire()
+        try:
+            # the server lists the taken posts until their decision is sent
+            count = self.size + len(self.taken)
+            self.started += 1
+            started = self.started
+        finally:
+            self.condition.release()
+        try:
+            topic = self.api.topic(self.topic_id, curable=count, order=self.order)
+            posts = topic.curablePosts or []
+        except Exception as e:
+            error = e
+        self.condition.acquire()
+        try:
+            buffered = set(post.id for post in self.buffer)
+            settled = self.settled
+            for post in posts:
+                if (post.id not in self.taken) and (post.id not in buffered) and \
+                        (post.id not in settled):
+                    self.buffer.append(post)
+                    buffered.add(post.id)
+            # sent before this refill started, the server left them out
+            for post_id, refills in list(settled.items()):
+                if refills < started:
+                    del settled[post_id]
+            self.error = error
+            self.refilling = None
+            self.refills += 1
+            self.condition.notify_all()
+        finally:
+            self.condition.release()
+
+    def get(self, block=True, timeout=None):
+        """
+        Get the next curable post.
+
+        :param block: Wait for a refill if the buffer is empty.
+        :type block: bool.
+        :param timeout: Seconds to wait for at most.
+        :type timeout: float or None.
+        :returns: :class:`scoopy.datatypes.Post`.
+        :raises: :class:`Queue.Empty` if no post is left (or none came
+                 in time), or the exception which made the last refill
+                 fail.
+        """
+        if timeout is not None:
+            deadline = time() + timeout
+        self.condition.acquire()
+        try:
+            if not self.buffer:
+                refills = self.refills
+                self.refill()
+                if not block:
+                    raise Queue.Empty
+                # wait for a refill to complete, a running one will do
+                while (not self.buffer) and (self.refills == refills):
+                    if timeout is None:
+                        self.condition.wait()
+                        continue
+                    remaining = deadline - time()
+                    if remaining <= 0:
+                        raise Queue.Empty
+                    self.condition.wait(remaining)
+                if not self.buffer:
+                    if self.error is not None:
+                        raise self.error
+                    raise Queue.Empty
+            post = self.buffer.popleft()
+            self.taken.add(post.id)
+            if len(self.buffer) < self.low_water:
+                self.refill()
+            return post
+        finally:
+            self.condition.release()
+
+    def __iter__(self):
+        """
+        Iterate over the curable posts until none is left.
+        """
+        while True:
+            try:
+                yield self.get()
+            except Queue.Empty:
+                return
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def release(self, post):
+        """
+        Put back a post which was handed out but not curated, it will
+        be the next one handed out.
+        """
+        self.condition.acquire()
+        try:
+            self.taken.discard(post.id)
+            self.buffer.appendleft(post)
+        finally:
+            self.condition.release()
+
+    def decided(self, post):
+        """
+        Record that a post was accepted or refused, so that it's never
+        handed out.
+        """
+        self.condition.acquire()
+        try:
+            self.taken.add(post.id)
+            for buffered in self.buffer:
+                if buffered.id == post.id:
+                    self.buffer.remove(buffered)
+                    break
+            if len(self.buffer) < self.low_water:
+                self.refill()
+        finally:
+            self.condition.release()
+
+    def sent(self, post_id):
+        """
+        Record that the decision on a post was sent, refills started from
+        now on don't need to leave it out.
+        """
+        self.condition.acquire()
+        try:
+            if post_id in self.taken:
+                self.taken.discard(post_id)
+                self.settled[post_id] = self.started
+        finally:
+            self.condition.release()
+
+    def track(self, post, future):
+        # failed decisions stay taken, the server still lists the post
+        def callback(future):
+            if future.exception() is None:
+                self.sent(post.id)
+        future.add_done_callback(callback)
+        return future
+
+    def accept(self, post, **kwargs):
+        """
+        Accept a post, keyword arguments are those of
+        :meth:`scoopy.client.ScoopItAPI.post_accept`.
+
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        self.decided(post)
+        return self.track(post, self.api.post_accept(post.id, **kwargs))
+
+    def refuse(self, post, reason=None):
+        """
+        Refuse a post.
+
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        self.decided(post)
+        return self.track(post, self.api.post_refuse(post.id, reason))
+
+    def close(self):
+        """
+        Wait for a running refill and stop the background thread.
+        """
+        self.pool.shutdown()
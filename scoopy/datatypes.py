@@ -19,12 +19,23 @@
 .. module:: scoopy.datatypes
 
 .. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Data types can be turned into compact bytes, to be cached or sent to
+other processes, with :func:`serialize`, and pickled (which uses the
+same format)::
+
+    data = serialize(topic)
+    topic = deserialize(data, api)
 """
 
 #TODO: expose object's json representation in __str__
 
+import copy
 import datetime
+import marshal
+import struct
 import time
+import weakref
 
 __all__ = [
     'Topic',
@@ -36,29 +47,273 @@ __all__ = [
     'Sharer',
     'Notification',
     'TopicStats',
+    'IdentityMap',
+    'SerializationError',
+    'serialize',
+    'deserialize',
+    'attach',
 ]
 
 
+class Schema(type):
+    """
+    Metaclass turning the ``_fields`` declared by a data type into
+    ``__slots__``, so instances don't carry a ``__dict__``.
+    """
+    def __new__(mcs, name, bases, attrs):
+        inherited = set()
+        for base in bases:
+            inherited.update(getattr(base, '_all_fields', ()))
+        fields = tuple(attrs.get('_fields', ()))
+        if '__slots__' not in attrs:
+            attrs['__slots__'] = tuple(f for f in fields if f not in inherited)
+        attrs['_all_fields'] = frozenset(inherited.union(fields))
+        return type.__new__(mcs, name, bases, attrs)
+
+
+class Nested(object):
+    """
+    Converter used in ``_convert_map`` to turn nested data into
+    objects of the named data type (or into a list of them).
+    """
+    def __init__(self, type_name, many=False):
+        """
+        :param type_name: Name of the data type class in this module.
+        :type type_name: str.
+        :param many: Whether the data is a list of objects.
+        :type many: bool.
+        """
+        self.type_name = type_name
+        self.many = many
+
+    @property
+    def type(self):
+        return globals()[self.type_name]
+
+    def __call__(self, api, data, identity=None):
+        if data is None:
+            # unset fields of objects converted with export.plain()
+            return None
+        cls = self.type
+        if self.many:
+            return [cls.build(api, item, identity) for item in data]
+        return cls.build(api, data, identity)
+
+
+class IdentityMap(object):
+    """
+    Maps entities to objects by type and ID, so an entity appearing
+    several times is represented by a single instance.
+
+    A map scoped to a response can have a parent map scoped to the API
+    instance, which only holds weak references: an object it returns is
+    refreshed with the newer data and shared as long as it's in use.
+    """
+    def __init__(self, parent=None, weak=False):
+        """
+        :param parent: A longer-lived map to look entities up in.
+        :type parent: :class:`IdentityMap` or None.
+        :param weak: Only hold weak references to the objects.
+        :type weak: bool.
+        """
+        if weak:
+            self.objects = weakref.WeakValueDictionary()
+        else:
+            self.objects = {}
+        self.parent = parent
+
+    def __len__(self):
+        return len(self.objects)
+
+    def get(self, cls, key):
+        return self.objects.get((cls, key))
+
+    def add(self, obj, key):
+        self.objects[(obj.__class__, key)] = obj
+
+
 class ScoopItObject(object):
     """
     Ancestor of every ScoopIt data type, holds common stuff.
+
+    Each data type declares its known keys in ``_fields``, they are
+    stored in slots. Unknown keys received from the API are kept in an
+    overflow mapping and are still reachable as attributes.
     """
+    __metaclass__ = Schema
+    __slots__ = ('api', 'raw', '_pending', '_extra', '_identity', '__weakref__')
+    _fields = ()
     _convert_map = {}
+    # key identifying entities in an IdentityMap (None if not an entity)
+    _identity_key = None
 
-    def __init__(self, api, raw_data):
+    def __init__(self, api, raw_data, identity=None):
         """
         :param api: The API instance this object belongs to.
         :type api: :class:`scoopy.api.ScoopItAPI`.
         :param raw_data: The received data to convert to an object.
         :type raw_data: dict.
+        :param identity: Map used to share nested entities.
+        :type identity: :class:`IdentityMap` or None.
         """
         self.api = api
-        self.raw = raw_data
+        self._pending = None
+        self._extra = None
+        self._identity = None
+        self._load(raw_data, identity)
+
+    @classmethod
+    def build(cls, api, raw_data, identity=None):
+        """
+        Create an object from received data, or return the one already
+        known by the identity map for the same entity.
+        """
+        key_name = cls._identity_key
+        if (identity is None) or (key_name is None) or (key_name not in raw_data):
+            return cls(api, raw_data, identity=identity)
+        key = raw_data[key_name]
+        obj = identity.get(cls, key)
+        if obj is not None:
+            # seen earlier in the response, maybe as a partial stub
+            obj._merge(raw_data, identity)
+            return obj
+        parent = identity.parent
+        if parent is not None:
+            obj = parent.get(cls, key)
+        if obj is not None:
+            identity.add(obj, key)
+            obj._load(raw_data, identity)
+            return obj
+        # registered before being initialized, so nested references to
+        # the same entity (eg: post.topic) resolve to this object
+        obj = cls.__new__(cls)
+        identity.add(obj, key)
+        if parent is not None:
+            parent.add(obj, key)
+        obj.__init__(api, raw_data, identity=identity)
+        return obj
+
+    def _load(self, raw_data, identity=None):
+        """
+        Set attributes from received data, previously set attributes
+        which aren't part of the data are left untouched.
+        """
+        self.raw = None
+        if getattr(self.api, 'keep_raw', True):
+            self.raw = raw_data
+        # in lazy mode, nested data is only converted when first accessed
+        lazy = getattr(self.api, 'lazy', False)
+        fields = self._all_fields
+        pending = self._pending
+        extra = self._extra
         for key, value in raw_data.iteritems():
             if key in self._convert_map:
-                setattr(self, key, self._convert_map[key](self.api, value))
-            else:
+                if lazy:
+                    if pending is None:
+                        pending = {}
+                    pending[key] = value
+                    try:
+                        delattr(self, key)
+                    except AttributeError:
+                        pass
+                    continue
+                value = self._convert_map[key](self.api, value, identity)
+            if key in fields:
                 setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._pending = pending
+        self._extra = extra
+        if pending:
+            self._identity = identity
+
+    def _merge(self, raw_data, identity=None):
+        """
+        Set attributes from received data which aren't set yet (or only
+        hold their default value), the others are left untouched.
+        """
+        pending = self._pending
+        extra = self._extra
+        missing = {}
+        for key, value in raw_data.iteritems():
+            if key in self._all_fields:
+                if pending and (key in pending):
+                    continue
+                try:
+                    current = _get(self, key)
+                except AttributeError:
+                    pass
+                else:
+                    if (current is not None) and (current != []):
+                        continue
+            elif extra and (key in extra):
+                continue
+            missing[key] = value
+        if not missing:
+            return
+        raw = self.raw
+        self._load(missing, identity)
+        if (raw is not None) and (self.raw is not None):
+            self.raw = dict(missing)
+            self.raw.update(raw)
+
+    def __getattr__(self, name):
+        # only called for unset slots and unknown keys
+        if name in ('_pending', '_extra', '_identity'):
+            raise AttributeError(name)
+        pending = self._pending
+        if pending and (name in pending):
+            value = self._convert_map[name](self.api, pending[name], self._identity)
+            setattr(self, name, value)
+            pending.pop(name, None)
+            if not pending:
+                # nothing left to convert with the map
+                self._identity = None
+            return value
+        extra = self._extra
+        if extra and (name in extra):
+            return extra[name]
+        raise AttributeError(name)
+
+    def __reduce__(self):
+        # pickled in the compact format, without the API instance
+        return deserialize, (serialize(self),)
+
+    def __copy__(self):
+        # copies keep the API instance and the raw data, unlike pickles
+        cls = self.__class__
+        obj = cls.__new__(cls)
+        obj.api = self.api
+        obj.raw = self.raw
+        obj._identity = self._identity
+        # pending data is consumed as it gets converted
+        obj._pending = self._pending and dict(self._pending) or None
+        obj._extra = self._extra
+        for name in self._all_fields:
+            try:
+                setattr(obj, name, _get(self, name))
+            except AttributeError:
+                pass
+        return obj
+
+    def __deepcopy__(self, memo):
+        cls = self.__class__
+        obj = cls.__new__(cls)
+        memo[id(self)] = obj
+        obj.api = self.api
+        obj.raw = copy.deepcopy(self.raw, memo)
+        obj._identity = self._identity
+        obj._pending = copy.deepcopy(self._pending, memo)
+        obj._extra = copy.deepcopy(self._extra, memo)
+        for name in self._all_fields:
+            try:
+                value = _get(self, name)
+            except AttributeError:
+                continue
+            setattr(obj, name, copy.deepcopy(value, memo))
+        return obj
 
 
 class Topic(ScoopItObject):
@@ -66,15 +321,23 @@ class Topic(ScoopItObject):
     Holds data related to a topic.
     """
     #TODO: handle post actions
+    _fields = (
+        'id', 'name', 'shortName', 'description', 'url', 'lang',
+        'smallImageUrl', 'mediumImageUrl', 'imageUrl', 'largeImageUrl',
+        'creator', 'pinnedPost', 'curablePostCount', 'unreadPostCount',
+        'curatedPostCount', 'curablePosts', 'curatedPosts', 'tags', 'stats',
+    )
     _convert_map = {
-        'creator': lambda api, data: User(api, data),
-        'pinnedPost': lambda api, data: Post(api, data),
-        'curablePosts': lambda api, data: [Post(api, i) for i in data],
-        'curatedPosts': lambda api, data: [Post(api, i) for i in data],
-        'tags': lambda api, data: [TopicTag(api, i) for i in data],
+        'creator': Nested('User'),
+        'pinnedPost': Nested('Post'),
+        'curablePosts': Nested('Post', many=True),
+        'curatedPosts': Nested('Post', many=True),
+        'tags': Nested('TopicTag', many=True),
     }
 
-    def __init__(self, api, raw_data, stats=None):
+    _identity_key = 'id'
+
+    def __init__(self, api, raw_data, stats=None, identity=None):
         self.stats = None
         if stats is not None:
             self.stats = TopicStats(api, stats)
@@ -83,18 +346,25 @@ class Topic(ScoopItObject):
         self.pinnedPost = None
         self.curablePosts = []
         self.curatedPosts = []
-        super(Topic, self).__init__(api, raw_data)
+        super(Topic, self).__init__(api, raw_data, identity)
 
     def __str__(self):
         return "<Topic(name=%s)>" % self.name
 
-    def reorder(self, posts, start):
-        #TODO: write Topic.reorder() method
-        raise NotImplementedError
+    def reorder(self, posts, start=0):
+        """
+        Reorder posts of the topic, see
+        :meth:`scoopy.client.ScoopItAPI.topic_reorder`.
+
+        :param posts: The posts (or their IDs), in their new order.
+        :type posts: list.
+        """
+        return self.api.topic_reorder(
+            self.id, [getattr(post, 'id', post) for post in posts], start
+        )
 
     def _fum(self, action):
-        #TODO: write Topic._fum() method
-        raise NotImplementedError
+        return self.api._topic_fum(action, self.id)
     def follow(self):
         return self._fum('follow')
     def unfollow(self):
@@ -107,6 +377,8 @@ class TopicTag(ScoopItObject):
     """
     Holds data related to a tag of a topic.
     """
+    _fields = ('tag', 'postCount')
+
     def __str__(self):
         return "<TopicTag(tag='%s')>" % self.tag
 
@@ -116,18 +388,29 @@ class Post(ScoopItObject):
     Holds data related to a post.
     """
     #TODO: handle post actions
+    _fields = (
+        'id', 'title', 'content', 'htmlContent', 'htmlFragment', 'insight',
+        'htmlInsight', 'url', 'scoopUrl', 'scoopShortUrl', 'smallImageUrl',
+        'mediumImageUrl', 'imageUrl', 'largeImageUrl', 'imageWidth',
+        'imageHeight', 'imageSize', 'imagePosition', 'tags', 'commentsCount',
+        'thanksCount', 'pageViews', 'pageClicks', 'author', 'isUserSuggestion',
+        'suggestedBy', 'twitterAuthor', 'publicationDate', 'curationDate',
+        'topicId', 'topic', 'pinned', 'pinnable', 'thanked', 'edited',
+        'source', 'comments',
+    )
     _convert_map = {
-        'source': lambda api, data: Source(api, data),
-        'publicationDate': lambda api, data: Timestamp(data),
-        'curationDate': lambda api, data: Timestamp(data),
-        'comments': lambda api, data: [PostComment(api, i) for i in data],
-        'topic': lambda api, data: Topic(api, data),
+        'source': Nested('Source'),
+        'publicationDate': Nested('Timestamp'),
+        'curationDate': Nested('Timestamp'),
+        'comments': Nested('PostComment', many=True),
+        'topic': Nested('Topic'),
     }
+    _identity_key = 'id'
 
-    def __init__(self, api, raw_data):
+    def __init__(self, api, raw_data, identity=None):
         self.thanked = None
         self.topic = None
-        super(Post, self).__init__(api, raw_data)
+        super(Post, self).__init__(api, raw_data, identity)
 
     def __str__(self):
         return "<Post(title='%s')>" % self.title
@@ -146,36 +429,31 @@ class Post(ScoopItObject):
         raise NotImplementedError
 
     def thank(self):
-        #TODO: write Post.thank() method
-        raise NotImplementedError
+        return self.api.post_thank(self.id)
 
-    def accept(self, title, content, image_url, share_on, topic_id):
-        #TODO: write Post.accept() method
-        raise NotImplementedError
+    def accept(self, title=None, content=None, image_url=None, share_on=None,
+               topic_id=None):
+        return self.api.post_accept(self.id, title, content, image_url,
+                                    share_on, topic_id)
 
     def forward(self, title, content, image_url, share_on, topic_id):
         #TODO: write Post.forward() method
         raise NotImplementedError
 
-    def refuse(self, reason):
-        #TODO: write Post.refuse() method
-        raise NotImplementedError
+    def refuse(self, reason=None):
+        return self.api.post_refuse(self.id, reason)
 
     def delete(self):
-        #TODO: write Post.delete() method
-        raise NotImplementedError
+        return self.api.post_delete(self.id)
 
-    def edit(self, tags, title, content, image_url):
-        #TODO: write Post.edit() method
-        raise NotImplementedError
+    def edit(self, tags=None, title=None, content=None, image_url=None):
+        return self.api.post_edit(self.id, tags, title, content, image_url)
 
     def pin(self):
-        #TODO: write Post.pin() method
-        raise NotImplementedError
+        return self.api.post_pin(self.id)
 
     def rescoop(self, topic_id):
-        #TODO: write Post.rescoop() method
-        raise NotImplementedError
+        return self.api.post_rescoop(self.id, topic_id)
 
     def share(self, share_on):
         #TODO: write Post.share() method
@@ -186,9 +464,10 @@ class PostComment(ScoopItObject):
     """
     Holds data related to a comment.
     """
+    _fields = ('author', 'date', 'text')
     _convert_map = {
-        'date': lambda api, data: Timestamp(data),
-        'author': lambda api, data: User(api, data),
+        'date': Nested('Timestamp'),
+        'author': Nested('User'),
     }
 
     def __str__(self):
@@ -200,6 +479,9 @@ class Source(ScoopItObject):
     Holds data related to a source: something that suggests
     content to curate to users.
     """
+    _fields = ('id', 'name', 'description', 'iconUrl', 'type', 'url')
+    _identity_key = 'id'
+
     def __str__(self):
         return "<Source(name='%s')>" % self.name
 
@@ -208,14 +490,20 @@ class User(ScoopItObject):
     """
     Holds data related to a user.
     """
+    _fields = (
+        'id', 'name', 'shortName', 'bio', 'url', 'avatarUrl',
+        'smallAvatarUrl', 'mediumAvatarUrl', 'largeAvatarUrl', 'sharers',
+        'curatedTopics', 'followedTopics', 'stats',
+    )
     _convert_map = {
-        'sharers': lambda api, data: [Sharer(api, i) for i in data],
-        'curatedTopics': lambda api, data: [Topic(api, i) for i in data],
+        'sharers': Nested('Sharer', many=True),
+        'curatedTopics': Nested('Topic', many=True),
     }
+    _identity_key = 'id'
 
-    def __init__(self, api, raw_data):
+    def __init__(self, api, raw_data, identity=None):
         self.sharers = []
-        super(User, self).__init__(api, raw_data)
+        super(User, self).__init__(api, raw_data, identity)
 
     def __str__(self):
         return "<User(name='%s')>" % self.name
@@ -228,6 +516,8 @@ class Sharer(ScoopItObject):
     dedicated website page (eg: twitter account, facebook
     account, tumblr account).
     """
+    _fields = ('sharerId', 'sharerName', 'cnxId', 'name')
+
     def __str__(self):
         return "<Sharer(name='%s')>" % self.name
 
@@ -236,6 +526,7 @@ class Notification(ScoopItObject):
     """
     Holds data related to a notification.
     """
+    _fields = ('id', 'type', 'date', 'user', 'topic', 'post')
     #TODO: find how to represent the notification_type (simply an enum, really needs its own object?)
 
     def __str__(self):
@@ -246,6 +537,8 @@ class TopicStats(ScoopItObject):
     """
     Holds statistics related to a topic.
     """
+    _fields = ('creatorName', 'curable', 'curated', 'uv', 'uvp', 'v', 'vp')
+
     def __str__(self):
         return "<TopicStats(creatorName='%s')>" % self.creatorName
 
@@ -256,6 +549,7 @@ class Timestamp(ScoopItObject):
     This class also provides shortcuts to create Timestamp
     objects for 'yesterday', 'last_month', and 'last_year'.
     """
+    _fields = ('value',)
     one_day = datetime.timedelta(1)
     one_month = datetime.timedelta(30)
     one_year = datetime.timedelta(365)
@@ -267,6 +561,19 @@ class Timestamp(ScoopItObject):
         """
         self.value = value
 
+    @classmethod
+    def build(cls, api, raw_data, identity=None):
+        return cls(raw_data)
+
+    def __reduce__(self):
+        return Timestamp, (self.value,)
+
+    def __copy__(self):
+        return Timestamp(self.value)
+
+    def __deepcopy__(self, memo):
+        return Timestamp(self.value)
+
     def __str__(self):
         datetime_str = datetime.datetime.fromtimestamp(self.value)
         return "<Timestamp(value='%s')>" % str(datetime_str)
@@ -289,3 +596,210 @@ class Timestamp(ScoopItObject):
     def last_year(cls):
         day = datetime.date.today() - Timestamp.one_year
         return Timestamp(Timestamp.from_datetime(day).value)
+
+
+class SerializationError(Exception):
+    """
+    Exception raised when deserializing data which wasn't produced by
+    :func:`serialize`, or by an unsupported version of it.
+    """
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+# serialized data starts with the magic, the format version and (since
+# version 2) the size of the marshalled data, as marshal doesn't always
+# tell truncated data
+MAGIC = 'SCPY'
+FORMAT_VERSION = 2
+_SIZE = struct.Struct('>I')
+# tags of the tuples standing for objects among plain values (decoded
+# JSON has no tuples)
+_REF = 0
+_TIMESTAMP = 1
+_TUPLE = 2
+_get = object.__getattribute__
+
+
+class _Encoder(object):
+
+    def __init__(self):
+        # (class name, field names) of the serialized data types
+        self.types = []
+        self.type_indexes = {}
+        # (type index, set fields mask, their values, extra keys,
+        # pending keys) tuples
+        self.objects = []
+        self.indexes = {}
+
+    def encode(self, value):
+        if isinstance(value, ScoopItObject):
+            if isinstance(value, Timestamp):
+                return (_TIMESTAMP, value.value)
+            return (_REF, self.add(value))
+        if isinstance(value, list):
+            return [self.encode(item) for item in value]
+        if isinstance(value, dict):
+            return dict((key, self.encode(item)) for key, item in value.items())
+        if isinstance(value, tuple):
+            return (_TUPLE, [self.encode(item) for item in value])
+        return value
+
+    def add(self, obj):
+        index = self.indexes.get(id(obj))
+        if index is not None:
+            return index
+        cls = obj.__class__
+        type_index = self.type_indexes.get(cls)
+        if type_index is None:
+            type_index = self.type_indexes[cls] = len(self.types)
+            self.types.append((cls.__name__, tuple(sorted(cls._all_fields))))
+        fields = self.types[type_index][1]
+        index = self.indexes[id(obj)] = len(self.objects)
+        # reserved before encoding the fields, which may refer to obj
+        self.objects.append(None)
+        pending = obj._pending or None
+        # only set fields are stored, flagged in a bit mask
+        mask = 0
+        values = []
+        for bit, name in enumerate(fields):
+            if pending and (name in pending):
+                continue
+            try:
+                value = _get(obj, name)
+            except AttributeError:
+                continue
+            mask |= 1 << bit
+            values.append(self.encode(value))
+        # unknown keys and unconverted nested data are plain JSON values
+        self.objects[index] = (type_index, mask, tuple(values), obj._extra or None, pending)
+        return index
+
+
+def serialize(obj):
+    """
+    Serialize data types, or lists, tuples and dicts of them, to bytes.
+
+    The API instance and the raw data of objects are left out, an entity
+    referenced several times is only stored once, and timestamps are
+    stored as integers.
+
+    :param obj: The value to serialize.
+    :returns: str.
+    """
+    encoder = _Encoder()
+    root = encoder.encode(obj)
+    data = marshal.dumps((encoder.types, encoder.objects, root), 2)
+    return '%s%c%s%s' % (MAGIC, FORMAT_VERSION, _SIZE.pack(len(data)), data)
+
+
+def deserialize(data, api=None):
+    """
+    Rebuild values serialized with :func:`serialize`. Shared entities
+    are shared again, the raw data of objects is None.
+
+    :param data: The serialized value.
+    :type data: str.
+    :param api: The API instance to attach the objects to.
+    :type api: :class:`scoopy.client.ScoopItAPI` or None.
+    :raises: :class:`SerializationError`
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise SerializationError("not serialized data types")
+    if len(data) == len(MAGIC):
+        raise SerializationError("truncated serialized data")
+    version = ord(data[len(MAGIC):len(MAGIC) + 1])
+    start = len(MAGIC) + 1
+    if version == FORMAT_VERSION:
+        header = data[start:start + _SIZE.size]
+        start += _SIZE.size
+        if (len(header) != _SIZE.size) or (_SIZE.unpack(header)[0] != len(data) - start):
+            raise SerializationError("truncated serialized data")
+    elif version != 1:
+        raise SerializationError("unsupported format version %d" % version)
+    try:
+        types, objects, root = marshal.loads(data[start:])
+        return _rebuild(types, objects, root, api)
+    except (EOFError, IndexError, TypeError, ValueError):
+        # marshal may load truncated data up to where it stops
+        raise SerializationError("truncated or corrupted serialized data")
+
+
+def _rebuild(types, objects, root, api):
+    classes = []
+    for name, fields in types:
+        cls = globals().get(name)
+        if not (isinstance(cls, type) and issubclass(cls, ScoopItObject)):
+            raise SerializationError("unknown data type %r" % name)
+        classes.append((cls, fields))
+    # created first, so that references can be resolved in any order
+    instances = []
+    for type_index, mask, values, extra, pending in objects:
+        cls = classes[type_index][0]
+        obj = cls.__new__(cls)
+        obj.api = api
+        obj.raw = None
+        obj._extra = extra
+        obj._pending = pending
+        obj._identity = None
+        instances.append(obj)
+
+    def decode(value):
+        if isinstance(value, tuple):
+            tag, value = value
+            if tag == _REF:
+                return instances[value]
+            if tag == _TIMESTAMP:
+                return Timestamp(value)
+            return tuple([decode(item) for item in value])
+        if isinstance(value, list):
+            return [decode(item) for item in value]
+        if isinstance(value, dict):
+            return dict((key, decode(item)) for key, item in value.items())
+        return value
+
+    for obj, (type_index, mask, values, extra, pending) in zip(instances, objects):
+        cls, fields = classes[type_index]
+        values = iter(values)
+        for bit, name in enumerate(fields):
+            if not mask & (1 << bit):
+                continue
+            value = decode(next(values))
+            if name in cls._all_fields:
+                setattr(obj, name, value)
+            else:
+                # field removed from the data type since serialization
+                if obj._extra is None:
+                    obj._extra = {}
+                obj._extra[name] = value
+    return decode(root)
+
+
+def attach(obj, api):
+    """
+    Set the API instance of deserialized (or unpickled) objects, and of
+    the objects they refer to.
+
+    :returns: ``obj``
+    """
+    seen = set()
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, ScoopItObject) and not isinstance(value, Timestamp):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            value.api = api
+            for name in value._all_fields:
+                try:
+                    stack.append(_get(value, name))
+                except AttributeError:
+                    pass
+    return obj
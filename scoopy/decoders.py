@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.decoders
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+JSON decoders used to read API responses. The fastest of the supported
+libraries which is installed is used by default, the standard library
+one being the fallback.
+
+Decoders take the response body as received (raw bytes), so no decoded
+copy of large responses is made before parsing.
+"""
+
+__all__ = [
+    'DecoderError',
+    'DECODERS',
+    'available_decoders',
+    'get_decoder',
+]
+
+try:
+    basestring
+except NameError: # python 3
+    basestring = str
+
+# supported libraries, fastest first
+DECODERS = ('orjson', 'ujson', 'simplejson', 'json')
+
+
+class DecoderError(Exception):
+    """
+    Exception raised when an unknown or unavailable decoder is requested.
+    """
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+def _orjson():
+    import orjson
+    return orjson.loads
+
+
+def _ujson():
+    import ujson
+    return ujson.loads
+
+
+def _simplejson():
+    import simplejson
+    return simplejson.JSONDecoder().decode
+
+
+def _json():
+    import json
+    decode = json.JSONDecoder().decode
+    if str is bytes: # python 2 decodes bytes directly
+        return decode
+    def loads(data):
+        # the python 3 decoder only accepts text
+        if not isinstance(data, basestring):
+            data = data.decode('utf-8')
+        return decode(data)
+    return loads
+
+_loaders = {
+    'orjson': _orjson,
+    'ujson': _ujson,
+    'simplejson': _simplejson,
+    'json': _json,
+}
+_cache = {}
+
+
+def get_decoder(name=None):
+    """
+    Get the function decoding JSON documents with a library.
+
+    :param name: Name of the library (one of :data:`DECODERS`), defaults
+                 to the fastest one installed.
+    :type name: str or None.
+    :returns: callable -- Function taking a JSON document (bytes or text)
+              and returning the decoded object.
+    """
+    if name is None:
+        return get_decoder(available_decoders()[0])
+    if name not in _loaders:
+        raise DecoderError("unknown decoder: %s" % name)
+    decoder = _cache.get(name)
+    if decoder is None:
+        try:
+            decoder = _loaders[name]()
+        except ImportError:
+            raise DecoderError("decoder not installed: %s" % name)
+        _cache[name] = decoder
+    return decoder
+
+
+def available_decoders():
+    """
+    Names of the supported libraries which are installed, fastest first.
+
+    :returns: list.
+    """
+    available = []
+    for name in DECODERS:
+        try:
+            get_decoder(name)
+        except DecoderError:
+            continue
+        available.append(name)
+    return available
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.export
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Export of data types to newline-delimited JSON, CSV or a columnar binary
+format. Objects are flattened according to a schema derived from their
+``_fields``::
+
+    export(api.stream_compilation(since, 100000), 'posts.ndjson.gz')
+
+Rows are written in chunks as objects come in, so any number of objects
+can be exported with bounded memory.
+"""
+
+import bz2
+import csv
+import gzip
+import json
+import struct
+import zlib
+from itertools import chain
+
+from scoopy.datatypes import ScoopItObject, Timestamp
+
+__all__ = [
+    'ExportError',
+    'flat_schema',
+    'NDJSONWriter',
+    'CSVWriter',
+    'ColumnarWriter',
+    'read_columnar',
+    'open_output',
+    'export',
+]
+
+COLUMNAR_MAGIC = 'SCPC\x02'
+
+try:
+    _SCALARS = frozenset((str, unicode, int, long, float, bool, type(None)))
+except NameError: # python 3
+    _SCALARS = frozenset((str, bytes, int, float, bool, type(None)))
+# values the csv module writes as is
+_CSV_SCALARS = _SCALARS.difference([type(u'')])
+
+
+class ExportError(Exception):
+    """
+    Exception raised when an export can't be written or read.
+    """
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+def plain(value, references=False):
+    """
+    Convert a value to builtin types: timestamps become integers and
+    objects dicts of their fields.
+
+    :param value: The value to convert.
+    :param references: Convert the entities nested in an object (eg:
+                       ``post.topic``) to references holding only their
+                       ID, which also breaks reference cycles.
+    :type references: bool.
+    """
+    if isinstance(value, Timestamp):
+        return value.value
+    if isinstance(value, ScoopItObject):
+        return dict(
+            (field, _nested(getattr(value, field, None), references))
+            for field in value._fields
+        )
+    if isinstance(value, list):
+        return [plain(item, references) for item in value]
+    return value
+
+
+def _nested(value, references):
+    if references:
+        if isinstance(value, list):
+            return [_nested(item, references) for item in value]
+        if isinstance(value, ScoopItObject):
+            key = value._identity_key
+            if key is not None:
+                return {key: getattr(value, key, None)}
+    return plain(value, references)
+
+
+def flat_schema(cls, depth=1):
+    """
+    Derive the columns of a data type: its fields, with timestamps as
+    integers, and the fields of nested objects prefixed with their name
+    (eg: ``source.name``) up to ``depth`` levels. Deeper nested objects
+    and lists of nested objects are left out.
+
+    :param cls: The data type.
+    :type cls: :class:`scoopy.datatypes.ScoopItObject` subclass.
+    :param depth: Levels of nested objects to flatten.
+    :type depth: int.
+    :returns: list -- (column name, attributes path) tuples.
+    """
+    columns = []
+    for field in cls._fields:
+        nested = cls._convert_map.get(field)
+        if nested is None:
+            columns.append((field, (field,)))
+        elif nested.type is Timestamp:
+            columns.append((field, (field,)))
+        elif nested.many or (depth <= 0):
+            continue
+        else:
+            for name, path in flat_schema(nested.type, depth - 1):
+                columns.append(('%s.%s' % (field, name), (field,) + path))
+    return columns
+
+
+def _row(obj, paths):
+    row = []
+    append = row.append
+    for path in paths:
+        value = obj
+        for name in path:
+            value = getattr(value, name, None)
+            if value is None:
+                break
+        if value.__class__ not in _SCALARS:
+            value = plain(value)
+        append(value)
+    return row
+
+
+class _Writer(object):
+    """
+    Base class of the writers, rows are buffered and written by chunks.
+    """
+
+    def __init__(self, fileobj, schema, chunk_size=1000):
+        """
+        :param fileobj: The file to write to.
+        :type fileobj: file.
+        :param schema: Columns, as returned by :func:`flat_schema`.
+        :type schema: list.
+        :param chunk_size: Number of rows buffered before being written.
+        :type chunk_size: int.
+        """
+        self.fileobj = fileobj
+        self.columns = [name for name, path in schema]
+        self.paths = [path for name, path in schema]
+        self.chunk_size = chunk_size
+        self.rows = []
+        self.count = 0
+
+    def write(self, obj):
+        self.rows.append(_row(obj, self.paths))
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def write_many(self, objects):
+        for obj in objects:
+            self.write(obj)
+
+    def flush(self):
+        if self.rows:
+            self.write_rows(self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Write the buffered rows, the file is not closed.
+        """
+        self.flush()
+
+
+class NDJSONWriter(_Writer):
+    """
+    Writes one JSON object per line.
+    """
+
+    def __init__(self, fileobj, schema, chunk_size=1000):
+        _Writer.__init__(self, fileobj, schema, chunk_size)
+        self.encode = json.JSONEncoder(separators=(',', ':')).encode
+
+    def write_rows(self, rows):
+        columns, encode = self.columns, self.encode
+        self.fileobj.write(''.join(
+            [encode(dict(zip(columns, row))) + '\n' for row in rows]
+        ))
+
+
+class CSVWriter(_Writer):
+    """
+    Writes UTF-8 encoded CSV with a header line, lists and dicts are
+    written as JSON.
+    """
+
+    def __init__(self, fileobj, schema, chunk_size=1000):
+        _Writer.__init__(self, fileobj, schema, chunk_size)
+        self.writer = csv.writer(fileobj)
+        self.writer.writerow(self.columns)
+
+    def write_rows(self, rows):
+        cell = self.cell
+        for row in rows:
+            for index, value in enumerate(row):
+                if value.__class__ not in _CSV_SCALARS:
+                    row[index] = cell(value)
+        self.writer.writerows(rows)
+
+    def cell(self, value):
+        if isinstance(value, (list, dict)):
+            return json.dumps(value)
+        return value.encode('utf-8')
+
+
+class ColumnarWriter(_Writer):
+    """
+    Writes a compact binary format: a header holding the column names,
+    then one block per chunk in which the values of each column are
+    stored together and compressed. Integers are big-endian and
+    unsigned, 4 bytes long:
+
+    * the magic ``SCPC`` and the format version (``\x02``),
+    * the size of the header, then the header: a JSON array of the
+      column names,
+    * blocks: their number of rows and of columns, then for each column
+      the size of its data, then its data: a zlib-compressed JSON array
+      (UTF-8 encoded) of its values.
+
+    The file can be read back with :func:`read_columnar`.
+    """
+
+    def __init__(self, fileobj, schema, chunk_size=10000, level=1):
+        """
+        :param level: zlib compression level of the columns.
+        :type level: int.
+        """
+        _Writer.__init__(self, fileobj, schema, chunk_size)
+        self.level = level
+        self.encode = json.JSONEncoder(separators=(',', ':')).encode
+        header = self.encode(self.columns)
+        fileobj.write(COLUMNAR_MAGIC + struct.pack('!I', len(header)) + header)
+
+    def write_rows(self, rows):
+        blocks = []
+        for column in zip(*rows):
+            blocks.append(zlib.compress(self.encode(column), self.level))
+        self.fileobj.write(struct.pack('!II', len(rows), len(blocks)))
+        for block in blocks:
+            self.fileobj.write(struct.pack('!I', len(block)))
+            self.fileobj.write(block)
+
+
+def _read(fileobj, size):
+    data = fileobj.read(size)
+    if len(data) != size:
+        raise ExportError("truncated columnar file")
+    return data
+
+
+def read_columnar(fileobj):
+    """
+    Read a file written by :class:`ColumnarWriter`.
+
+    :returns: iterator -- dicts mapping columns to values.
+    """
+    if fileobj.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ExportError("not a columnar file")
+    size, = struct.unpack('!I', _read(fileobj, 4))
+    columns = json.loads(_read(fileobj, size))
+    while True:
+        head = fileobj.read(8)
+        if not head:
+            return
+        if len(head) != 8:
+            raise ExportError("truncated columnar file")
+        count, blocks = struct.unpack('!II', head)
+        values = []
+        for i in range(blocks):
+            size, = struct.unpack('!I', _read(fileobj, 4))
+            block = _read(fileobj, size)
+            try:
+                values.append(json.loads(zlib.decompress(block)))
+            except (ValueError, zlib.error):
+                raise ExportError("corrupted columnar file")
+        for row in zip(*values):
+            yield dict(zip(columns, row))
+
+
+def open_output(filepath, compression=None):
+    """
+    Open a file for writing, compressed according to ``compression``
+    ('gzip' or 'bz2') or to the file extension (.gz, .bz2).
+    """
+    if compression is None:
+        if filepath.endswith('.gz'):
+            compression = 'gzip'
+        elif filepath.endswith('.bz2'):
+            compression = 'bz2'
+    if compression == 'gzip':
+        return gzip.open(filepath, 'wb', 6)
+    if compression == 'bz2':
+        return bz2.BZ2File(filepath, 'wb')
+    if compression is not None:
+        raise ExportError("unknown compression: %s" % compression)
+    return open(filepath, 'wb')
+
+
+WRITERS = {
+    'ndjson': NDJSONWriter,
+    'csv': CSVWriter,
+    'columnar': ColumnarWriter,
+}
+
+
+def export(objects, filepath, format=None, cls=None, depth=1, compression=None):
+    """
+    Export objects of a data type to a file.
+
+    :param objects: The objects, can be a lazy iterable.
+    :type objects: iterable.
+    :param filepath: The output file.
+    :type filepath: str.
+    :param format: 'ndjson', 'csv' or 'columnar', defaults to the one
+                   named by the file extension.
+    :type format: str or None.
+    :param cls: Data type of the objects, defaults to the type of the
+                first one.
+    :type cls: :class:`scoopy.datatypes.ScoopItObject` subclass or None.
+    :param depth: Levels of nested objects to flatten.
+    :type depth: int.
+    :param compression: 'gzip' or 'bz2', defaults to the one named by
+                        the file extension.
+    :type compression: str or None.
+    :returns: int -- Number of exported objects.
+    """
+    if format is None:
+        name = filepath
+        for suffix in ('.gz', '.bz2'):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        format = name.rsplit('.', 1)[-1]
+    if format not in WRITERS:
+        raise ExportError("unknown format: %s" % format)
+    objects = iter(objects)
+    if cls is None:
+        first = next(objects, None)
+        if first is None:
+            return 0
+        cls = first.__class__
+        objects = chain([first], objects)
+    outfile = open_output(filepath, compression)
+    try:
+        writer = WRITERS[format](outfile, flat_schema(cls, depth))
+        writer.write_many(objects)
+        writer.close()
+    finally:
+        outfile.close()
+    return writer.count
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.futures
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+"""
+
+import Queue
+import threading
+import types
+
+__all__ = [
+    'TimeoutError',
+    'Future',
+    'gather',
+    'Return',
+    'coroutine',
+    'ThreadPool',
+    'SingleFlight',
+]
+
+
+class TimeoutError(Exception):
+    """
+    Exception raised when waiting for a future times out.
+    """
+    pass
+
+
+class Future(object):
+    """
+    Holds the result of an operation which may not have completed yet.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._done = False
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def done(self):
+        """
+        Whether the operation has completed (successfully or not).
+        """
+        return self._done
+
+    def result(self, timeout=None):
+        """
+        Wait for the operation to complete and return its result,
+        re-raises the exception if the operation failed.
+
+        :param timeout: Seconds to wait for (defaults to forever).
+        :type timeout: float or None.
+        """
+        self.wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        """
+        Wait for the operation to complete and return the exception
+        it raised, or None if it succeeded.
+        """
+        self.wait(timeout)
+        return self._exception
+
+    def wait(self, timeout=None):
+        self._condition.acquire()
+        try:
+            if timeout is None:
+                while not self._done:
+                    self._condition.wait()
+            elif not self._done:
+                self._condition.wait(timeout)
+            if not self._done:
+                raise TimeoutError("operation did not complete in time")
+        finally:
+            self._condition.release()
+
+    def set_result(self, result):
+        self._complete(result, None)
+
+    def set_exception(self, exception):
+        self._complete(None, exception)
+
+    def _complete(self, result, exception):
+        self._condition.acquire()
+        try:
+            if self._done:
+                return
+            self._result = result
+            self._exception = exception
+            self._done = True
+            callbacks, self._callbacks = self._callbacks, []
+            self._condition.notify_all()
+        finally:
+            self._condition.release()
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """
+        Call ``callback(future)`` once the operation completed, right away
+        if it already did.
+        """
+        self._condition.acquire()
+        try:
+            if not self._done:
+                self._callbacks.append(callback)
+                return
+        finally:
+            self._condition.release()
+        callback(self)
+
+    def then(self, function):
+        """
+        Return a new future holding ``function(result)`` once this one
+        succeeds, exceptions are propagated without calling ``function``.
+        """
+        chained = Future()
+        def callback(future):
+            if future._exception is not None:
+                chained.set_exception(future._exception)
+                return
+            try:
+                chained.set_result(function(future._result))
+            except Exception as e:
+                chained.set_exception(e)
+        self.add_done_callback(callback)
+        return chained
+
+
+def gather(futures):
+    """
+    Return a future holding the list of results of the given futures,
+    failing with the first exception raised by any of them.
+    """
+    futures = list(futures)
+    gathered = Future()
+    if not futures:
+        gathered.set_result([])
+        return gathered
+    results = [None] * len(futures)
+    pending = [len(futures)]
+    lock = threading.Lock()
+    def make_callback(index):
+        def callback(future):
+            if future._exception is not None:
+                gathered.set_exception(future._exception)
+                return
+            results[index] = future._result
+            lock.acquire()
+            try:
+                pending[0] -= 1
+                finished = not pending[0]
+            finally:
+                lock.release()
+            if finished:
+                gathered.set_result(results)
+        return callback
+    for index, future in enumerate(futures):
+        future.add_done_callback(make_callback(index))
+    return gathered
+
+
+class Return(Exception):
+    """
+    Raised by a :func:`coroutine` to return a value.
+    """
+    def __init__(self, value=None):
+        self.value = value
+
+
+def coroutine(function):
+    """
+    Decorator turning a generator function into a function returning
+    a :class:`Future`. The generator yields futures (or lists of futures)
+    and gets their results sent back once they are available, its own
+    result is given by raising :class:`Return`::
+
+        @coroutine
+        def topic_names(api, topic_ids):
+            topics = yield [api.topic(i, order='user') for i in topic_ids]
+            raise Return([t.name for t in topics])
+    """
+    def wrapper(*args, **kwargs):
+        future = Future()
+        try:
+            generator = function(*args, **kwargs)
+        except Return as r:
+            future.set_result(r.value)
+            return future
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        if not isinstance(generator, types.GeneratorType):
+            future.set_result(generator)
+            return future
+        def step(value, exception):
+            # loop instead of recursing while the yielded futures are
+            # already done, long coroutines would exhaust the stack
+            while True:
+                try:
+                    if exception is not None:
+                        yielded = generator.throw(exception)
+                    else:
+                        yielded = generator.send(value)
+                except StopIteration:
+                    future.set_result(None)
+                    return
+                except Return as r:
+                    future.set_result(r.value)
+                    return
+                except Exception as e:
+                    future.set_exception(e)
+                    return
+                if isinstance(yielded, (list, tuple)):
+                    yielded = gather(yielded)
+                if not yielded.done():
+                    yielded.add_done_callback(
+                        lambda f: step(f._result, f._exception)
+                    )
+                    return
+                value, exception = yielded._result, yielded._exception
+        step(None, None)
+        return future
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+
+class ThreadPool(object):
+    """
+    A fixed-size pool of worker threads running submitted functions.
+    """
+
+    def __init__(self, workers=4):
+        """
+        :param workers: Number of worker threads.
+        :type workers: int.
+        """
+        self.workers = workers
+        self.tasks = Queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Run ``function(*args, **kwargs)`` in a worker thread.
+
+        :returns: :class:`Future` -- The function's result.
+        """
+        future = Future()
+        self.lock.acquire()
+        try:
+            if self.closed:
+                raise RuntimeError("can't submit to a pool that was shut down")
+            self.tasks.put((future, function, args, kwargs))
+            if len(self.threads) < self.workers:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self.threads.append(thread)
+        finally:
+            self.lock.release()
+        return future
+
+    def _work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, function, args, kwargs = task
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers once the already submitted tasks are done.
+        """
+        self.lock.acquire()
+        try:
+            self.closed = True
+            threads = list(self.threads)
+        finally:
+            self.lock.release()
+        for thread in threads:
+            self.tasks.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+class SingleFlight(object):
+    """
+    Deduplicates concurrent calls: while a call for a key is running,
+    other calls for the same key wait for it and share its result
+    instead of running again.
+    """
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.shared = 0
+
+    def call(self, key, function):
+        """
+        Return ``function()``, or the result of the call already running
+        for ``key`` (exceptions are shared too).
+        """
+        self.lock.acquire()
+        try:
+            future = self.flights.get(key)
+            leader = future is None
+            if leader:
+                future = self.flights[key] = Future()
+            else:
+                self.shared += 1
+        finally:
+            self.lock.release()
+        if not leader:
+            return future.result()
+        try:
+            result = function()
+        except Exception as e:
+            self.forget(key, future)
+            future.set_exception(e)
+            raise
+        self.forget(key, future)
+        future.set_result(result)
+        return result
+
+    def call_async(self, key, function):
+        """
+        Same as :meth:`call` for a ``function`` returning a
+        :class:`Future`, the future is shared until it is done.
+        """
+        self.lock.acquire()
+        try:
+            future = self.flights.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+        finally:
+            self.lock.release()
+        future = function()
+        self.lock.acquire()
+        try:
+            self.flights.setdefault(key, future)
+        finally:
+            self.lock.release()
+        future.add_done_callback(lambda f: self.forget(key, f))
+        return future
+
+    def forget(self, key, future):
+        self.lock.acquire()
+        try:
+            if self.flights.get(key) is future:
+                del self.flights[key]
+        finally:
+            self.lock.release()
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.instrumentation
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Hooks called after every API call with a :class:`CallEvent` telling
+where its time went::
+
+    registry = MetricsRegistry()
+    api.hooks.add(MetricsHook(registry))
+    api.hooks.add(LoggingHook())
+    ...
+    print(registry.render())
+
+Events are only built when at least one hook is registered.
+
+Phases of a call are:
+
+* ``throttle``: waiting for the rate limiter.
+* ``sign``: building and signing the request.
+* ``network``: sending the request and reading the response.
+* ``decompress``: decoding a gzip/deflate body (only measured apart
+  from ``network`` by :class:`scoopy.transport.PooledTransport`).
+* ``decode``: decoding the JSON document.
+* ``build``: converting the document to data types.
+
+Phases of a retried request add up over its attempts. Streamed calls
+(see :meth:`scoopy.client.ScoopItAPI.stream`) are reported once the
+response is consumed, their ``network`` phase only lasts until the
+response headers are received and their ``build`` phase covers the
+objects built while the body is read.
+"""
+
+import logging
+import threading
+from time import time
+from urlparse import urlsplit
+
+__all__ = [
+    'CallEvent',
+    'Hooks',
+    'Counter',
+    'Histogram',
+    'MetricsRegistry',
+    'MetricsHook',
+    'LoggingHook',
+]
+
+PHASES = ('throttle', 'sign', 'network', 'decompress', 'decode', 'build')
+# default histogram buckets, in seconds and bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class CallEvent(object):
+    """
+    Timings and outcome of one API call.
+
+    :attr:`status` is the status of the last response received (None if
+    there was none), :attr:`size` the size of its decoded body, and
+    :attr:`error` the exception the call raised, if any.
+    """
+    __slots__ = ('url', 'method', 'start', 'duration', 'phases', 'status',
+                 'size', 'attempts', 'cached', 'error')
+
+    def __init__(self, url, method='GET'):
+        self.url = url
+        self.method = method
+        self.start = time()
+        self.duration = None
+        self.phases = {}
+        self.status = None
+        self.size = None
+        self.attempts = 0
+        self.cached = False
+        self.error = None
+
+    @property
+    def endpoint(self):
+        """
+        Path of the called URL, eg: '/api/1/topic'.
+        """
+        return urlsplit(self.url).path
+
+    def timed(self, phase, start):
+        """
+        Add the time elapsed since ``start`` to a phase.
+        """
+        self.phases[phase] = self.phases.get(phase, 0) + time() - start
+
+    def finish(self, error=None):
+        self.duration = time() - self.start
+        if error is not None:
+            self.error = error
+        return self
+
+    def as_dict(self):
+        return {
+            'url': self.url,
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'status': self.status,
+            'size': self.size,
+            'attempts': self.attempts,
+            'cached': self.cached,
+            'duration': self.duration,
+            'phases': dict(self.phases),
+            'error': self.error is not None and repr(self.error) or None,
+        }
+
+
+class Hooks(object):
+    """
+    The hooks of an API instance, functions called with the
+    :class:`CallEvent` of every call once it's finished. Exceptions
+    raised by hooks are not caught.
+    """
+
+    def __init__(self, hooks=()):
+        self.hooks = tuple(hooks)
+        self.lock = threading.Lock()
+
+    def add(self, hook):
+        self.lock.acquire()
+        try:
+            self.hooks = self.hooks + (hook,)
+        finally:
+            self.lock.release()
+
+    def remove(self, hook):
+        self.lock.acquire()
+        try:
+            self.hooks = tuple(h for h in self.hooks if h != hook)
+        finally:
+            self.lock.release()
+
+    def __nonzero__(self):
+        return bool(self.hooks)
+    __bool__ = __nonzero__
+
+    def __len__(self):
+        return len(self.hooks)
+
+    def emit(self, event):
+        for hook in self.hooks:
+            hook(event)
+
+    def track(self, event, function):
+        """
+        Return ``function()``, emitting ``event`` once it returned or
+        raised.
+        """
+        try:
+            return function()
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            self.emit(event.finish())
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in pairs
+    )
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Counter(object):
+    """
+    A value which only goes up, one per set of label values.
+    """
+    type = 'counter'
+
+    def __init__(self, name, help='', labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        """
+        :param labels: Values of the labels, in the order of their names.
+        :type labels: tuple.
+        """
+        labels = tuple(labels)
+        self.lock.acquire()
+        try:
+            self.values[labels] = self.values.get(labels, 0) + amount
+        finally:
+            self.lock.release()
+
+    def get(self, labels=()):
+        return self.values.get(tuple(labels), 0)
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield self.name, _format_labels(self.labels, labels), value
+
+
+class Histogram(object):
+    """
+    Counts of observed values by bucket, along with their sum and count,
+    one set per set of label values.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, help='', labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # label values -> [bucket counts, sum, count]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        labels = tuple(labels)
+        self.lock.acquire()
+        try:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * len(self.buckets), 0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+        finally:
+            self.lock.release()
+
+    def count(self, labels=()):
+        entry = self.values.get(tuple(labels))
+        return entry is not None and entry[2] or 0
+
+    def samples(self):
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            cumulated = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulated += bucket
+                yield (self.name + '_bucket',
+                       _format_labels(self.labels, labels, [('le', _format_value(bound))]),
+                       cumulated)
+            yield self.name + '_sum', _format_labels(self.labels, labels), total
+            yield self.name + '_count', _format_labels(self.labels, labels), count
+
+
+class MetricsRegistry(object):
+    """
+    Holds counters and histograms and renders them in the Prometheus
+    text exposition format, to be served on a /metrics end-point.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        self.lock.acquire()
+        try:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labels, **kwargs)
+            return metric
+        finally:
+            self.lock.release()
+
+    def counter(self, name, help='', labels=()):
+        """
+        Get a counter, created on first use.
+        """
+        return self._get(Counter, name, help, labels)
+
+    def histogram(self, name, help='', labels=(), buckets=LATENCY_BUCKETS):
+        """
+        Get a histogram, created on first use.
+        """
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for name in sorted(self.metrics):
+            metric = self.metrics[name]
+            lines.append('# HELP %s %s' % (name, metric.help))
+            lines.append('# TYPE %s %s' % (name, metric.type))
+            for sample, labels, value in metric.samples():
+                lines.append('%s%s %s' % (sample, labels, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHook(object):
+    """
+    Hook recording calls in a :class:`MetricsRegistry`:
+
+    * ``<prefix>_requests_total``: calls by end-point, method and status
+      (the exception class name for calls which failed without response).
+    * ``<prefix>_request_seconds``: duration of calls by end-point.
+    * ``<prefix>_phase_seconds``: duration of phases by end-point.
+    * ``<prefix>_response_bytes``: size of response bodies by end-point.
+    * ``<prefix>_attempts_total``: requests sent, retries included.
+    """
+
+    def __init__(self, registry=None, prefix='scoopy'):
+        """
+        :param registry: The registry (a new one by default).
+        :type registry: :class:`MetricsRegistry` or None.
+        :param prefix: Prefix of the metric names.
+        :type prefix: str.
+        """
+        if registry is None:
+            registry = MetricsRegistry()
+        self.registry = registry
+        self.requests = registry.counter(
+            prefix + '_requests_total', 'API calls.', ('endpoint', 'method', 'status')
+        )
+        self.attempts = registry.counter(
+            prefix + '_attempts_total', 'Requests sent.', ('endpoint',)
+        )
+        self.latency = registry.histogram(
+            prefix + '_request_seconds', 'Duration of API calls.', ('endpoint',)
+        )
+        self.phases = registry.histogram(
+            prefix + '_phase_seconds', 'Duration of API call phases.',
+            ('endpoint', 'phase')
+        )
+        self.sizes = registry.histogram(
+            prefix + '_response_bytes', 'Size of response bodies.', ('endpoint',),
+            SIZE_BUCKETS
+        )
+
+    def __call__(self, event):
+        endpoint = event.endpoint
+        status = event.status
+        if event.cached:
+            # fresh cache hits have no status
+            status = 'cached'
+        elif status is None:
+            status = event.error.__class__.__name__
+        self.requests.inc((endpoint, event.method, status))
+        if event.attempts:
+            self.attempts.inc((endpoint,), event.attempts)
+        self.latency.observe(event.duration, (endpoint,))
+        for phase, duration in event.phases.items():
+            self.phases.observe(duration, (endpoint, phase))
+        if event.size is not None:
+            self.sizes.observe(event.size, (endpoint,))
+
+
+class LoggingHook(object):
+    """
+    Hook logging one record per call. The event is attached to records
+    as their ``scoopy`` attribute (see :meth:`CallEvent.as_dict`), for
+    structured logging handlers to use.
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG, error_level=logging.WARNING):
+        """
+        :param logger: The logger (defaults to the 'scoopy' one).
+        :type logger: :class:`logging.Logger` or None.
+        :param level: Level of the records of successful calls.
+        :type level: int.
+        :param error_level: Level of the records of failed calls.
+        :type error_level: int.
+        """
+        if logger is None:
+            logger = logging.getLogger('scoopy')
+        self.logger = logger
+        self.level = level
+        self.error_level = error_level
+
+    def __call__(self, event):
+        level = self.level
+        if event.error is not None:
+            level = self.error_level
+        if not self.logger.isEnabledFor(level):
+            return
+        phases = ' '.join(
+            '%s=%.1fms' % (phase, event.phases[phase] * 1000)
+            for phase in PHASES if phase in event.phases
+        )
+        self.logger.log(
+            level, '%s %s %s %s bytes %.1fms %s', event.method, event.endpoint,
+            event.status, event.size, event.duration * 1000, phases,
+            extra={'scoopy': event.as_dict()}
+        )
@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.mirror
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Local SQLite copy of topics, posts, users and comments, kept up to date
+with incremental syncs and queried without contacting the API::
+
+    mirror = Mirror(api, 'scoopit.db')
+    mirror.sync_topic(1234)
+    posts = mirror.posts(topic_id=1234, tag='python', since=Timestamp.last_month())
+"""
+
+import json
+import sqlite3
+import threading
+
+from scoopy.datatypes import Post, PostComment, Timestamp, Topic, User
+from scoopy.export import plain
+
+__all__ = [
+    'Mirror',
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    short_name TEXT,
+    creator_id INTEGER,
+    watermark INTEGER,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    short_name TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER,
+    title TEXT,
+    url TEXT,
+    curation_date INTEGER,
+    publication_date INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS posts_topic_date ON posts (topic_id, curation_date);
+CREATE INDEX IF NOT EXISTS posts_date ON posts (curation_date);
+CREATE TABLE IF NOT EXISTS post_tags (
+    post_id INTEGER,
+    tag TEXT,
+    PRIMARY KEY (tag, post_id)
+);
+CREATE INDEX IF NOT EXISTS post_tags_post ON post_tags (post_id);
+CREATE TABLE IF NOT EXISTS comments (
+    post_id INTEGER,
+    position INTEGER,
+    author_id INTEGER,
+    date INTEGER,
+    text TEXT,
+    PRIMARY KEY (post_id, position)
+);
+"""
+
+
+def _data(obj):
+    """
+    The data an object was built from, rebuilt from its fields if it
+    wasn't kept (nested entities are then only referenced by ID).
+    """
+    if getattr(obj, 'raw', None) is not None:
+        return obj.raw
+    return plain(obj, references=True)
+
+
+def _date(value):
+    if isinstance(value, Timestamp):
+        return value.value
+    return value
+
+
+class Mirror(object):
+    """
+    SQLite mirror of API data. Objects are stored with the data they
+    were built from, and rebuilt from it when queried.
+
+    Every topic has a watermark, the newest curation date of its stored
+    posts, from which the next :meth:`sync_topic` starts.
+    """
+
+    def __init__(self, api, path=':memory:'):
+        """
+        :param api: The API instance used to sync and to build objects.
+        :type api: :class:`scoopy.client.ScoopItAPI`.
+        :param path: The database file.
+        :type path: str.
+        """
+        self.api = api
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # storage
+
+    def store_user(self, user):
+        self.lock.acquire()
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+                (user.id, getattr(user, 'name', None),
+                 getattr(user, 'shortName', None), json.dumps(_data(user)))
+            )
+        finally:
+            self.lock.release()
+
+    def store_topic(self, topic):
+        """
+        Store a topic (its posts are not stored), its watermark is kept.
+        """
+        creator = getattr(topic, 'creator', None)
+        data = dict(_data(topic))
+        for key in ('curatedPosts', 'curablePosts'):
+            data.pop(key, None)
+        self.lock.acquire()
+        try:
+            if creator is not None:
+                self.store_user(creator)
+            self.db.execute(
+                "INSERT OR REPLACE INTO topics VALUES (?, ?, ?, ?, "
+                "(SELECT watermark FROM topics WHERE id = ?), ?)",
+                (topic.id, getattr(topic, 'name', None),
+                 getattr(topic, 'shortName', None),
+                 creator is not None and creator.id or None,
+                 topic.id, json.dumps(data))
+            )
+        finally:
+            self.lock.release()
+
+    def store_posts(self, posts, topic_id=None):
+        """
+        Store posts along with their tags, comments and comments authors.
+
+        :param topic_id: Topic of the posts, if they don't tell.
+        :type topic_id: int or None.
+        :returns: int -- Newest curation date of the posts (None if
+                  there were none).
+        """
+        newest = None
+        post_rows, tag_rows, comment_rows, post_ids = [], [], [], []
+        authors = {}
+        for post in posts:
+            date = _date(getattr(post, 'curationDate', None))
+            if (date is not None) and ((newest is None) or (date > newest)):
+                newest = date
+            post_ids.append((post.id,))
+            post_rows.append((
+                post.id, getattr(post, 'topicId', None) or topic_id,
+                getattr(post, 'title', None), getattr(post, 'url', None),
+                date, _date(getattr(post, 'publicationDate', None)),
+                json.dumps(_data(post)),
+            ))
+            for tag in getattr(post, 'tags', None) or ():
+                tag_rows.append((post.id, tag))
+            for position, comment in enumerate(getattr(post, 'comments', None) or ()):
+                author = getattr(comment, 'author', None)
+                if author is not None:
+                    authors[author.id] = author
+                comment_rows.append((
+                    post.id, position, author is not None and author.id or None,
+                    _date(getattr(comment, 'date', None)), getattr(comment, 'text', None),
+                ))
+        self.lock.acquire()
+        try:
+            self.db.executemany("DELETE FROM post_tags WHERE post_id = ?", post_ids)
+            self.db.executemany("DELETE FROM comments WHERE post_id = ?", post_ids)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?)", post_rows
+            )
+            self.db.executemany("INSERT OR REPLACE INTO post_tags VALUES (?, ?)", tag_rows)
+            self.db.executemany("INSERT INTO comments VALUES (?, ?, ?, ?, ?)", comment_rows)
+            for author in authors.values():
+                self.store_user(author)
+        finally:
+            self.lock.release()
+        return newest
+
+    def commit(self):
+        self.lock.acquire()
+        try:
+            self.db.commit()
+        finally:
+            self.lock.release()
+
+    # sync
+
+    def watermark(self, topic_id):
+        """
+        Newest curation date of the stored posts of a topic.
+
+        :returns: :class:`scoopy.datatypes.Timestamp` or None.
+        """
+        rows = self.query("SELECT watermark FROM topics WHERE id = ?", (topic_id,))
+        if (not rows) or (rows[0][0] is None):
+            return None
+        return Timestamp(rows[0][0])
+
+    def sync_topic(self, topic_id, page_size=100, since=None):
+        """
+        Fetch the posts curated in a topic since its watermark (or since
+        ``since`` for a topic never synced) and store them.
+
+        :param topic_id: The topic's ID.
+        :type topic_id: int.
+        :param page_size: Number of posts requested per page.
+        :type page_size: int.
+        :param since: Where to start when the topic has no watermark
+                      (defaults to the beginning).
+        :type since: :class:`scoopy.datatypes.Timestamp` or None.
+        :returns: int -- Number of stored posts.
+        """
+        watermark = self.watermark(topic_id)
+        if watermark is None:
+            watermark = since or Timestamp(0)
+        topics = []
+        def fetch(cursor, count):
+            topic = self.api.topic(topic_id, curated=count, since=cursor)
+            topics.append(topic)
+            return getattr(topic, 'curatedPosts', None) or []
+        count = 0
+        page = []
+        try:
+            for post in self.api.iter_pages(fetch, watermark, page_size):
+                page.append(post)
+                if len(page) >= page_size:
+                    count += self.sync_page(page, topic_id)
+            count += self.sync_page(page, topic_id)
+            if topics:
+                self.store_topic(topics[-1])
+        finally:
+            self.commit()
+        return count
+
+    def sync_page(self, posts, topic_id):
+        """
+        Store a page of synced posts and move the topic watermark to the
+        newest of them.
+        """
+        if not posts:
+            return 0
+        newest = self.store_posts(posts, topic_id)
+        count = len(posts)
+        del posts[:]
+        if newest is None:
+            return count
+        self.lock.acquire()
+        try:
+            self.db.execute(
+                "INSERT OR IGNORE INTO topics (id) VALUES (?)", (topic_id,)
+            )
+            self.db.execute(
+                "UPDATE topics SET watermark = ? WHERE id = ? AND "
+                "(watermark IS NULL OR watermark < ?)",
+                (newest, topic_id, newest)
+            )
+        finally:
+            self.lock.release()
+        return count
+
+    # queries
+
+    def posts(self, topic_id=None, tag=None, since=None, until=None, limit=None):
+        """
+        Stored posts, newest first.
+
+        :param topic_id: Only get posts of this topic.
+        :type topic_id: int or None.
+        :param tag: Only get posts with this tag.
+        :type tag: str or None.
+        :param since: Only get posts curated after this.
+        :type since: :class:`scoopy.datatypes.Timestamp` or None.
+        :param until: Only get posts curated before this.
+        :type until: :class:`scoopy.datatypes.Timestamp` or None.
+        :param limit: Maximum number of posts.
+        :type limit: int or None.
+        :returns: list -- :class:`scoopy.datatypes.Post` objects.
+        """
+        query = ["SELECT posts.data FROM posts"]
+        conditions, params = [], []
+        if tag is not None:
+            query.append("JOIN post_tags ON post_tags.post_id = posts.id")
+            conditions.append("post_tags.tag = ?")
+            params.append(tag)
+        if topic_id is not None:
+            conditions.append("posts.topic_id = ?")
+            params.append(topic_id)
+        if since is not None:
+            conditions.append("posts.curation_date > ?")
+            params.append(since.value)
+        if until is not None:
+            conditions.append("posts.curation_date < ?")
+            params.append(until.value)
+        if conditions:
+            query.append("WHERE " + " AND ".join(conditions))
+        query.append("ORDER BY posts.curation_date DESC")
+        if limit is not None:
+            query.append("LIMIT ?")
+            params.append(limit)
+        rows = self.query(" ".join(query), params)
+        identity = self.api.new_identity_map()
+        return [Post.build(self.api, json.loads(row[0]), identity) for row in rows]
+
+    def post(self, post_id):
+        return self._get(Post, "SELECT data FROM posts WHERE id = ?", post_id)
+
+    def topic(self, topic_id):
+        return self._get(Topic, "SELECT data FROM topics WHERE id = ?", topic_id)
+
+    def user(self, user_id):
+        return self._get(User, "SELECT data FROM users WHERE id = ?", user_id)
+
+    def comments(self, post_id):
+        """
+        Stored comments of a post, in their original order.
+
+        :returns: list -- :class:`scoopy.datatypes.PostComment` objects.
+        """
+        rows = self.query(
+            "SELECT comments.date, comments.text, users.data FROM comments "
+            "LEFT JOIN users ON users.id = comments.author_id "
+            "WHERE comments.post_id = ? ORDER BY comments.position", (post_id,)
+        )
+        comments = []
+        identity = self.api.new_identity_map()
+        for date, text, author in rows:
+            data = {'date': date, 'text': text}
+            if author is not None:
+                data['author'] = json.loads(author)
+            comments.append(PostComment(self.api, data, identity))
+        return comments
+
+    def tags(self, topic_id=None):
+        """
+        Count of stored posts by tag.
+
+        :returns: dict.
+        """
+        query = "SELECT tag, COUNT(*) FROM post_tags"
+        params = ()
+        if topic_id is not None:
+            query += " JOIN posts ON posts.id = post_tags.post_id WHERE posts.topic_id = ?"
+            params = (topic_id,)
+        return dict(self.query(query + " GROUP BY tag", params))
+
+    def query(self, query, params=()):
+        """
+        Run a query on the database.
+
+        :returns: list -- Result rows.
+        """
+        self.lock.acquire()
+        try:
+            return self.db.execute(query, params).fetchall()
+        finally:
+            self.lock.release()
+
+    def _get(self, cls, query, key):
+        rows = self.query(query, (key,))
+        if (not rows) or (rows[0][0] is None):
+            return None
+        return cls.build(self.api, json.loads(rows[0][0]), self.api.new_identity_map())
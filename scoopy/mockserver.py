@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.mockserver
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+A local stand-in for the Scoop.it API, used by tests and benchmarks.
+"""
+
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from urlparse import urlsplit, parse_qsl
+
+__all__ = [
+    'make_user',
+    'make_source',
+    'make_post',
+    'make_topic',
+    'MockServer',
+]
+
+BASE_DATE = 1320000000000
+
+
+def make_user(user_id):
+    return {
+        'id': user_id,
+        'name': 'User %d' % user_id,
+        'shortName': 'user-%d' % user_id,
+        'bio': 'Bio of user %d' % user_id,
+        'avatarUrl': 'http://img.scoop.it/avatar/%d.jpg' % user_id,
+        'url': 'http://www.scoop.it/u/user-%d' % user_id,
+    }
+
+
+def make_source(source_id):
+    return {
+        'id': source_id,
+        'name': 'Source %d' % source_id,
+        'description': 'Description of source %d' % source_id,
+        'iconUrl': 'http://img.scoop.it/source/%d.png' % source_id,
+        'type': 'rss',
+        'url': 'http://example.com/feed/%d' % source_id,
+    }
+
+
+def make_post(post_id, topic_id=1, comments=2):
+    return {
+        'id': post_id,
+        'title': 'Post %d' % post_id,
+        'content': 'Content of post %d. ' % post_id * 8,
+        'htmlContent': '<p>Content of post %d.</p>' % post_id,
+        'url': 'http://example.com/article/%d' % post_id,
+        'scoopUrl': 'http://www.scoop.it/t/topic-%d/p/%d' % (topic_id, post_id),
+        'imageUrl': 'http://img.scoop.it/post/%d.jpg' % post_id,
+        'thanksCount': post_id % 7,
+        'commentsCount': comments,
+        'tags': ['tag%d' % (post_id % 5), 'tag%d' % (post_id % 3)],
+        'topicId': topic_id,
+        'pinned': False,
+        'thanked': False,
+        'publicationDate': BASE_DATE + post_id * 1000,
+        'curationDate': BASE_DATE + post_id * 1000 + 500,
+        'source': make_source(post_id % 10),
+        'comments': [
+            {
+                'author': make_user(1000 + (post_id + i) % 20),
+                'date': BASE_DATE + post_id * 1000 + 600 + i,
+                'text': 'Comment %d on post %d' % (i, post_id),
+            }
+            for i in range(comments)
+        ],
+    }
+
+
+def make_topic(topic_id, curated=30, curable=0):
+    return {
+        'id': topic_id,
+        'name': 'Topic %d' % topic_id,
+        'shortName': 'topic-%d' % topic_id,
+        'description': 'Description of topic %d' % topic_id,
+        'url': 'http://www.scoop.it/t/topic-%d' % topic_id,
+        'lang': 'en',
+        'curablePostCount': curable,
+        'unreadPostCount': 0,
+        'creator': make_user(topic_id),
+        'curatedPosts': [make_post(topic_id * 100000 + i, topic_id)
+                         for i in range(curated)],
+        'curablePosts': [make_post(topic_id * 100000 + curated + i, topic_id)
+                         for i in range(curable)],
+        'tags': [{'tag': 'tag%d' % i, 'postCount': i} for i in range(5)],
+    }
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles requests made to a :class:`MockServer`, connections are kept
+    alive as long as the client wants to.
+    """
+    protocol_version = 'HTTP/1.1'
+    # buffer the responses, writing headers one by one to the socket
+    # triggers delayed ACKs on kept-alive connections
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path, query = urlsplit(self.path)[2:4]
+        self.handle_api(path, dict(parse_qsl(query)))
+
+    def do_POST(self):
+        path, query = urlsplit(self.path)[2:4]
+        length = int(self.headers.get('Content-Length', 0))
+        params = dict(parse_qsl(query))
+        for key, value in parse_qsl(self.rfile.read(length)):
+            # repeated parameters are gathered in lists
+            if key in params:
+                if not isinstance(params[key], list):
+                    params[key] = [params[key]]
+                params[key].append(value)
+            else:
+                params[key] = value
+        self.handle_api(path, params)
+
+    def handle_api(self, path, params):
+        server = self.server
+        server.count(path)
+        delay = server.delay()
+        if delay:
+            time.sleep(delay)
+        if server.fail():
+            headers = {}
+            if server.retry_after is not None:
+                headers['Retry-After'] = str(server.retry_after)
+            self.send_json(server.error_status,
+                           {'success': False, 'error': 'Injected error'}, headers)
+            return
+        handler = server.endpoints.get(path)
+        if handler is None:
+            self.send_json(404, {'success': False, 'error': 'Not Found'})
+            return
+        try:
+            response = handler(server, params)
+        except (KeyError, ValueError):
+            self.send_json(400, {'success': False, 'error': 'Invalid parameters'})
+            return
+        if isinstance(response, str):
+            self.send_body(200, 'application/x-www-form-urlencoded', response)
+        else:
+            self.send_json(200, response)
+
+    def send_json(self, status, data, headers=None):
+        self.send_body(status, 'application/json', json.dumps(data), headers)
+
+    def send_body(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+
+
+def _count(params, name, default):
+    return int(params.get(name, default))
+
+
+def _action(server, path, params):
+    server.lock.acquire()
+    try:
+        server.actions.append((path, params))
+        if params['action'] in ('accept', 'refuse', 'delete'):
+            server.decided.add(int(params['id']))
+    finally:
+        server.lock.release()
+    return {'success': True, 'action': params['action'], 'id': int(params['id'])}
+
+
+def _topic(server, params):
+    if 'action' in params:
+        return _action(server, '/api/1/topic', params)
+    topic_id = _count(params, 'id', 1)
+    curated = _count(params, 'curated', server.posts)
+    topic = make_topic(topic_id, curated)
+    # curable posts on which no action was taken yet
+    first = topic_id * 100000 + curated
+    server.lock.acquire()
+    try:
+        available = [i for i in range(first, first + server.curable)
+                     if i not in server.decided]
+    finally:
+        server.lock.release()
+    topic['curablePostCount'] = len(available)
+    topic['curablePosts'] = [make_post(i, topic_id)
+                             for i in available[:_count(params, 'curable', 0)]]
+    since = params.get('since')
+    if since is not None:
+        topic['curatedPosts'] = [p for p in topic['curatedPosts']
+                                 if p['curationDate'] > int(since)]
+    return {
+        'success': True,
+        'topic': topic,
+        'stats': {'creatorName': 'User %d' % topic_id, 'curated': 30, 'curable': 0},
+    }
+
+
+def _post(server, params):
+    if 'action' in params:
+        return _action(server, '/api/1/post', params)
+    response = make_post(_count(params, 'id', 1), comments=server.comments)
+    response['success'] = True
+    return response
+
+
+def _profile(server, params):
+    user_id = _count(params, 'id', 1)
+    user = make_user(user_id)
+    curated = _count(params, 'curated', 0)
+    user['curatedTopics'] = [make_topic(user_id * 10 + i, curated)
+                             for i in range(server.topics)]
+    return {'success': True, 'user': user}
+
+
+def _compilation(server, params):
+    since = _count(params, 'since', 0)
+    count = _count(params, 'count', server.posts)
+    return {
+        'success': True,
+        'posts': [make_post(i, comments=server.comments) for i in range(count)
+                  if BASE_DATE + i * 1000 + 500 > since],
+    }
+
+
+def _notifications(server, params):
+    since = _count(params, 'since', 0)
+    return {
+        'success': True,
+        'notifications': [
+            {'id': i, 'type': 'thanks', 'date': BASE_DATE + i * 1000,
+             'user': make_user(i % 20), 'post': {'id': i}}
+            for i in range(server.posts) if BASE_DATE + i * 1000 > since
+        ],
+    }
+
+
+def _resolver(server, params):
+    return {'success': True, 'id': len(params.get('shortName', ''))}
+
+
+def _test(server, params):
+    return {'success': True, 'connectedUser': None}
+
+
+def _request_token(server, params):
+    return 'oauth_token=request-token&oauth_token_secret=request-secret'
+
+
+def _access_token(server, params):
+    return 'oauth_token=access-token&oauth_token_secret=access-secret'
+
+
+class MockServer(ThreadingMixIn, HTTPServer):
+    """
+    A threaded HTTP/1.1 server emulating the Scoop.it API and its OAuth
+    end-points, running in a background thread::
+
+        server = MockServer(latency=0.05, error_rate=0.01)
+        server.start()
+        api = ScoopItAPI(key, secret, base_url=server.base_url)
+        server.stop()
+
+    Responses can be delayed and errors injected at random, payload
+    sizes default to the server settings unless the request asks for
+    a given number of posts. Write actions (requests with an 'action'
+    parameter) are recorded in :attr:`actions`.
+    """
+    daemon_threads = True
+    # seconds to wait for the handler threads when stopping
+    stop_timeout = 5
+    request_queue_size = 128
+    endpoints = {
+        '/api/1/topic': _topic,
+        '/api/1/post': _post,
+        '/api/1/profile': _profile,
+        '/api/1/compilation': _compilation,
+        '/api/1/notifications': _notifications,
+        '/api/1/resolver': _resolver,
+        '/api/1/test': _test,
+        '/oauth/request': _request_token,
+        '/oauth/access': _access_token,
+    }
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, jitter=0,
+                 error_rate=0, error_status=503, retry_after=None,
+                 posts=30, comments=2, topics=3, curable=100, seed=None):
+        """
+        :param latency: Seconds each response is delayed by.
+        :type latency: float.
+        :param jitter: Maximum random delay added to ``latency``.
+        :type jitter: float.
+        :param error_rate: Fraction of requests answered with an error.
+        :type error_rate: float.
+        :param error_status: Status of the injected errors.
+        :type error_status: int.
+        :param retry_after: Retry-After header sent with injected errors.
+        :type retry_after: int or None.
+        :param posts: Default number of posts in topics, compilations
+                      and notifications lists.
+        :type posts: int.
+        :param comments: Number of comments of each post.
+        :type comments: int.
+        :param topics: Number of curated topics in profiles.
+        :type topics: int.
+        :param curable: Number of curable posts of each topic, accepted
+                        and refused ones are then left out.
+        :type curable: int.
+        :param seed: Seed of the random delays and errors.
+        """
+        HTTPServer.__init__(self, (host, port), MockRequestHandler)
+        self.thread = None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.posts = posts
+        self.comments = comments
+        self.topics = topics
+        self.curable = curable
+        # IDs of the posts accepted, refused or deleted
+        self.decided = set()
+        self.random = random.Random(seed)
+        self.requests = {}
+        # (path, parameters) of the received write actions
+        self.actions = []
+        # handler threads -> their connection
+        self.handlers = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return 'http://%s:%d' % self.server_address
+
+    def count(self, path):
+        self.lock.acquire()
+        try:
+            self.requests[path] = self.requests.get(path, 0) + 1
+        finally:
+            self.lock.release()
+
+    def delay(self):
+        if not self.jitter:
+            return self.latency
+        self.lock.acquire()
+        try:
+            return self.latency + self.random.uniform(0, self.jitter)
+        finally:
+            self.lock.release()
+
+    def fail(self):
+        if not self.error_rate:
+            return False
+        self.lock.acquire()
+        try:
+            return self.random.random() < self.error_rate
+        finally:
+            self.lock.release()
+
+    def process_request(self, request, client_address):
+        # ThreadingMixIn doesn't keep track of its threads
+        thread = threading.Thread(target=self.process_request_thread,
+                                  args=(request, client_address))
+        thread.daemon = self.daemon_threads
+        self.lock.acquire()
+        try:
+            self.handlers[thread] = request
+        finally:
+            self.lock.release()
+        thread.start()
+
+    def process_request_thread(self, request, client_address):
+        try:
+            ThreadingMixIn.process_request_thread(self, request, client_address)
+        finally:
+            self.lock.acquire()
+            try:
+                self.handlers.pop(threading.current_thread(), None)
+            finally:
+                self.lock.release()
+
+    def handle_error(self, request, client_address):
+        # clients dropping their connection aren't errors of the server
+        if isinstance(sys.exc_info()[1], socket.error):
+            return
+        HTTPServer.handle_error(self, request, client_address)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop serving, close the kept-alive connections and wait for
+        their handlers to finish.
+        """
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+        self.lock.acquire()
+        try:
+            handlers = list(self.handlers.items())
+        finally:
+            self.lock.release()
+        for thread, request in handlers:
+            try:
+                # handlers waiting for the next request read EOF
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        deadline = time.time() + self.stop_timeout
+        for thread, request in handlers:
+            thread.join(max(0, deadline - time.time()))
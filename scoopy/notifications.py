@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.notifications
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+"""
+
+import os
+import threading
+from collections import OrderedDict
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from scoopy.datatypes import Timestamp
+
+__all__ = [
+    'notification_key',
+    'NotificationStream',
+]
+
+
+def notification_key(notification):
+    """
+    Build a key identifying a notification, its ID if the server sent
+    one, else what it is about.
+    """
+    notification_id = getattr(notification, 'id', None)
+    if notification_id is not None:
+        return notification_id
+    key = [getattr(notification, 'type', None), getattr(notification, 'date', None)]
+    for name in ('user', 'topic', 'post'):
+        value = getattr(notification, name, None)
+        if isinstance(value, dict):
+            value = value.get('id')
+        key.append(value)
+    return tuple(key)
+
+
+class NotificationStream(object):
+    """
+    Polls the notifications of the current user, only returning the
+    ones which weren't seen before.
+
+    The date of the newest notification and the keys of the latest
+    ones are saved to a state file after each poll, so a restarted
+    stream resumes where it stopped. The delay between polls grows
+    while nothing happens and shrinks back when notifications arrive::
+
+        stream = NotificationStream(api, 'notifications.state')
+        for notification in stream:
+            print(notification)
+    """
+
+    def __init__(self, api, state_file=None, since=None, min_interval=30,
+                 max_interval=600, backoff=2.0, remember=1000):
+        """
+        :param api: The API instance used to get notifications.
+        :type api: :class:`scoopy.client.ScoopItAPI`.
+        :param state_file: File where the stream state is saved and
+                           loaded from, if it exists.
+        :type state_file: str or None.
+        :param since: Only get notifications newer than this, when there
+                      is no saved state.
+        :type since: :class:`scoopy.datatypes.Timestamp` or None.
+        :param min_interval: Shortest delay between polls, in seconds.
+        :type min_interval: float.
+        :param max_interval: Longest delay between polls, in seconds.
+        :type max_interval: float.
+        :param backoff: Factor by which the delay grows after a poll
+                        without notifications.
+        :type backoff: float.
+        :param remember: Number of notification keys kept for
+                         deduplication.
+        :type remember: int.
+        """
+        self.api = api
+        self.state_file = state_file
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.remember = remember
+        self.interval = min_interval
+        self.watermark = None
+        if since is not None:
+            self.watermark = since.value
+        self.seen = OrderedDict()
+        self.polls = 0
+        self.stopped = threading.Event()
+        if (state_file is not None) and os.path.exists(state_file):
+            self.load(state_file)
+
+    def poll(self):
+        """
+        Get the new notifications and adjust the delay before the next
+        poll accordingly.
+
+        :return: list -- :class:`scoopy.datatypes.Notification` objects.
+        """
+        since = None
+        if self.watermark is not None:
+            since = Timestamp(self.watermark)
+        notifications = self.api.notifications(since)
+        self.polls += 1
+        new = []
+        for notification in notifications:
+            key = notification_key(notification)
+            if key in self.seen:
+                continue
+            self.seen[key] = True
+            new.append(notification)
+            date = getattr(notification, 'date', None)
+            if (date is not None) and ((self.watermark is None) or (date > self.watermark)):
+                self.watermark = date
+        while len(self.seen) > self.remember:
+            self.seen.popitem(last=False)
+        if new:
+            self.interval = max(self.min_interval, self.interval / self.backoff)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        if new and (self.state_file is not None):
+            self.save()
+        return new
+
+    def __iter__(self):
+        """
+        Poll until :meth:`stop` is called, yielding new notifications.
+        """
+        while not self.stopped.is_set():
+            for notification in self.poll():
+                yield notification
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        """
+        Make the iteration end, interrupting the wait for the next poll.
+        """
+        self.stopped.set()
+
+    def save(self, filepath=None):
+        """
+        Save the stream state (defaults to the state file).
+        """
+        if filepath is None:
+            filepath = self.state_file
+        state = {
+            'watermark': self.watermark,
+            'seen': list(self.seen),
+            'interval': self.interval,
+        }
+        tmp_path = '%s.%d' % (filepath, os.getpid())
+        outfile = open(tmp_path, 'wb')
+        try:
+            pickle.dump(state, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            outfile.close()
+        os.rename(tmp_path, filepath)
+
+    def load(self, filepath):
+        """
+        Restore a state saved by :meth:`save`.
+        """
+        infile = open(filepath, 'rb')
+        try:
+            state = pickle.load(infile)
+        finally:
+            infile.close()
+        self.watermark = state['watermark']
+        self.seen = OrderedDict((key, True) for key in state['seen'])
+        self.interval = state['interval']
@@ -25,9 +25,10 @@ import os
 from time import time
 from urllib import urlencode
 try:
-    from urlparse import parse_qsl
+    from urlparse import parse_qs, parse_qsl, urlparse, urlunparse
 except ImportError:
-    from cgi import parse_qsl
+    from cgi import parse_qs, parse_qsl
+    from urlparse import urlparse, urlunparse
 try:
     import cPickle as pickle
 except ImportError:
@@ -35,6 +36,9 @@ except ImportError:
 
 import oauth2
 
+from scoopy.signing import Signer
+from scoopy.transport import PooledTransport
+
 __all__ = [
     'REQUEST_TOKEN_URL',
     'ACCESS_TOKEN_URL',
@@ -82,17 +86,56 @@ class OAuth(object):
     """
     signature_method = oauth2.SignatureMethod_HMAC_SHA1()
 
-    def __init__(self, consumer_key, consumer_secret):
+    def __init__(self, consumer_key, consumer_secret, transport=None,
+                 base_url=None):
         """
         :param consumer_key: The application's API consumer key.
         :type consumer_key: str.
         :param consumer_secret: The application's API consumer secret.
         :type consumer_secret: str.
+        :param transport: The transport used to send requests (defaults
+                          to a :class:`scoopy.transport.PooledTransport`).
+        :type transport: :class:`scoopy.transport.Transport` or None.
+        :param base_url: Server to send requests to instead of Scoop.it
+                         (eg: a :class:`scoopy.mockserver.MockServer`).
+        :type base_url: str or None.
         """
         self.consumer = oauth2.Consumer(consumer_key, consumer_secret)
-        self.client = oauth2.Client(self.consumer)
         self.token = None
         self.access_granted = False
+        if transport is None:
+            transport = PooledTransport()
+        self.transport = transport
+        self.base_url = base_url
+        self._signer = None
+
+    def server_url(self, url):
+        """
+        Point a Scoop.it URL to the configured server.
+        """
+        if (self.base_url is not None) and url.startswith(BASE_URL):
+            return self.base_url + url[len(BASE_URL):]
+        return url
+
+    @property
+    def signer(self):
+        """
+        The :class:`scoopy.signing.Signer` of the current consumer and
+        token, built again when they change.
+        """
+        signer = self._signer
+        if (signer is None) or not signer.matches(self.consumer, self.token):
+            signer = self._signer = Signer(self.consumer, self.token)
+        return signer
+
+    @property
+    def client(self):
+        """
+        An :class:`oauth2.Client` bound to the current consumer and token.
+        Kept for backward compatibility, requests are sent through
+        :attr:`transport` instead.
+        """
+        return oauth2.Client(self.consumer, self.token)
 
     def save_token(self, filepath):
         if os.path.exists(filepath):
@@ -118,13 +161,12 @@ class OAuth(object):
             db['oauth_token'],
             db['oauth_token_secret']
         )
-        self.client = oauth2.Client(self.consumer, self.token)
 
     def get_request_token(self):
         """
         Request the server for a request_token and return it.
         """
-        response, content = self.client.request(REQUEST_TOKEN_URL)
+        response, content = self.send(REQUEST_TOKEN_URL)
         if response['status'] != '200':
             raise OAuthRequestFailure(
                 "failed to get request_token (%s)" % response['status']
@@ -146,7 +188,7 @@ class OAuth(object):
             )
         #TODO: warn user if access already granted
         return "%s?oauth_token=%s&oauth_callback=%s" % (
-            AUTHORIZE_URL,
+            self.server_url(AUTHORIZE_URL),
             self.token.key,
             callback_url
         )
@@ -156,8 +198,7 @@ class OAuth(object):
         Request the server for an access token and return it.
         """
         self.token.set_verifier(token_verifier)
-        self.client = oauth2.Client(self.consumer, self.token)
-        response, content = self.client.request(ACCESS_TOKEN_URL, 'POST')
+        response, content = self.send(ACCESS_TOKEN_URL, 'POST')
         if response['status'] != '200':
             raise OAuthRequestFailure(
                 "failed to get access_token (%s)" % response['status']
@@ -168,7 +209,6 @@ class OAuth(object):
             access_token['oauth_token'],
             access_token['oauth_token_secret'],
         )
-        self.client = oauth2.Client(self.consumer, self.token)
 
     def generate_request_params(self, params):
         """
@@ -184,20 +224,136 @@ class OAuth(object):
         }
         for key, value in params.iteritems():
             request_params[key] = value
-        return urlencode(request_params)
+        return urlencode(request_params, True)
+
+    def request(self, url, params, method='GET', headers=None):
+        url, body, headers = self.prepare(url, params, method, headers)
+        return self.transport.request(url, method, body, headers)
+
+    def timed_request(self, url, params, method, headers, event):
+        """
+        Same as :meth:`request`, recording the phases of an
+        :class:`scoopy.instrumentation.CallEvent`.
+        """
+        start = time()
+        url, body, headers = self.prepare(url, params, method, headers)
+        event.timed('sign', start)
+        return self.transport.timed_request(url, method, body, headers, event)
+
+    def stream(self, url, params, method='GET', headers=None, event=None):
+        """
+        Same as :meth:`request`, but return an iterator over the body
+        chunks instead of the whole body, see
+        :meth:`scoopy.transport.PooledTransport.stream`.
+
+        :param event: Event recording the 'sign' and 'network' phases.
+        :type event: :class:`scoopy.instrumentation.CallEvent` or None.
+        """
+        if event is None:
+            url, body, headers = self.prepare(url, params, method, headers)
+            return self.transport.stream(url, method, body, headers)
+        start = time()
+        url, body, headers = self.prepare(url, params, method, headers)
+        event.timed('sign', start)
+        start = time()
+        try:
+            return self.transport.stream(url, method, body, headers)
+        finally:
+            event.timed('network', start)
 
-    def request(self, url, params, method='GET'):
+    def prepare(self, url, params, method='GET', headers=None):
+        """
+        Build and sign an API request, return the ``(url, body, headers)``
+        to send.
+        """
+        if self.token is not None:
+            return self.prepare_many([(url, params, method)], headers)[0]
         request_params = ''
         if method.lower() == 'get':
             if params:
-                url += ('?' + urlencode(params))
+                url += ('?' + urlencode(params, True))
         elif method.lower() == 'post':
             request_params = self.generate_request_params(params)
         else:
             raise OAuthRequestFailure("request method can only be 'GET' or 'POST'")
-        return self.client.request(
+        request_headers = {'Accept-encoding': 'gzip'}
+        if headers:
+            request_headers.update(headers)
+        return self.sign(
             url,
             method=method,
             body=request_params,
-            headers={'Accept-encoding': 'gzip'},
+            headers=request_headers,
+        )
+
+    def prepare_many(self, requests, headers=None):
+        """
+        Build and sign several API requests at once with :attr:`signer`,
+        a token is required.
+
+        :param requests: (url, params, method) tuples.
+        :type requests: list.
+        :param headers: Headers added to every request.
+        :type headers: dict or None.
+        :returns: list -- (url, body, headers) tuples.
+        """
+        if self.token is None:
+            raise OAuthTokenError("no token found, get one first")
+        batch = []
+        for url, params, method in requests:
+            method = method.upper()
+            if method not in ('GET', 'POST'):
+                raise OAuthRequestFailure("request method can only be 'GET' or 'POST'")
+            batch.append((self.server_url(url), params, method))
+        prepared = []
+        for url, body, signed_headers in self.signer.sign_many(batch):
+            request_headers = {'Accept-encoding': 'gzip'}
+            if headers:
+                request_headers.update(headers)
+            request_headers.update(signed_headers)
+            prepared.append((url, body, request_headers))
+        return prepared
+
+    def sign(self, url, method='GET', body='', headers=None):
+        """
+        Sign a request with the current consumer and token, the same way
+        :class:`oauth2.Client` does, and return the ``(url, body, headers)``
+        to send.
+        """
+        url = self.server_url(url)
+        headers = dict(headers or {})
+        if method == 'POST':
+            headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        is_form_encoded = \
+            headers.get('Content-Type') == 'application/x-www-form-urlencoded'
+        parameters = None
+        if is_form_encoded and body:
+            parameters = parse_qs(body)
+        req = oauth2.Request.from_consumer_and_token(
+            self.consumer,
+            token=self.token,
+            http_method=method,
+            http_url=url,
+            parameters=parameters,
+            body=body,
+            is_form_encoded=is_form_encoded,
         )
+        req.sign_request(self.signature_method, self.consumer, self.token)
+        if is_form_encoded:
+            body = req.to_postdata()
+        elif method == 'GET':
+            url = req.to_url()
+        else:
+            scheme, netloc = urlparse(url)[:2]
+            realm = urlunparse((scheme, netloc, '', None, None, None))
+            headers.update(req.to_header(realm=realm))
+        return url, body, headers
+
+    def send(self, url, method='GET', body='', headers=None):
+        """
+        Sign a request and send it through the transport.
+
+        :returns: tuple -- (response headers, response body)
+        """
+        url, body, headers = self.sign(url, method, body, headers)
+        return self.transport.request(url, method, body, headers)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.ratelimit
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+"""
+
+import os
+import struct
+import threading
+from time import sleep, time
+try:
+    import fcntl
+except ImportError: # not available on windows
+    fcntl = None
+
+from scoopy.client import ScoopItError
+
+__all__ = [
+    'MemoryBucket',
+    'FileBucket',
+    'RateLimiter',
+]
+
+
+def _take(state, rate, burst, now):
+    """
+    Take a token from a bucket state, going in debt if there are none
+    left, and return the new state along with the time to wait before
+    the token can be used.
+    """
+    if state is None:
+        tokens = burst
+    else:
+        tokens, updated = state
+        tokens = min(burst, tokens + (now - updated) * rate)
+    tokens -= 1
+    delay = 0.0
+    if tokens < 0:
+        delay = -tokens / rate
+    return (tokens, now), delay
+
+
+class MemoryBucket(object):
+    """
+    Token bucket shared by the threads of a process.
+    """
+
+    def __init__(self):
+        self.state = None
+        self.lock = threading.Lock()
+
+    def take(self, rate, burst):
+        self.lock.acquire()
+        try:
+            self.state, delay = _take(self.state, rate, burst, time())
+        finally:
+            self.lock.release()
+        return delay
+
+
+class FileBucket(object):
+    """
+    Token bucket stored in a file, shared by every process using the
+    same file. Access is serialized with an exclusive lock on the file,
+    which needs a POSIX platform.
+    """
+    _format = '!dd'
+
+    def __init__(self, filepath):
+        """
+        :param filepath: Path to the bucket file (created if needed).
+        :type filepath: str.
+        :raises: :class:`scoopy.client.ScoopItError` if file locks are not
+                 available on this platform.
+        """
+        if fcntl is None:
+            raise ScoopItError(
+                "FileBucket needs file locks, which are not available on "
+                "this platform, use a MemoryBucket"
+            )
+        self.filepath = filepath
+        self.lock = threading.Lock()
+
+    def take(self, rate, burst):
+        size = struct.calcsize(self._format)
+        # the file is opened for each take, locks held on a descriptor
+        # inherited through fork() would be shared between processes
+        self.lock.acquire()
+        try:
+            fd = os.open(self.filepath, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                data = os.read(fd, size)
+                state = None
+                if len(data) == size:
+                    state = struct.unpack(self._format, data)
+                state, delay = _take(state, rate, burst, time())
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, struct.pack(self._format, *state))
+            finally:
+                os.close(fd)
+        finally:
+            self.lock.release()
+        return delay
+
+
+class RateLimiter(object):
+    """
+    Token bucket rate limiter, requests are delayed so they don't go
+    over ``rate`` per second on average, with at most ``burst`` of them
+    sent at once after a quiet period.
+
+    Waiting requests reserve their token in advance, so they are
+    released in order instead of competing for the next token.
+    """
+
+    def __init__(self, rate, burst=None, backend=None):
+        """
+        :param rate: Requests allowed per second.
+        :type rate: float.
+        :param burst: Size of the bucket (defaults to ``rate``, at
+                      least 1).
+        :type burst: float or None.
+        :param backend: Storage for the bucket, use a :class:`FileBucket`
+                        to share it between processes (defaults to a
+                        :class:`MemoryBucket`).
+        :type backend: :class:`MemoryBucket` or :class:`FileBucket`.
+        """
+        if burst is None:
+            burst = max(rate, 1)
+        if backend is None:
+            backend = MemoryBucket()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.backend = backend
+        self.requests = 0
+        self.delayed = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Reserve a token for a request.
+
+        :returns: float -- Seconds to wait before sending the request.
+        """
+        delay = self.backend.take(self.rate, self.burst)
+        self.lock.acquire()
+        try:
+            self.requests += 1
+            if delay > 0:
+                self.delayed += 1
+                self.wait_time += delay
+                self.max_wait = max(self.max_wait, delay)
+        finally:
+            self.lock.release()
+        return delay
+
+    def acquire(self):
+        """
+        Block until a request can be sent.
+
+        :returns: float -- Seconds spent waiting.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            sleep(delay)
+        return delay
+
+    def stats(self):
+        """
+        Counters of the limiter usage, suitable for exporting.
+
+        :returns: dict.
+        """
+        return {
+            'requests': self.requests,
+            'delayed': self.delayed,
+            'wait_time': self.wait_time,
+            'max_wait': self.max_wait,
+        }
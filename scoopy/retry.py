@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.retry
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+"""
+
+import httplib
+import random
+import threading
+from email.utils import mktime_tz, parsedate_tz
+from time import sleep, time
+
+from scoopy.transport import TransportError
+
+__all__ = [
+    'CircuitOpenError',
+    'CircuitBreaker',
+    'RetryPolicy',
+]
+
+
+class CircuitOpenError(Exception):
+    """
+    Exception raised when a request is not sent because the circuit
+    of its end-point is open.
+    """
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+class CircuitBreaker(object):
+    """
+    Tracks failures per end-point and makes requests fail fast once an
+    end-point failed ``threshold`` times in a row. After ``reset_timeout``
+    seconds, a single request is let through to probe the end-point, its
+    success closes the circuit again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        """
+        :param threshold: Consecutive failures opening the circuit.
+        :type threshold: int.
+        :param reset_timeout: Seconds before probing an open circuit.
+        :type reset_timeout: float.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        # end-point -> [consecutive failures, time the circuit opened]
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    def allow(self, endpoint):
+        """
+        Raise :class:`CircuitOpenError` if requests to ``endpoint``
+        should not be sent.
+        """
+        self.lock.acquire()
+        try:
+            circuit = self.circuits.get(endpoint)
+            if (circuit is None) or (circuit[1] is None):
+                return
+            if time() - circuit[1] < self.reset_timeout:
+                raise CircuitOpenError("circuit open for %s" % endpoint)
+            # half-open, the next requests wait for the probe's outcome
+            circuit[1] = time()
+        finally:
+            self.lock.release()
+
+    def success(self, endpoint):
+        self.lock.acquire()
+        try:
+            self.circuits.pop(endpoint, None)
+        finally:
+            self.lock.release()
+
+    def failure(self, endpoint):
+        self.lock.acquire()
+        try:
+            circuit = self.circuits.setdefault(endpoint, [0, None])
+            circuit[0] += 1
+            if circuit[0] >= self.threshold:
+                circuit[1] = time()
+        finally:
+            self.lock.release()
+
+    def is_open(self, endpoint):
+        circuit = self.circuits.get(endpoint)
+        return (circuit is not None) and (circuit[1] is not None)
+
+
+class RetryPolicy(object):
+    """
+    Decides which failed requests are sent again and when.
+
+    Only requests using one of ``methods`` are retried, after a server
+    error status or a connection error. Delays grow exponentially with
+    random jitter, and are never shorter than the Retry-After header
+    sent by the server.
+    """
+    exceptions = (IOError, httplib.HTTPException, TransportError)
+
+    def __init__(self, attempts=3, backoff=0.5, max_backoff=30,
+                 statuses=('429', '500', '502', '503', '504'),
+                 methods=('GET',), breaker=None, on_retry=None):
+        """
+        :param attempts: Maximum number of times a request is sent.
+        :type attempts: int.
+        :param backoff: Base delay, doubled after each attempt.
+        :type backoff: float.
+        :param max_backoff: Longest delay between two attempts.
+        :type max_backoff: float.
+        :param statuses: Response statuses worth retrying.
+        :type statuses: tuple.
+        :param methods: HTTP methods of requests which can be retried.
+        :type methods: tuple.
+        :param breaker: Circuit breaker checked before each attempt.
+        :type breaker: :class:`CircuitBreaker` or None.
+        :param on_retry: Called as ``on_retry(url, attempt, delay, status,
+                         exception)`` before each retry.
+        :type on_retry: callable or None.
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.methods = methods
+        self.breaker = breaker
+        self.on_retry = on_retry
+        self.retries = 0
+
+    def is_failure(self, status=None, exception=None):
+        """
+        Whether a response status or an exception means the request
+        failed in a way worth retrying.
+        """
+        if exception is not None:
+            return isinstance(exception, self.exceptions)
+        return status['status'] in self.statuses
+
+    def should_retry(self, method, attempt, status=None, exception=None):
+        """
+        Whether a request should be sent again after its ``attempt``-th
+        try failed.
+        """
+        return (method in self.methods) and (attempt < self.attempts) and \
+            self.is_failure(status, exception)
+
+    def delay(self, attempt, status=None):
+        """
+        Seconds to wait before sending a request again after its
+        ``attempt``-th try failed.
+        """
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        if status is not None:
+            delay = max(delay, self.retry_after(status))
+        return delay
+
+    def retry_after(self, status):
+        """
+        Seconds to wait according to the Retry-After header of a
+        response, 0 if there is none.
+        """
+        value = status.get('retry-after')
+        if not value:
+            return 0
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        date = parsedate_tz(value)
+        if date is None:
+            return 0
+        return max(0, mktime_tz(date) - time())
+
+    def before(self, endpoint):
+        if self.breaker is not None:
+            self.breaker.allow(endpoint)
+
+    def after(self, endpoint, status=None, exception=None):
+        if self.breaker is None:
+            return
+        if self.is_failure(status, exception):
+            self.breaker.failure(endpoint)
+        else:
+            self.breaker.success(endpoint)
+
+    def retrying(self, url, attempt, delay, status=None, exception=None):
+        self.retries += 1
+        if self.on_retry is not None:
+            self.on_retry(url, attempt, delay, status, exception)
+
+    def call(self, send, url, method='GET'):
+        """
+        Call ``send()`` until it returns a response which doesn't need
+        to be retried, or the attempts are exhausted.
+
+        :param send: Function sending the request and returning a
+                     (response headers, response body) tuple.
+        :type send: callable.
+        :returns: tuple -- What the last call to ``send`` returned.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.before(url)
+            try:
+                status, data = send()
+            except Exception as e:
+                self.after(url, exception=e)
+                if not self.should_retry(method, attempt, exception=e):
+                    raise
+                delay = self.delay(attempt)
+                self.retrying(url, attempt, delay, exception=e)
+                sleep(delay)
+                continue
+            self.after(url, status)
+            if not self.should_retry(method, attempt, status):
+                return status, data
+            delay = self.delay(attempt, status)
+            self.retrying(url, attempt, delay, status)
+            sleep(delay)
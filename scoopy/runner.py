@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.runner
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Fetch large sets of topics from several processes, so that decoding
+responses and building data types isn't limited to a single core::
+
+    runner = IngestRunner(CONSUMER_KEY, CONSUMER_SECRET, 'token.db', processes=4)
+    for result in runner.run(topic_ids, order='curationDate'):
+        if result.ok:
+            mirror.store_topic(result.value)
+    print(runner.report())
+
+Each process builds its own API instance from the saved token and sends
+the topics back serialized (see :func:`scoopy.datatypes.serialize`).
+"""
+
+import Queue
+import multiprocessing
+import signal
+from time import time
+
+from scoopy.client import BulkResult, ScoopItAPI, ScoopItError
+from scoopy.datatypes import deserialize, serialize
+
+__all__ = [
+    'IngestRunner',
+    'WorkerProgress',
+]
+
+# seconds between checks that the workers are still alive
+POLL_INTERVAL = 0.5
+
+
+def _work(index, consumer_key, consumer_secret, token_file, api_options,
+          topic_ids, topic_options, results, stopping):
+    # interrupts are handled by the parent, which stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    options = {'keep_raw': False}
+    options.update(api_options)
+    api = ScoopItAPI(consumer_key, consumer_secret, **options)
+    api.load_oauth_token(token_file)
+    try:
+        for topic_id in topic_ids:
+            if stopping.is_set():
+                break
+            try:
+                data = serialize(api.topic(topic_id, **topic_options))
+            except Exception as e:
+                # exceptions may not be picklable, their message is sent
+                if isinstance(e, ScoopItError):
+                    error = e.value
+                else:
+                    error = '%s: %s' % (e.__class__.__name__, e)
+                results.put((index, topic_id, None, error))
+            else:
+                results.put((index, topic_id, data, None))
+    finally:
+        results.put((index, None, None, None))
+
+
+class WorkerProgress(object):
+    """
+    Progress of a worker process of an :class:`IngestRunner`.
+    """
+
+    def __init__(self, index, shard_size):
+        self.index = index
+        self.pid = None
+        self.shard_size = shard_size
+        self.topics = 0
+        self.errors = 0
+        # size of the serialized topics received
+        self.bytes = 0
+        self.started = time()
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.topics + self.errors
+
+    @property
+    def elapsed(self):
+        return (self.finished or time()) - self.started
+
+    @property
+    def throughput(self):
+        """
+        Topics fetched per second.
+        """
+        elapsed = self.elapsed
+        if not elapsed:
+            return 0.0
+        return self.topics / elapsed
+
+    def __str__(self):
+        return "worker %d (pid %s): %d/%d topics, %d errors, %.1f KB, %.1f topics/s" % (
+            self.index, self.pid, self.done, self.shard_size, self.errors,
+            self.bytes / 1024.0, self.throughput
+        )
+
+
+class IngestRunner(object):
+    """
+    Shards topic IDs across worker processes, each one fetching its share
+    with its own API instance.
+    """
+
+    def __init__(self, consumer_key, consumer_secret, token_file, processes=None,
+                 api_options=None):
+        """
+        :param consumer_key: The application's consumer key.
+        :type consumer_key: str.
+        :param consumer_secret: The application's consumer secret.
+        :type consumer_secret: str.
+        :param token_file: Path of a token saved with
+                           :meth:`scoopy.client.ScoopItAPI.save_oauth_token`.
+        :type token_file: str.
+        :param processes: Number of worker processes (the number of CPUs by
+                          default).
+        :type processes: int or None.
+        :param api_options: Keyword arguments of the workers'
+                            :class:`scoopy.client.ScoopItAPI` (``keep_raw``
+                            is False unless set).
+        :type api_options: dict or None.
+        """
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.token_file = token_file
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.processes = processes
+        self.api_options = api_options or {}
+        self.workers = []
+        self.started = None
+        self.finished = None
+        self.stopping = None
+
+    def run(self, topic_ids, api=None, **kwargs):
+        """
+        Fetch topics, see :meth:`scoopy.client.ScoopItAPI.topic` for the
+        accepted keyword arguments. Topics are yielded in completion order.
+
+        Leaving the loop early (or interrupting it) stops the workers once
+        their current request is done.
+
+        :param topic_ids: The IDs of the topics to fetch.
+        :type topic_ids: iterable.
+        :param api: API instance to attach the topics to.
+        :type api: :class:`scoopy.client.ScoopItAPI` or None.
+        :return: iterator -- :class:`scoopy.client.BulkResult` objects
+                 holding :class:`scoopy.datatypes.Topic` values.
+        """
+        topic_ids = list(topic_ids)
+        count = max(1, min(self.processes, len(topic_ids)))
+        # interleaved, so that each shard gets a share of every part of the list
+        shards = [topic_ids[i::count] for i in range(count)]
+        results = multiprocessing.Queue()
+        self.stopping = multiprocessing.Event()
+        self.workers = [WorkerProgress(i, len(shard)) for i, shard in enumerate(shards)]
+        self.started = time()
+        self.finished = None
+        processes = []
+        for index, shard in enumerate(shards):
+            process = multiprocessing.Process(target=_work, args=(
+                index, self.consumer_key, self.consumer_secret, self.token_file,
+                self.api_options, shard, kwargs, results, self.stopping
+            ))
+            process.daemon = True
+            process.start()
+            self.workers[index].pid = process.pid
+            processes.append(process)
+        running = set(range(count))
+        try:
+            while running:
+                try:
+                    messages = [results.get(timeout=POLL_INTERVAL)]
+                except Queue.Empty:
+                    messages = self._reap(processes, results, running)
+                for index, topic_id, data, error in messages:
+                    worker = self.workers[index]
+                    if topic_id is None:
+                        worker.finished = time()
+                        running.discard(index)
+                    elif error is not None:
+                        worker.errors += 1
+                        yield BulkResult(topic_id, error=ScoopItError(error))
+                    else:
+                        worker.topics += 1
+                        worker.bytes += len(data)
+                        yield BulkResult(topic_id, deserialize(data, api))
+        finally:
+            if running:
+                self.stop()
+                # drained, or the workers can't flush their last results
+                while running:
+                    try:
+                        messages = [results.get(timeout=POLL_INTERVAL)]
+                    except Queue.Empty:
+                        messages = self._reap(processes, results, running)
+                    for message in messages:
+                        index, topic_id = message[:2]
+                        if topic_id is None:
+                            self.workers[index].finished = time()
+                            running.discard(index)
+            for process in processes:
+                process.join()
+            self.finished = time()
+
+    def _reap(self, processes, results, running):
+        # workers which died without saying they were done: what they sent
+        # before exiting can reach the queue after the get() timed out, so
+        # it is drained before they are dropped
+        dead = [index for index in running if not processes[index].is_alive()]
+        if not dead:
+            return
+        while True:
+            try:
+                yield results.get_nowait()
+            except Queue.Empty:
+                break
+        for index in dead:
+            # unless their done message was among the drained ones
+            if index in running:
+                self.workers[index].finished = time()
+                running.discard(index)
+
+    def stop(self):
+        """
+        Ask the workers to stop once their current request is done.
+        """
+        if self.stopping is not None:
+            self.stopping.set()
+
+    @property
+    def topics(self):
+        return sum(worker.topics for worker in self.workers)
+
+    @property
+    def errors(self):
+        return sum(worker.errors for worker in self.workers)
+
+    @property
+    def throughput(self):
+        """
+        Topics fetched per second by all the workers.
+        """
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time()) - self.started
+        if not elapsed:
+            return 0.0
+        return self.topics / elapsed
+
+    def report(self):
+        """
+        Progress and throughput of the workers and of the whole run.
+        """
+        lines = [str(worker) for worker in self.workers]
+        lines.append("total: %d topics, %d errors, %.1f KB, %.1f topics/s" % (
+            self.topics, self.errors,
+            sum(worker.bytes for worker in self.workers) / 1024.0, self.throughput
+        ))
+        return '\n'.join(lines)
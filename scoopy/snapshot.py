@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.snapshot
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Changes between successive polls of a topic::
+
+    previous = Snapshot.of(api.topic(topic_id, order='curationDate'))
+    ...
+    topic = api.topic(topic_id, order='curationDate')
+    delta = previous.diff(Snapshot.of(topic))
+    for post in delta.select(topic.curatedPosts):
+        process(post)
+
+A snapshot only keeps the IDs and a fingerprint of each post, and can
+be pickled to be compared with the next poll of another run.
+"""
+
+import json
+from bisect import bisect_left
+from hashlib import sha1
+
+from scoopy.datatypes import Post, Topic
+from scoopy.export import plain
+
+__all__ = [
+    'FINGERPRINT_FIELDS',
+    'fingerprint',
+    'Snapshot',
+    'Delta',
+    'diff',
+]
+
+# fields which change without the post being edited
+VOLATILE_FIELDS = frozenset([
+    'commentsCount', 'thanksCount', 'pageViews', 'pageClicks', 'thanked',
+    'comments', 'topic',
+])
+FINGERPRINT_FIELDS = tuple(f for f in Post._fields if f not in VOLATILE_FIELDS)
+
+
+def _longest_increasing(values):
+    """
+    Positions of a longest increasing subsequence of ``values``, in
+    O(n log n) time.
+    """
+    # tails[k]: smallest last value of the increasing subsequences of
+    # length k + 1 found so far, ends[k] its position
+    tails, ends = [], []
+    previous = [None] * len(values)
+    for position, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            ends.append(position)
+        else:
+            tails[k] = value
+            ends[k] = position
+        if k:
+            previous[position] = ends[k - 1]
+    positions = set()
+    position = None
+    if ends:
+        position = ends[-1]
+    while position is not None:
+        positions.add(position)
+        position = previous[position]
+    return positions
+
+
+def fingerprint(post, fields=FINGERPRINT_FIELDS):
+    """
+    Digest of the content of a post, which changes when any of ``fields``
+    does.
+
+    :param post: The post.
+    :type post: :class:`scoopy.datatypes.Post`.
+    :param fields: The fields to take into account.
+    :type fields: tuple.
+    :returns: str.
+    """
+    # nested entities are compared by identity
+    data = plain(post, references=True)
+    values = []
+    for field in fields:
+        if field in data:
+            values.append(data[field])
+        else:
+            # unknown keys, already builtin types
+            values.append(getattr(post, field, None))
+    # serialized as JSON, which doesn't tell str and unicode apart
+    return sha1(json.dumps(values, separators=(',', ':'), sort_keys=True)).digest()
+
+
+class Snapshot(object):
+    """
+    Order and fingerprints of a list of posts.
+    """
+
+    def __init__(self, posts, fields=FINGERPRINT_FIELDS):
+        """
+        :param posts: The posts, in their order.
+        :type posts: list.
+        :param fields: Post fields which make a post modified when they
+                       change.
+        :type fields: tuple.
+        """
+        self.fields = tuple(fields)
+        self.ids = []
+        self.fingerprints = {}
+        for post in posts:
+            if post.id in self.fingerprints:
+                continue
+            self.ids.append(post.id)
+            self.fingerprints[post.id] = fingerprint(post, self.fields)
+
+    @classmethod
+    def of(cls, topic, curable=False, fields=FINGERPRINT_FIELDS):
+        """
+        Snapshot of the curated (or curable) posts of a topic.
+
+        :param topic: The topic.
+        :type topic: :class:`scoopy.datatypes.Topic`.
+        """
+        if curable:
+            return cls(topic.curablePosts, fields)
+        return cls(topic.curatedPosts, fields)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, post_id):
+        return post_id in self.fingerprints
+
+    def diff(self, newer):
+        """
+        Changes from this snapshot to a newer one, in O(n log n) time.
+        Reordered posts are the fewest posts which moved for the others
+        to keep their order.
+
+        :param newer: The newer snapshot.
+        :type newer: :class:`Snapshot`.
+        :returns: :class:`Delta`.
+        """
+        if newer.fields != self.fields:
+            raise ValueError("snapshots don't fingerprint the same fields")
+        old, new = self.fingerprints, newer.fingerprints
+        added = [post_id for post_id in newer.ids if post_id not in old]
+        removed = [post_id for post_id in self.ids if post_id not in new]
+        modified = [post_id for post_id in newer.ids
+                    if (post_id in old) and (old[post_id] != new[post_id])]
+        # posts moved among those in both snapshots: the fewest posts
+        # outside of a longest run keeping its former order
+        rank = dict((post_id, index) for index, post_id in enumerate(self.ids))
+        kept = [post_id for post_id in newer.ids if post_id in old]
+        in_order = _longest_increasing([rank[post_id] for post_id in kept])
+        reordered = [post_id for index, post_id in enumerate(kept)
+                     if index not in in_order]
+        return Delta(added, removed, modified, reordered)
+
+
+class Delta(object):
+    """
+    Changes between two snapshots, as lists of post IDs in the order of
+    the snapshot they're from (the older one for removed posts).
+    """
+
+    def __init__(self, added=(), removed=(), modified=(), reordered=()):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.modified = list(modified)
+        self.reordered = list(reordered)
+
+    def __nonzero__(self):
+        return bool(self.added or self.removed or self.modified or self.reordered)
+    __bool__ = __nonzero__
+
+    def __str__(self):
+        return "<Delta(added=%d, removed=%d, modified=%d, reordered=%d)>" % (
+            len(self.added), len(self.removed), len(self.modified),
+            len(self.reordered)
+        )
+
+    def select(self, posts):
+        """
+        Filter the added and modified posts out of a list.
+        """
+        changed = set(self.added)
+        changed.update(self.modified)
+        return [post for post in posts if post.id in changed]
+
+
+def diff(older, newer, fields=FINGERPRINT_FIELDS):
+    """
+    Changes between two topics, lists of posts or snapshots.
+
+    :returns: :class:`Delta`.
+    """
+    def snapshot(value):
+        if isinstance(value, Snapshot):
+            return value
+        if isinstance(value, Topic):
+            return Snapshot.of(value, fields=fields)
+        return Snapshot(value, fields)
+    return snapshot(older).diff(snapshot(newer))
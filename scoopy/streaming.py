@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.streaming
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Incremental parsing of JSON documents, used to convert the items of
+large arrays while the response is still being received.
+"""
+
+import json
+import re
+
+__all__ = [
+    'StreamError',
+    'iter_json_array',
+]
+
+# characters changing the parser state outside of strings
+_TOKEN = re.compile(r'["{}\[\],]')
+# rest of a string, up to its closing quote
+_STRING_END = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+_WHITESPACE = re.compile(r'[ \t\n\r,]*')
+# consumed data is dropped from the buffer once it's that large
+_COMPACT = 65536
+
+
+class StreamError(Exception):
+    """
+    Exception raised when a streamed document is malformed or ends
+    before the array is complete.
+    """
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+def iter_json_array(chunks, path, decode=None):
+    """
+    Yield the items of an array of a JSON document as they are received,
+    only one item is decoded at a time. Yields nothing if the document
+    has no such array.
+
+    :param chunks: The document, in chunks of bytes.
+    :type chunks: iterable.
+    :param path: Keys leading to the array, eg: ``('topic', 'curatedPosts')``.
+    :type path: tuple.
+    :param decode: Function decoding one item from the buffer, as
+                   ``decode(buffer, index) -> (item, end)`` (defaults to
+                   the standard library raw decoder).
+    :type decode: callable or None.
+    """
+    if decode is None:
+        decode = json.JSONDecoder().raw_decode
+    path = tuple(path)
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    # frames of the enclosing containers: [opening char, current key]
+    stack = []
+    expect_key = False
+    # find the array
+    while True:
+        match = _TOKEN.search(buf, pos)
+        if match is None:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        char = match.group()
+        pos = match.end()
+        if char == '"':
+            end = _STRING_END.match(buf, pos)
+            if end is None:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    raise StreamError("unterminated string")
+                buf, pos = buf[match.start():] + chunk, 0
+                continue
+            if expect_key:
+                stack[-1][1] = buf[pos:end.end() - 1]
+                expect_key = False
+            pos = end.end()
+        elif char == ',':
+            expect_key = bool(stack) and (stack[-1][0] == '{')
+        elif char in '{[':
+            if (char == '[') and (len(stack) == len(path)) and \
+                    all(frame[0] == '{' for frame in stack) and \
+                    (tuple(frame[1] for frame in stack) == path):
+                break
+            stack.append([char, None])
+            expect_key = char == '{'
+        else:
+            if not stack:
+                raise StreamError("unbalanced %r" % char)
+            stack.pop()
+            expect_key = False
+            if not stack:
+                return
+    # decode the items one by one
+    exhausted = False
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos >= _COMPACT:
+            buf, pos = buf[pos:], 0
+        if pos < len(buf):
+            if buf[pos] == ']':
+                return
+            try:
+                item, end = decode(buf, pos)
+            except ValueError:
+                item, end = None, None
+            # a value ending with the buffer may be truncated (numbers)
+            if (end is not None) and ((end < len(buf)) or exhausted):
+                pos = end
+                yield item
+                continue
+        if exhausted:
+            raise StreamError("document ended inside the array")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+        else:
+            buf = buf[pos:] + chunk
+            pos = 0
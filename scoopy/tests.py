@@ -1,12 +1,56 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import with_statement
+import copy
+import csv
+import gc
+import gzip
+import httplib
+import json
+import logging
+import Queue
 import oauth2
 import re
-from tempfile import NamedTemporaryFile
+import shutil
+import socket
+import struct
+import threading
+import time
+import weakref
+from contextlib import closing
+from tempfile import NamedTemporaryFile, mkdtemp
 from unittest import TestCase
+from urllib import urlencode
+from urlparse import parse_qsl, urlsplit
 from scoopy import ScoopItAPI
 from scoopy import OAuth
+from scoopy import ratelimit
+from scoopy.asyncclient import AsyncScoopItAPI
+from scoopy.cache import (
+    CacheEntry, DiskCache, MemoryCache, ResolverCache, ResponseCache
+)
+from scoopy.client import POST_URL, TOPIC_URL, ScoopItError
+from scoopy.curation import CurationQueue
+from scoopy.datatypes import (
+    Post, SerializationError, Timestamp, Topic, attach, deserialize, serialize
+)
+from scoopy.decoders import DecoderError, available_decoders, get_decoder
+from scoopy.export import ColumnarWriter, export, flat_schema, read_columnar
+from scoopy.futures import (
+    Return, SingleFlight, ThreadPool, coroutine, gather
+)
+from scoopy.instrumentation import LoggingHook, MetricsHook, MetricsRegistry
+from scoopy.mirror import Mirror
+from scoopy.mockserver import MockRequestHandler, MockServer, make_post, make_source, make_topic
+from scoopy.notifications import NotificationStream
+from scoopy.oauth import OAuthTokenError
+from scoopy.ratelimit import FileBucket, RateLimiter
+from scoopy.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from scoopy.runner import IngestRunner, WorkerProgress
+from scoopy.signing import Signer
+from scoopy.snapshot import Snapshot, diff, fingerprint
+from scoopy.streaming import StreamError, iter_json_array
+from scoopy.transport import PooledTransport, Response, TransportError
 try:
     import cPickle as pickle
 except ImportError:
@@ -25,7 +69,7 @@ class ScoopyTest(TestCase):
         self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
         self.api.oauth.request = self.mockedRequest
 
-    def mockedRequest(self, url, params, method='GET'):
+    def mockedRequest(self, url, params, method='GET', headers=None):
         return self.mocked_data[method]
 
 
@@ -90,3 +134,1339 @@ class OAuthTest(TestCase):
             self.assertRegexpMatches(result, expected_re)
         except AttributeError:
             assert expected_re.match(result) is not None, "Result doesn't match reference regex."
+
+
+class LazyDatatypesTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, lazy=True)
+        self.topic = Topic(self.api, make_topic(1, curated=3))
+
+    def test_not_converted(self):
+        self.assertEqual(self.topic.name, 'Topic 1')
+        self.assertTrue('curatedPosts' in self.topic._pending)
+        self.assertTrue('creator' in self.topic._pending)
+
+    def test_converted_on_access(self):
+        posts = self.topic.curatedPosts
+        self.assertEqual(len(posts), 3)
+        self.assertTrue(isinstance(posts[0], Post))
+        self.assertEqual(posts[0].source.name, 'Source 0')
+        self.assertTrue(self.topic.curatedPosts is posts)
+        self.assertEqual(self.topic.curablePosts, [])
+        self.assertRaises(AttributeError, getattr, self.topic, 'missing')
+
+
+    def test_identity_map_released(self):
+        self.api.request = lambda url, params, method='GET', headers=None: {
+            'success': True, 'topic': make_topic(1, curated=3), 'stats': {},
+        }
+        topic = self.api.topic(1, order='user')
+        posts = topic.curatedPosts
+        kept, other = posts[0], weakref.ref(posts[1])
+        # posts[0] still has nested data to convert
+        self.assertTrue(kept._identity is not None)
+        del topic, posts
+        gc.collect()
+        self.assertTrue(other() is None)
+        for name in list(kept._pending):
+            getattr(kept, name)
+        self.assertTrue(kept._identity is None)
+
+
+class CompactDatatypesTest(TestCase):
+
+    def test_slots(self):
+        post = Post(None, make_post(1))
+        self.assertFalse(hasattr(post, '__dict__'))
+        self.assertEqual(post.title, 'Post 1')
+        self.assertEqual(post.raw['id'], 1)
+
+    def test_unknown_keys(self):
+        data = make_post(1)
+        data['someNewKey'] = 42
+        post = Post(None, data)
+        self.assertEqual(post.someNewKey, 42)
+        self.assertEqual(post._extra, {'someNewKey': 42})
+        self.assertRaises(AttributeError, getattr, post, 'missing')
+
+    def test_drop_raw(self):
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, keep_raw=False)
+        topic = Topic(api, make_topic(1, curated=2))
+        self.assertEqual(topic.raw, None)
+        self.assertEqual(topic.curatedPosts[0].raw, None)
+        self.assertEqual(topic.curatedPosts[0].source.name, 'Source 0')
+
+
+class IdentityMapTest(TestCase):
+
+    def setUp(self):
+        self.response = {'success': True, 'topic': make_topic(1, curated=12),
+                         'stats': {'creatorName': 'User 1'}}
+
+    def mockedRequest(self, url, params, method='GET', headers=None):
+        return self.response
+
+    def test_response_scope(self):
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        api.request = self.mockedRequest
+        topic = api.topic(1, order='user')
+        posts = topic.curatedPosts
+        self.assertTrue(posts[0].source is posts[10].source)
+        self.assertFalse(posts[0].source is posts[1].source)
+        self.assertTrue(posts[0].comments[1].author is posts[1].comments[0].author)
+        self.assertEqual(topic.stats.creatorName, 'User 1')
+
+    def test_stub_first(self):
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        first, second = make_post(1), make_post(2)
+        first['topic'] = {'id': 1}
+        second['topic'] = make_topic(1, curated=0)
+        api.request = lambda url, params, method='GET', headers=None: {
+            'success': True, 'posts': [first, second],
+        }
+        posts = api.compilation(Timestamp(0), 2)
+        self.assertTrue(posts[0].topic is posts[1].topic)
+        self.assertEqual(posts[0].topic.name, 'Topic 1')
+        self.assertEqual(posts[0].topic.creator.name, 'User 1')
+        self.assertEqual(posts[0].topic.raw['shortName'], 'topic-1')
+
+    def test_api_scope(self):
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, identity_map='api')
+        api.request = self.mockedRequest
+        first = api.topic(1, order='user')
+        self.response['topic']['name'] = 'Renamed'
+        second = api.topic(1, order='user')
+        self.assertTrue(first is second)
+        self.assertEqual(first.name, 'Renamed')
+
+    def test_disabled(self):
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, identity_map=None)
+        api.request = self.mockedRequest
+        posts = api.topic(1, order='user').curatedPosts
+        self.assertFalse(posts[0].source is posts[10].source)
+
+
+class SerializationTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.api.request = lambda url, params, method='GET', headers=None: {
+            'success': True, 'topic': make_topic(1, curated=12),
+            'stats': {'creatorName': 'User 1'},
+        }
+        self.topic = self.api.topic(1, order='user')
+
+    def test_round_trip(self):
+        data = serialize(self.topic)
+        topic = deserialize(data, self.api)
+        self.assertTrue(topic.api is self.api)
+        self.assertEqual(topic.raw, None)
+        self.assertEqual(topic.name, 'Topic 1')
+        self.assertEqual(topic.stats.creatorName, 'User 1')
+        posts = topic.curatedPosts
+        self.assertEqual([p.id for p in posts], [p.id for p in self.topic.curatedPosts])
+        self.assertTrue(posts[0].source is posts[10].source)
+        self.assertEqual(posts[3].curationDate.value,
+                         self.topic.curatedPosts[3].curationDate.value)
+        self.assertEqual(posts[0].tags, ['tag0', 'tag1'])
+        # smaller than the data the topic was built from
+        self.assertTrue(len(data) < len(json.dumps(self.topic.raw)))
+
+    def test_lazy_and_extra(self):
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, lazy=True)
+        data = make_post(1)
+        data['someNewKey'] = [1, 2]
+        post = deserialize(serialize(Post(api, data)))
+        self.assertEqual(post.api, None)
+        self.assertEqual(post.someNewKey, [1, 2])
+        self.assertEqual(post.source.name, 'Source 1')
+        attach([post], api)
+        self.assertTrue(post.api is api)
+        self.assertTrue(post.comments[0].author.api is api)
+
+    def test_pickle(self):
+        for protocol in (0, pickle.HIGHEST_PROTOCOL):
+            posts = pickle.loads(pickle.dumps(self.topic.curatedPosts, protocol))
+            self.assertEqual(posts[1].title, 'Post 100001')
+            self.assertEqual(posts[1].api, None)
+            self.assertEqual(posts[1].publicationDate.value,
+                             self.topic.curatedPosts[1].publicationDate.value)
+        timestamp = pickle.loads(pickle.dumps(Timestamp(42)))
+        self.assertEqual(timestamp.value, 42)
+
+    def test_invalid(self):
+        self.assertRaises(SerializationError, deserialize, 'not serialized')
+        data = serialize(self.topic)
+        self.assertRaises(SerializationError, deserialize, data[:4] + '\x63' + data[5:])
+        for size in (4, 5, len(data) // 2, len(data) - 1):
+            self.assertRaises(SerializationError, deserialize, data[:size])
+        # version 1 data has no size
+        self.assertEqual(deserialize(data[:4] + '\x01' + data[9:]).name, 'Topic 1')
+
+    def test_copy(self):
+        topic = copy.copy(self.topic)
+        self.assertTrue(topic.api is self.api)
+        self.assertTrue(topic.raw is self.topic.raw)
+        self.assertTrue(topic.curatedPosts is self.topic.curatedPosts)
+        topic = copy.deepcopy(self.topic)
+        self.assertTrue(topic.api is self.api)
+        self.assertEqual(topic.raw, self.topic.raw)
+        self.assertFalse(topic.raw is self.topic.raw)
+        posts = topic.curatedPosts
+        self.assertFalse(posts[0] is self.topic.curatedPosts[0])
+        self.assertEqual(posts[0].title, self.topic.curatedPosts[0].title)
+        self.assertTrue(posts[0].source is posts[10].source)
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.data = make_topic(1, curated=6)
+        self.topic = Topic(None, self.data)
+
+    def test_diff(self):
+        before = Snapshot.of(self.topic)
+        posts = self.data['curatedPosts']
+        posts[1]['title'] = 'Edited'
+        posts[2]['pageViews'] = 1000
+        posts[3], posts[4] = posts[4], posts[3]
+        del posts[0]
+        posts.append(make_post(7))
+        delta = before.diff(Snapshot.of(Topic(None, self.data)))
+        self.assertEqual(delta.added, [7])
+        self.assertEqual(delta.removed, [100000])
+        self.assertEqual(delta.modified, [100001])
+        self.assertEqual(delta.reordered, [100004])
+        self.assertEqual([p.id for p in delta.select(Topic(None, self.data).curatedPosts)],
+                         [100001, 7])
+
+    def test_moved_to_front(self):
+        before = Snapshot.of(self.topic)
+        posts = self.data['curatedPosts']
+        posts.insert(0, posts.pop(4))
+        delta = before.diff(Snapshot.of(Topic(None, self.data)))
+        self.assertEqual(delta.reordered, [100004])
+        self.assertEqual(delta.added + delta.removed + delta.modified, [])
+        # reversed, all but one moved
+        data = make_topic(1, curated=6)
+        data['curatedPosts'].reverse()
+        delta = before.diff(Snapshot.of(Topic(None, data)))
+        self.assertEqual(len(delta.reordered), 5)
+
+    def test_nested_entities(self):
+        # sources are compared by ID, whatever data they carry
+        post = make_post(1)
+        before = fingerprint(Post(None, post))
+        post['source']['name'] = 'Renamed'
+        self.assertEqual(fingerprint(Post(None, post)), before)
+        post['source'] = make_source(5)
+        self.assertNotEqual(fingerprint(Post(None, post)), before)
+
+    def test_unchanged(self):
+        same = diff(self.topic, Topic(None, make_topic(1, curated=6)))
+        self.assertFalse(same)
+        self.assertEqual(str(same), '<Delta(added=0, removed=0, modified=0, reordered=0)>')
+        snapshot = pickle.loads(pickle.dumps(Snapshot(self.topic.curatedPosts)))
+        self.assertFalse(diff(snapshot, self.topic.curatedPosts))
+        self.assertTrue(100002 in snapshot)
+        self.assertRaises(ValueError, diff, snapshot, Snapshot([], ('title',)))
+
+
+class ResponseCacheTest(TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(ttl=60)
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, cache=self.cache)
+        self.api.oauth.request = self.mockedRequest
+        self.sent = []
+
+    def mockedRequest(self, url, params, method='GET', headers=None):
+        self.sent.append(headers)
+        if headers and headers.get('If-None-Match') == '"v1"':
+            return Response(304, 'Not Modified', {}), ''
+        return Response(200, 'OK', {'etag': '"v1"'}), '{"success": true, "id": 1}'
+
+    def test_fresh_hit(self):
+        first = self.api.request(POST_URL, {'id': 1, 'a': 2})
+        second = self.api.request(POST_URL, {'a': 2, 'id': 1})
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_revalidation(self):
+        self.cache.ttl = 0
+        self.api.request(POST_URL, {'id': 1})
+        data = self.api.request(POST_URL, {'id': 1})
+        self.assertEqual(data['id'], 1)
+        self.assertEqual(self.sent[1], {'If-None-Match': '"v1"'})
+        self.assertEqual(self.cache.stats()['revalidations'], 1)
+
+    def test_token_scoped(self):
+        other = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, cache=self.cache)
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        other.oauth.token = oauth2.Token('OTHER_TOKEN', 'OTHER_SECRET')
+        other.oauth.request = lambda url, params, method='GET', headers=None: (
+            Response(200, 'OK', {}), '{"success": true, "id": 2}'
+        )
+        self.assertEqual(self.api.request(POST_URL, {})['id'], 1)
+        self.assertEqual(other.request(POST_URL, {})['id'], 2)
+        self.assertEqual(self.api.request(POST_URL, {})['id'], 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertFalse(OAUTH_TOKEN in self.api.request_key(POST_URL, {}))
+
+    def test_lru_eviction(self):
+        backend = MemoryCache(max_entries=2)
+        for key in ('a', 'b', 'a', 'c'):
+            backend.set(key, CacheEntry(key))
+        self.assertEqual(backend.get('b'), None)
+        self.assertEqual(backend.get('a').content, 'a')
+        self.assertEqual(backend.evictions, 1)
+
+    def test_disk_backend(self):
+        directory = mkdtemp()
+        try:
+            backend = DiskCache(directory)
+            backend.set('key', CacheEntry('content', etag='"v1"'))
+            entry = DiskCache(directory).get('key')
+            self.assertEqual((entry.content, entry.etag), ('content', '"v1"'))
+        finally:
+            shutil.rmtree(directory)
+
+
+class BulkFetchTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.api.post = self.mockedPost
+
+    def mockedPost(self, post_id):
+        time.sleep(0.001 * (10 - post_id))
+        if post_id == 3:
+            raise ScoopItError('404 Not Found: no such post')
+        return post_id * 10
+
+    def test_ordered(self):
+        results = list(self.api.posts_many(range(10), ordered=True))
+        self.assertEqual([r.key for r in results], range(10))
+        self.assertEqual(results[4].value, 40)
+
+    def test_errors(self):
+        results = dict((r.key, r) for r in self.api.posts_many(range(10)))
+        self.assertEqual(len(results), 10)
+        self.assertFalse(results[3].ok)
+        self.assertTrue(isinstance(results[3].error, ScoopItError))
+        self.assertTrue(results[4].ok)
+
+
+class ResolverCacheTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.api.oauth.request = self.mockedRequest
+        self.requested = []
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def mockedRequest(self, url, params, method='GET', headers=None):
+        self.requested.append(params['shortName'])
+        if params['shortName'] == 'missing':
+            return {'status': '404'}, '{"success": false, "error": "unknown"}'
+        return {'status': '200'}, '{"success": true, "id": %d}' % (
+            len(params['shortName'])
+        )
+
+    def test_case_insensitive(self):
+        self.assertEqual(self.api.resolve('Topic', 'Python'), 6)
+        self.assertEqual(self.api.resolve('topic', 'python'), 6)
+        self.assertEqual(self.requested, ['Python'])
+        self.api.resolve('User', 'python')
+        self.assertEqual(len(self.requested), 2)
+
+    def test_resolve_many(self):
+        self.api.resolve('topic', 'cached')
+        results = self.api.resolve_many(
+            'topic', ['cached', 'ab', 'AB', 'abc', 'missing', 'ab']
+        )
+        self.assertEqual(sorted(self.requested), ['ab', 'abc', 'cached', 'missing'])
+        self.assertEqual(results['AB'].value, 2)
+        self.assertEqual(results['cached'].value, 6)
+        self.assertFalse(results['missing'].ok)
+
+    def test_persistence(self):
+        filepath = self.tmpdir + '/resolver'
+        self.api.resolve('topic', 'python')
+        self.api.resolver_cache.save(filepath)
+        cache = ResolverCache(filepath)
+        self.assertEqual(cache.get('Topic', 'PYTHON'), 6)
+
+
+class PagingTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.api.oauth.request = self.mockedRequest
+        self.requests = 0
+        self.newest_first = False
+        # two posts per date, pages boundaries fall between them
+        self.posts = [make_post(i) for i in range(25)]
+        for post in self.posts:
+            post['curationDate'] = 1000 + post['id'] // 2
+
+    def mockedRequest(self, url, params, method='GET', headers=None):
+        self.requests += 1
+        posts = [p for p in self.posts if p['curationDate'] >= params['since']]
+        if self.newest_first:
+            posts.reverse()
+        posts = posts[:params['count']]
+        return {'status': '200'}, json.dumps({'success': True, 'posts': posts})
+
+    def test_iter_compilation(self):
+        posts = list(self.api.iter_compilation(Timestamp(1000), page_size=5))
+        self.assertEqual([p.id for p in posts], range(25))
+        self.assertEqual(self.requests, 7)
+
+    def test_without_prefetch(self):
+        pages = self.api.iter_compilation(Timestamp(1003), page_size=4,
+                                          prefetch=False)
+        self.assertEqual(pages.next().id, 6)
+        self.assertEqual(self.requests, 1)
+        self.assertEqual([p.id for p in pages], range(7, 25))
+
+    def test_newest_first(self):
+        self.newest_first = True
+        posts = list(self.api.iter_compilation(Timestamp(1000), page_size=5))
+        self.assertEqual(sorted(p.id for p in posts), range(25))
+        # 5, 10, 20 then 40 posts requested
+        self.assertEqual(self.requests, 4)
+
+    def test_crowded_date(self):
+        for post in self.posts[5:12]:
+            post['curationDate'] = 1005
+        pages = self.api.iter_compilation(Timestamp(1000), page_size=5)
+        self.assertEqual([pages.next().id for i in range(5)], range(5))
+        self.assertRaises(ScoopItError, list, pages)
+        # enough room for the posts of that date
+        posts = list(self.api.iter_compilation(Timestamp(1000), page_size=8))
+        self.assertEqual([p.id for p in posts], range(25))
+
+
+class NotificationStreamTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.api.oauth.request = self.mockedRequest
+        self.notifications = []
+        self.since = []
+        self.tmpdir = mkdtemp()
+        self.state_file = self.tmpdir + '/state'
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def mockedRequest(self, url, params, method='GET', headers=None):
+        self.since.append(params.get('since'))
+        notifications = [n for n in self.notifications
+                         if n['date'] >= params.get('since', 0)]
+        return {'status': '200'}, json.dumps({
+            'success': True, 'notifications': notifications
+        })
+
+    def notify(self, date, post_id):
+        self.notifications.append({
+            'type': 'thanks', 'date': date, 'post': {'id': post_id},
+        })
+
+    def test_dedupe(self):
+        stream = NotificationStream(self.api, min_interval=1, max_interval=8)
+        self.notify(100, 1)
+        self.notify(100, 2)
+        self.assertEqual(len(stream.poll()), 2)
+        self.notify(100, 3)
+        self.assertEqual([n.post['id'] for n in stream.poll()], [3])
+        self.assertEqual(self.since, [None, 100])
+
+    def test_interval(self):
+        stream = NotificationStream(self.api, min_interval=1, max_interval=8)
+        for i in range(5):
+            stream.poll()
+        self.assertEqual(stream.interval, 8)
+        self.notify(100, 1)
+        stream.poll()
+        self.assertEqual(stream.interval, 4)
+
+    def test_resume(self):
+        stream = NotificationStream(self.api, self.state_file)
+        self.notify(100, 1)
+        stream.poll()
+        stream = NotificationStream(self.api, self.state_file)
+        self.assertEqual(stream.watermark, 100)
+        self.assertEqual(stream.poll(), [])
+
+
+class RateLimiterTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_burst(self):
+        limiter = RateLimiter(10, burst=3)
+        delays = [limiter.reserve() for i in range(5)]
+        self.assertEqual(delays[:3], [0, 0, 0])
+        self.assertAlmostEqual(delays[3], 0.1, places=2)
+        self.assertAlmostEqual(delays[4], 0.2, places=2)
+        self.assertEqual(limiter.stats()['delayed'], 2)
+
+    def test_shared_file(self):
+        filepath = self.tmpdir + '/bucket'
+        first = RateLimiter(10, burst=2, backend=FileBucket(filepath))
+        second = RateLimiter(10, burst=2, backend=FileBucket(filepath))
+        self.assertEqual(first.reserve(), 0)
+        self.assertEqual(second.reserve(), 0)
+        self.assertTrue(first.reserve() > 0)
+
+    def test_file_locks_unavailable(self):
+        fcntl, ratelimit.fcntl = ratelimit.fcntl, None
+        try:
+            self.assertRaises(ScoopItError, FileBucket, self.tmpdir + '/bucket')
+        finally:
+            ratelimit.fcntl = fcntl
+
+    def test_unknown_status(self):
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        api.oauth.request = lambda url, params, method, headers=None: (
+            {'status': '429'}, '{"success": false, "error": "slow down"}'
+        )
+        self.assertRaises(ScoopItError, api.resolve, 'topic', 'python')
+
+
+class RetryTest(TestCase):
+
+    def setUp(self):
+        self.retried = []
+        self.policy = RetryPolicy(
+            attempts=3, backoff=0.001, on_retry=self.onRetry,
+            breaker=CircuitBreaker(threshold=3, reset_timeout=60)
+        )
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, retry=self.policy)
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        self.api.oauth.transport.request = self.mockedRequest
+        self.statuses = []
+        self.sent = []
+
+    def onRetry(self, url, attempt, delay, status, exception):
+        self.retried.append((attempt, status and status['status'], exception))
+
+    def mockedRequest(self, url, method='GET', body='', headers=None):
+        self.sent.append(url)
+        status = self.statuses.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        if status != 200:
+            return Response(status, 'Error', {}), '{"success": false, "error": "down"}'
+        return Response(status, 'OK', {}), '{"success": true, "id": 1}'
+
+    def test_retried(self):
+        self.statuses = [503, socket.error('reset'), 200]
+        self.assertEqual(self.api.resolve('topic', 'python'), 1)
+        self.assertEqual([r[0] for r in self.retried], [1, 2])
+        self.assertEqual(self.retried[0][1], '503')
+        self.assertTrue(isinstance(self.retried[1][2], socket.error))
+        # every attempt is signed with a new nonce
+        nonces = [re.search('oauth_nonce=(\\d+)', url).group(1) for url in self.sent]
+        self.assertEqual(len(set(nonces)), 3)
+
+    def test_exhausted(self):
+        self.statuses = [503, 503, 503]
+        self.assertRaises(ScoopItError, self.api.resolve, 'topic', 'python')
+        self.assertEqual(len(self.sent), 3)
+
+    def test_circuit_breaker(self):
+        self.statuses = [500, 500, 500]
+        self.assertRaises(ScoopItError, self.api.resolve, 'topic', 'python')
+        self.assertRaises(CircuitOpenError, self.api.resolve, 'topic', 'java')
+        self.assertEqual(len(self.sent), 3)
+
+    def test_retry_after(self):
+        self.assertEqual(self.policy.retry_after({'retry-after': '2'}), 2)
+        self.assertTrue(self.policy.delay(1, {'retry-after': '2'}) >= 2)
+
+
+class SingleFlightTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, single_flight=True)
+        self.api.oauth.request = self.mockedRequest
+        self.requests = 0
+        self.release = threading.Event()
+
+    def mockedRequest(self, url, params, method='GET', headers=None):
+        self.requests += 1
+        self.release.wait()
+        return {'status': '200'}, '{"success": true, "id": %d}' % self.requests
+
+    def test_shared(self):
+        pool = ThreadPool(5)
+        futures = [pool.submit(self.api.request, TOPIC_URL, {'id': 1, 'curated': 3})
+                   for i in range(5)]
+        while self.api.flights.shared < 4:
+            time.sleep(0.001)
+        self.release.set()
+        self.assertEqual([f.result()['id'] for f in futures], [1] * 5)
+        self.assertEqual(self.requests, 1)
+        # the next call is a new flight
+        self.assertEqual(self.api.request(TOPIC_URL, {'curated': 3, 'id': 1})['id'], 2)
+        pool.shutdown()
+
+
+class DecodersTest(TestCase):
+
+    def test_available(self):
+        self.assertTrue('json' in available_decoders())
+        loads = get_decoder()
+        self.assertEqual(loads(b'{"id": 1, "name": "caf\xc3\xa9"}'),
+                         {'id': 1, 'name': u'caf\xe9'})
+        self.assertRaises(DecoderError, get_decoder, 'yaml')
+
+    def test_custom_decoder(self):
+        decoded = []
+        def decoder(data):
+            decoded.append(data)
+            return {'success': True, 'id': 1}
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, json_decoder=decoder)
+        api.oauth.request = lambda url, params, method, headers=None: (
+            {'status': '200'}, b'raw body'
+        )
+        self.assertEqual(api.resolve('topic', 'python'), 1)
+        self.assertEqual(decoded, [b'raw body'])
+
+
+class StreamingTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer()
+        self.server.start()
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+
+    def tearDown(self):
+        self.api.oauth.transport.close()
+        self.server.stop()
+
+    def test_small_chunks(self):
+        document = json.dumps({
+            'success': True,
+            'stats': {'posts': [0]},
+            'topic': {'name': 'a "[quoted]" name', 'tags': [],
+                      'curatedPosts': [{'id': 1}, {'id': 22, 'tags': ['x]']}, 333]},
+        })
+        chunks = [document[i:i + 3] for i in range(0, len(document), 3)]
+        items = list(iter_json_array(chunks, ('topic', 'curatedPosts')))
+        self.assertEqual(items, [{'id': 1}, {'id': 22, 'tags': ['x]']}, 333])
+        self.assertEqual(list(iter_json_array(chunks, ('posts',))), [])
+        self.assertRaises(StreamError, list,
+                          iter_json_array([document[:document.index('333')]],
+                                          ('topic', 'curatedPosts')))
+
+    def test_stream_posts(self):
+        url = self.server.base_url + '/api/1/compilation'
+        posts = self.api.stream(url, {'count': 500}, ('posts',), Post)
+        first = next(posts)
+        self.assertTrue(isinstance(first, Post))
+        self.assertEqual([first.id] + [p.id for p in posts], range(500))
+        pool = self.api.oauth.transport.pools.values()[0]
+        self.assertEqual(len(pool.idle), 1)
+
+    def test_error(self):
+        url = self.server.base_url + '/api/1/unknown'
+        self.assertRaises(ScoopItError, list,
+                          self.api.stream(url, {}, ('posts',), Post))
+
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.posts = [Post(self.api, make_post(i)) for i in range(25)]
+        self.posts[0].title = u'caf\xe9'
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_schema(self):
+        columns = dict(flat_schema(Post))
+        self.assertEqual(columns['source.name'], ('source', 'name'))
+        self.assertEqual(columns['curationDate'], ('curationDate',))
+        self.assertTrue('topic.name' in columns)
+        self.assertFalse('comments' in columns)
+        self.assertFalse('topic.creator.name' in columns)
+
+    def test_ndjson(self):
+        filepath = self.tmpdir + '/posts.ndjson.gz'
+        self.assertEqual(export(iter(self.posts), filepath), 25)
+        with closing(gzip.open(filepath)) as infile:
+            rows = [json.loads(line) for line in infile]
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[0]['title'], u'caf\xe9')
+        self.assertEqual(rows[3]['source.name'], self.posts[3].source.name)
+        self.assertEqual(rows[3]['curationDate'], self.posts[3].curationDate.value)
+
+    def test_csv(self):
+        filepath = self.tmpdir + '/posts.csv'
+        export(self.posts, filepath)
+        with open(filepath, 'rb') as infile:
+            rows = list(csv.DictReader(infile))
+        self.assertEqual(rows[0]['title'].decode('utf-8'), u'caf\xe9')
+        self.assertEqual(json.loads(rows[1]['tags']), self.posts[1].tags)
+
+    def test_columnar(self):
+        filepath = self.tmpdir + '/posts.columnar'
+        outfile = open(filepath, 'wb')
+        writer = ColumnarWriter(outfile, flat_schema(Post), chunk_size=10)
+        writer.write_many(self.posts)
+        writer.close()
+        outfile.close()
+        with open(filepath, 'rb') as infile:
+            rows = list(read_columnar(infile))
+        self.assertEqual([r['id'] for r in rows], range(25))
+        self.assertEqual(rows[7]['source.id'], 7)
+        self.assertEqual(rows[7]['tags'], self.posts[7].tags)
+        # the header is plain JSON
+        with open(filepath, 'rb') as infile:
+            self.assertEqual(infile.read(5), 'SCPC\x02')
+            size, = struct.unpack('!I', infile.read(4))
+            self.assertEqual(json.loads(infile.read(size)), writer.columns)
+
+
+class MirrorTest(TestCase):
+
+    def setUp(self):
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        self.api.oauth.request = self.mockedRequest
+        self.mirror = Mirror(self.api)
+        self.topic = make_topic(1, curated=0)
+        self.posts = [make_post(i) for i in range(12)]
+        self.since = []
+
+    def mockedRequest(self, url, params, method='GET', headers=None):
+        self.since.append(params['since'])
+        posts = [p for p in self.posts if p['curationDate'] >= params['since']]
+        topic = dict(self.topic, curatedPosts=posts[:params['curated']])
+        return {'status': '200'}, json.dumps({
+            'success': True, 'topic': topic, 'stats': {},
+        })
+
+    def test_sync(self):
+        self.assertEqual(self.mirror.sync_topic(1, page_size=5), 12)
+        self.assertEqual(self.since[0], 0)
+        self.assertEqual(self.mirror.watermark(1).value, self.posts[-1]['curationDate'])
+        self.assertEqual(self.mirror.topic(1).name, 'Topic 1')
+        self.posts.append(make_post(12))
+        self.assertEqual(self.mirror.sync_topic(1, page_size=5), 2)
+        self.assertEqual(self.since[-1], self.posts[-2]['curationDate'])
+        self.assertEqual(len(self.mirror.posts(topic_id=1)), 13)
+
+    def test_sync_without_raw(self):
+        # posts refer to their topic, which lists them
+        self.api.keep_raw = False
+        for post in self.posts:
+            post['topic'] = {'id': 1}
+        self.assertEqual(self.mirror.sync_topic(1, page_size=5), 12)
+        post = self.mirror.post(3)
+        self.assertEqual(post.title, 'Post 3')
+        self.assertEqual(post.topic.id, 1)
+        self.assertEqual(self.mirror.topic(1).name, 'Topic 1')
+
+    def test_queries(self):
+        self.mirror.store_posts([Post(self.api, p) for p in self.posts])
+        posts = self.mirror.posts(tag='tag1', since=Timestamp(self.posts[3]['curationDate']))
+        self.assertEqual([p.id for p in posts], [11, 10, 7, 6, 4])
+        self.assertEqual(self.mirror.posts(topic_id=1, limit=1)[0].id, 11)
+        self.assertEqual(self.mirror.tags()['tag0'], 6)
+        comments = self.mirror.comments(3)
+        self.assertEqual([c.text for c in comments], ['Comment 0 on post 3', 'Comment 1 on post 3'])
+        self.assertEqual(comments[1].author.id, 1004)
+        self.assertEqual(self.mirror.post(3).source.name, 'Source 3')
+
+
+class SigningTest(TestCase):
+
+    def setUp(self):
+        self.consumer = oauth2.Consumer(CONSUMER_KEY, 'consumer secret~/+')
+        self.token = oauth2.Token(OAUTH_TOKEN, 'token&secret')
+        self.signer = Signer(self.consumer, self.token)
+
+    def reference(self, url, params, method):
+        """
+        Sign a request with oauth2, using the nonce and timestamp the
+        signer picked.
+        """
+        signed_url, body, headers = self.signer.sign(url, params, method)
+        if method == 'GET':
+            sent = dict(parse_qsl(urlsplit(signed_url).query))
+            query = urlencode([(k, unicode(v).encode('utf-8')) for k, v in params.items()
+                               if not isinstance(v, list)] +
+                              [(k, i) for k, v in params.items() if isinstance(v, list) for i in v])
+            url += ('?' in url and '&' or '?') + query
+        else:
+            sent = dict(parse_qsl(body))
+        request = oauth2.Request.from_consumer_and_token(
+            self.consumer, token=self.token, http_method=method, http_url=url,
+            parameters=(method == 'POST') and params or None,
+            is_form_encoded=(method == 'POST'),
+        )
+        request['oauth_nonce'] = sent['oauth_nonce']
+        request['oauth_timestamp'] = sent['oauth_timestamp']
+        request.sign_request(oauth2.SignatureMethod_HMAC_SHA1(), self.consumer, self.token)
+        expected = dict((k, unicode(v).encode('utf-8')) for k, v in request.items())
+        return sent, expected
+
+    def test_matches_oauth2(self):
+        params = {'id': 42, 'tag': u'caf\xe9 & th\xe9', 'q': 'a b+c/~d*',
+                  'postId': ['3', '1', '2']}
+        for url in ('http://www.scoop.it/api/1/topic',
+                    'http://www.scoop.it:80/api/1/topic?curated=10&tag=',
+                    'https://www.scoop.it/api/1/post'):
+            for method in ('GET', 'POST'):
+                sent, expected = self.reference(url, params, method)
+                self.assertEqual(sent['oauth_signature'], expected['oauth_signature'])
+                for key, value in expected.items():
+                    if key.startswith('oauth_'):
+                        self.assertEqual(sent[key], value)
+
+    def test_batch(self):
+        requests = [('http://www.scoop.it/api/1/post', {'id': i}, 'GET') for i in range(5)]
+        signed = self.signer.sign_many(requests)
+        sent = [dict(parse_qsl(urlsplit(url).query)) for url, body, headers in signed]
+        self.assertEqual([p['id'] for p in sent], ['0', '1', '2', '3', '4'])
+        self.assertEqual(len(set(p['oauth_nonce'] for p in sent)), 5)
+        self.assertEqual(len(set(p['oauth_timestamp'] for p in sent)), 1)
+        self.assertEqual(len(set(p['oauth_signature'] for p in sent)), 5)
+
+    def test_oauth_signer(self):
+        oauth = OAuth(CONSUMER_KEY, CONSUMER_SECRET)
+        self.assertRaises(OAuthTokenError, oauth.prepare_many, [])
+        oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        signer = oauth.signer
+        url, body, headers = oauth.prepare(POST_URL, {'id': 1}, 'post')
+        self.assertTrue(oauth.signer is signer)
+        self.assertEqual(headers['Content-Type'], 'application/x-www-form-urlencoded')
+        self.assertTrue('id=1&oauth_' in body)
+        oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        self.assertFalse(oauth.signer is signer)
+
+
+class TransportTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer()
+        self.server.start()
+        self.url = self.server.base_url + '/api/1/post?id=1'
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_connection_reused(self):
+        transport = PooledTransport()
+        for i in range(5):
+            response, content = transport.request(self.url)
+            self.assertEqual(response['status'], '200')
+        pool = transport.pools.values()[0]
+        self.assertEqual(pool.created, 1)
+        transport.close()
+
+    def test_max_requests(self):
+        transport = PooledTransport(max_requests=2)
+        for i in range(5):
+            transport.request(self.url)
+        pool = transport.pools.values()[0]
+        self.assertEqual(pool.created, 3)
+        transport.close()
+
+    def break_idle_connection(self, transport):
+        # the request reaches the server, reading the response fails
+        pooled = transport.pools.values()[0].idle[0]
+        connection = pooled.connection
+        def getresponse():
+            connection.getresponse = connection.__class__.getresponse.__get__(connection)
+            raise httplib.BadStatusLine('')
+        connection.getresponse = getresponse
+
+    def test_resend_idempotent(self):
+        transport = PooledTransport()
+        transport.request(self.url)
+        self.break_idle_connection(transport)
+        response, content = transport.request(self.url)
+        self.assertEqual(response['status'], '200')
+        self.assertEqual(self.server.requests['/api/1/post'], 3)
+        transport.close()
+
+    def test_no_post_resend(self):
+        transport = PooledTransport()
+        transport.request(self.url)
+        self.break_idle_connection(transport)
+        body = urlencode({'action': 'thank', 'id': 1})
+        self.assertRaises(TransportError, transport.request,
+                          self.server.base_url + '/api/1/post', 'POST', body,
+                          {'Content-Type': 'application/x-www-form-urlencoded'})
+        deadline = time.time() + 5
+        while (not self.server.actions) and (time.time() < deadline):
+            time.sleep(0.01)
+        time.sleep(0.1)
+        self.assertEqual(len(self.server.actions), 1)
+        transport.close()
+
+    def test_signed_request(self):
+        oauth = OAuth(CONSUMER_KEY, CONSUMER_SECRET)
+        oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        url, body, headers = oauth.sign(self.url)
+        self.assertTrue('oauth_signature=' in url)
+        self.assertTrue('oauth_token=' + OAUTH_TOKEN in url)
+        response, content = oauth.request(self.url, {})
+        self.assertEqual(response['status'], '200')
+        oauth.transport.close()
+
+
+class MockServerTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer(posts=5, error_rate=0.5, retry_after=0, seed=1)
+        self.server.start()
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET,
+                              base_url=self.server.base_url,
+                              retry=RetryPolicy(attempts=20, backoff=0.001))
+
+    def tearDown(self):
+        self.api.oauth.transport.close()
+        self.server.stop()
+
+    def test_oauth_flow(self):
+        self.server.error_rate = 0
+        self.api.get_oauth_request_token()
+        self.assertEqual(self.api.oauth.token.key, 'request-token')
+        url = self.api.get_oauth_access_token_url('http://localhost/callback')
+        self.assertTrue(url.startswith(self.server.base_url + '/oauth/authorize?'))
+        self.api.get_oauth_access_token('verifier')
+        self.assertEqual(self.api.oauth.token.key, 'access-token')
+
+    def test_api_with_errors(self):
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        topic = self.api.topic(1, order='curationDate')
+        self.assertEqual(len(topic.curatedPosts), 5)
+        self.assertEqual(self.api.post(7).id, 7)
+        self.assertEqual(len(self.api.compilation(Timestamp(0), 3)), 3)
+        self.assertTrue(self.api.retry.retries > 0)
+        self.assertTrue(sum(self.server.requests.values()) > 3)
+
+
+class WritePipelineTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer(latency=0.05)
+        self.server.start()
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET,
+                              base_url=self.server.base_url, write_workers=2)
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+
+    def tearDown(self):
+        self.api.writes.close()
+        self.api.oauth.transport.close()
+        self.server.stop()
+
+    def test_actions(self):
+        futures = [self.api.post_accept(i, title='Post %d' % i) for i in range(4)]
+        futures.append(self.api.topic_reorder(1, [3, 1, 2], 5))
+        futures.append(Post(self.api, {'id': 9}).edit(tags=['a', 'b']))
+        self.assertTrue(self.api.writes.join(5))
+        self.assertEqual([f.result()['id'] for f in futures], [0, 1, 2, 3, 1, 9])
+        actions = dict(((path, params['id']), params) for path, params in self.server.actions)
+        self.assertEqual(actions['/api/1/post', '2']['title'], 'Post 2')
+        self.assertEqual(actions['/api/1/topic', '1']['postId'], ['3', '1', '2'])
+        self.assertEqual(actions['/api/1/post', '9']['tag'], ['a', 'b'])
+        self.assertEqual(self.api.writes.sent, 6)
+
+    def test_collapse(self):
+        first = self.api.post_pin(1)
+        while not self.server.requests:
+            time.sleep(0.001)
+        # queued while the pin is being sent
+        edits = [self.api.post_edit(1, title='Title %d' % i) for i in range(3)]
+        pin = self.api.post_pin(1)
+        delete = self.api.post_delete(1)
+        self.assertEqual(delete.result(5)['action'], 'delete')
+        for future in edits + [pin]:
+            self.assertEqual(future.result(), delete.result())
+        self.assertEqual(first.result()['action'], 'pin')
+        self.assertEqual([p['action'] for path, p in self.server.actions], ['pin', 'delete'])
+        self.assertEqual(self.api.writes.collapsed, 4)
+
+    def test_merged_edits(self):
+        first = self.api.post_pin(1)
+        while not self.server.requests:
+            time.sleep(0.001)
+        title = self.api.post_edit(1, title='Title')
+        tags = self.api.post_edit(1, tags=['a', 'b'])
+        self.assertEqual(tags.result(5), title.result(5))
+        self.assertEqual(first.result()['action'], 'pin')
+        edits = [p for path, p in self.server.actions if p['action'] == 'edit']
+        self.assertEqual(len(edits), 1)
+        self.assertEqual(edits[0]['title'], 'Title')
+        self.assertEqual(edits[0]['tag'], ['a', 'b'])
+        self.assertEqual(self.api.writes.collapsed, 1)
+
+    def test_ordered_per_target(self):
+        self.server.latency = 0
+        for i in range(20):
+            self.api.post_rescoop(i % 2, i)
+        self.api.writes.join()
+        for post_id in ('0', '1'):
+            topics = [int(p['destTopicId']) for path, p in self.server.actions
+                      if p['id'] == post_id]
+            self.assertEqual(topics, sorted(topics))
+
+    def test_error(self):
+        self.server.error_rate = 1
+        future = self.api.post_thank(1)
+        self.assertRaises(ScoopItError, future.result, 5)
+
+
+class CurationQueueTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer(curable=25)
+        self.server.start()
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET,
+                              base_url=self.server.base_url)
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        self.queue = CurationQueue(self.api, 1, size=10, low_water=4)
+
+    def tearDown(self):
+        self.queue.close()
+        self.api.writes.close()
+        self.api.oauth.transport.close()
+        self.server.stop()
+
+    def test_curate_all(self):
+        seen = []
+        for post in self.queue:
+            seen.append(post.id)
+            if post.id % 2:
+                self.queue.accept(post)
+            else:
+                self.queue.refuse(post, 'off-topic')
+            # refills only see the decisions sent so far
+            self.api.writes.join()
+        self.assertEqual(sorted(seen), list(range(100030, 100055)))
+        self.assertEqual(len(self.server.decided), 25)
+        self.assertRaises(Queue.Empty, self.queue.get, timeout=1)
+        # sent decisions are forgotten, refills don't grow
+        self.assertEqual(self.queue.taken, set())
+        self.assertEqual(self.queue.settled, {})
+
+    def test_decisions_not_sent(self):
+        # the server keeps listing the posts until decisions are sent
+        seen = []
+        for post in self.queue:
+            seen.append(post.id)
+            self.queue.decided(post)
+        self.assertEqual(sorted(seen), list(range(100030, 100055)))
+        self.assertEqual(len(self.server.decided), 0)
+
+    def test_decisions_sent_meanwhile(self):
+        # refills run while decisions are being sent
+        self.server.latency = 0.01
+        seen = []
+        for post in self.queue:
+            seen.append(post.id)
+            self.queue.accept(post)
+        self.assertEqual(sorted(seen), list(range(100030, 100055)))
+        self.api.writes.join()
+        self.assertEqual(self.queue.taken, set())
+
+    def test_buffered_get(self):
+        self.queue.get(timeout=5)
+        self.server.latency = 0.5
+        start = time.time()
+        self.queue.get()
+        self.queue.get()
+        self.assertTrue(time.time() - start < 0.25)
+        self.assertEqual(self.queue.refills, 1)
+
+    def test_release(self):
+        post = self.queue.get(timeout=5)
+        following = self.queue.get()
+        self.queue.release(post)
+        self.assertEqual(self.queue.get().id, post.id)
+        self.queue.accept(following)
+        self.assertTrue(following.id not in [p.id for p in self.queue.buffer])
+
+
+class IngestRunnerTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer(posts=5)
+        self.server.start()
+        self.tmpdir = mkdtemp()
+        self.token_file = '%s/token.db' % self.tmpdir
+        api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET)
+        api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        api.save_oauth_token(self.token_file)
+        self.runner = IngestRunner(CONSUMER_KEY, CONSUMER_SECRET, self.token_file,
+                                   processes=3,
+                                   api_options={'base_url': self.server.base_url})
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_run(self):
+        results = list(self.runner.run(range(1, 11), order='curationDate'))
+        self.assertEqual(sorted(r.key for r in results), list(range(1, 11)))
+        for result in results:
+            self.assertTrue(result.ok)
+            self.assertEqual(result.value.id, result.key)
+            self.assertEqual(len(result.value.curatedPosts), 5)
+        self.assertEqual([w.done for w in self.runner.workers], [4, 3, 3])
+        self.assertEqual(self.runner.topics, 10)
+        self.assertTrue('total: 10 topics, 0 errors' in self.runner.report())
+
+    def test_errors(self):
+        results = list(self.runner.run([1, 2], order='curationDate', tag='unused'))
+        self.assertEqual(len(results), 2)
+        self.server.error_rate = 1
+        results = list(self.runner.run([1, 2, 3], order='curationDate'))
+        self.assertFalse(any(r.ok for r in results))
+        self.assertTrue(isinstance(results[0].error, ScoopItError))
+        self.assertEqual(self.runner.errors, 3)
+
+    def test_reap(self):
+        class Process(object):
+            def __init__(self, alive):
+                self.alive = alive
+            def is_alive(self):
+                return self.alive
+        self.runner.workers = [WorkerProgress(0, 2), WorkerProgress(1, 2)]
+        processes = [Process(False), Process(True)]
+        running = set([0, 1])
+        results = Queue.Queue()
+        self.assertEqual(list(self.runner._reap([Process(True)] * 2, results, running)), [])
+        self.assertEqual(running, set([0, 1]))
+        # sent by the dead worker right before it exited
+        results.put((0, 1, None, 'failed'))
+        results.put((1, 2, None, 'failed'))
+        messages = list(self.runner._reap(processes, results, running))
+        self.assertEqual([m[:2] for m in messages], [(0, 1), (1, 2)])
+        self.assertEqual(running, set([1]))
+        self.assertTrue(self.runner.workers[0].finished is not None)
+        self.assertTrue(self.runner.workers[1].finished is None)
+
+    def test_stop(self):
+        self.server.latency = 0.05
+        self.runner.processes = 2
+        results = self.runner.run(range(100), order='curationDate')
+        next(results)
+        results.close()
+        self.assertTrue(self.runner.finished is not None)
+        self.assertTrue(self.runner.topics < 20)
+
+
+class AsyncClientTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer()
+        self.server.start()
+        self.url = self.server.base_url + '/api/1/post'
+        self.api = AsyncScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, max_concurrency=5)
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+
+    def tearDown(self):
+        self.api.async_transport.close()
+        self.server.stop()
+
+    def test_bounded_concurrency(self):
+        futures = [self.api.request(self.url, {'id': i}) for i in range(50)]
+        self.assertEqual(self.api.async_transport.active, 5)
+        results = self.api.run(gather(futures))
+        self.assertEqual([r['id'] for r in results], range(50))
+        self.assertEqual(self.api.async_transport.active, 0)
+
+    def test_coroutine(self):
+        api, url = self.api, self.url
+        @coroutine
+        def titles():
+            first = yield api.request(url, {'id': 1})
+            others = yield [api.request(url, {'id': i}) for i in (2, 3)]
+            raise Return([p['title'] for p in [first] + others])
+        self.assertEqual(api.run(titles()), ['Post 1', 'Post 2', 'Post 3'])
+
+    def test_single_flight(self):
+        self.api.flights = SingleFlight()
+        futures = [self.api.request(self.url, {'id': 1}) for i in range(5)]
+        self.assertEqual(self.api.async_transport.active, 1)
+        self.assertEqual(len(set(futures)), 1)
+        self.assertEqual(self.api.run(futures[0])['id'], 1)
+
+    def test_no_post_resend(self):
+        self.api.run(self.api.request(self.url, {'id': 1}))
+        # the kept-alive connection is dropped once the action is applied
+        send_body = MockRequestHandler.send_body
+        def drop(handler, *args, **kwargs):
+            MockRequestHandler.send_body = send_body
+            handler.close_connection = 1
+        MockRequestHandler.send_body = drop
+        try:
+            future = self.api.request(self.url, {'action': 'thank', 'id': 1}, 'POST')
+            self.assertRaises(TransportError, self.api.run, future)
+        finally:
+            MockRequestHandler.send_body = send_body
+        self.assertEqual(len(self.server.actions), 1)
+        # requests which may be sent again still are
+        self.api.run(self.api.request(self.url, {'id': 1}))
+        self.api.async_transport.idle.values()[0][0].socket.shutdown(socket.SHUT_RDWR)
+        self.assertEqual(self.api.run(self.api.request(self.url, {'id': 2}))['id'], 2)
+
+    def test_rate_limited(self):
+        self.api.rate_limiter = RateLimiter(50, burst=2)
+        start = time.time()
+        futures = [self.api.request(self.url, {'id': i}) for i in range(5)]
+        self.assertEqual(self.api.async_transport.active, 2)
+        self.api.run(gather(futures))
+        self.assertTrue(time.time() - start >= 0.05)
+
+    def test_error(self):
+        future = self.api.request(self.server.base_url + '/api/1/unknown', {})
+        self.assertRaises(ScoopItError, self.api.run, future)
+
+    def test_bulk(self):
+        api = AsyncScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET, loop=self.api.loop,
+                              base_url=self.server.base_url)
+        api.oauth.token = self.api.oauth.token
+        results = api.run(api.topics_many([3, 1, 2], workers=2, order='user'))
+        self.assertEqual([r.value.id for r in results], [3, 1, 2])
+        results = api.run(api.posts_many([1, 'bad']))
+        self.assertTrue(results[0].ok)
+        self.assertFalse(results[1].ok)
+        resolved = api.run(api.resolve_many('topic', ['a', 'b', 'a']))
+        self.assertEqual(sorted(resolved), ['a', 'b'])
+        self.assertTrue(all(r.ok for r in resolved.values()))
+        api.async_transport.close()
+
+    def test_unsupported(self):
+        self.assertRaises(ScoopItError, self.api.iter_compilation, Timestamp(0))
+        self.assertRaises(ScoopItError, self.api.stream_compilation, Timestamp(0), 10)
+        self.assertRaises(ScoopItError, AsyncScoopItAPI, CONSUMER_KEY,
+                          CONSUMER_SECRET, cache=ResponseCache())
+
+
+class InstrumentationTest(TestCase):
+
+    def setUp(self):
+        self.server = MockServer(posts=3)
+        self.server.start()
+        self.events = []
+        self.api = ScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET,
+                              base_url=self.server.base_url,
+                              hooks=[self.events.append])
+        self.api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+
+    def tearDown(self):
+        self.api.oauth.transport.close()
+        self.server.stop()
+
+    def test_phases(self):
+        self.api.topic(1, order='curationDate')
+        event, = self.events
+        self.assertEqual(event.endpoint, '/api/1/topic')
+        self.assertEqual((event.status, event.attempts, event.error), ('200', 1, None))
+        self.assertTrue(event.size > 0)
+        self.assertEqual(sorted(event.phases),
+                         ['build', 'decode', 'decompress', 'network', 'sign'])
+        self.assertTrue(event.duration >= sum(event.phases.values()))
+
+    def test_error(self):
+        self.server.error_rate = 1
+        self.assertRaises(ScoopItError, self.api.post, 1)
+        event, = self.events
+        self.assertEqual(event.status, '503')
+        self.assertTrue(isinstance(event.error, ScoopItError))
+        self.assertFalse('build' in event.phases)
+
+    def test_metrics_and_logging(self):
+        registry = MetricsRegistry()
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('scoopy.tests')
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        self.api.hooks.add(MetricsHook(registry))
+        self.api.hooks.add(LoggingHook(logger))
+        for i in range(3):
+            self.api.post(i)
+        self.api.request(self.server.base_url + '/api/1/test', {})
+        metrics = registry.render()
+        self.assertTrue('scoopy_requests_total{endpoint="/api/1/post",method="GET",'
+                        'status="200"} 3.0' in metrics)
+        self.assertTrue('scoopy_request_seconds_count{endpoint="/api/1/test"} 1.0' in metrics)
+        self.assertTrue('scoopy_phase_seconds_bucket{endpoint="/api/1/post",'
+                        'phase="build",le="+Inf"} 3.0' in metrics)
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0].scoopy['endpoint'], '/api/1/post')
+        logger.removeHandler(handler)
+
+    def test_cached(self):
+        registry = MetricsRegistry()
+        self.api.hooks.add(MetricsHook(registry))
+        self.api.cache = ResponseCache(ttl=60)
+        self.api.post(1)
+        self.api.post(1)
+        self.assertEqual([e.cached for e in self.events], [False, True])
+        self.assertEqual(self.events[1].status, None)
+        metrics = registry.render()
+        self.assertTrue('scoopy_requests_total{endpoint="/api/1/post",method="GET",'
+                        'status="cached"} 1.0' in metrics)
+        self.assertTrue('scoopy_requests_total{endpoint="/api/1/post",method="GET",'
+                        'status="200"} 1.0' in metrics)
+
+    def test_stream(self):
+        posts = self.api.stream_compilation(Timestamp(0), 10)
+        self.assertEqual(self.events, [])
+        self.assertEqual(len(list(posts)), 10)
+        event, = self.events
+        self.assertEqual(event.endpoint, '/api/1/compilation')
+        self.assertEqual((event.status, event.attempts, event.error), ('200', 1, None))
+        self.assertTrue(event.size > 0)
+        self.assertEqual(sorted(event.phases), ['build', 'network', 'sign'])
+        # stopped early, or failing
+        for post in self.api.stream_compilation(Timestamp(0), 10):
+            break
+        self.server.error_rate = 1
+        self.assertRaises(ScoopItError, list, self.api.stream_compilation(Timestamp(0), 10))
+        self.assertEqual(len(self.events), 3)
+        self.assertEqual(self.events[1].error, None)
+        self.assertEqual(self.events[2].status, '503')
+        self.assertTrue(isinstance(self.events[2].error, ScoopItError))
+
+    def test_no_hooks(self):
+        self.api.hooks.remove(self.events.append)
+        self.assertFalse(self.api.hooks)
+        self.api.post(1)
+        self.assertEqual(self.events, [])
+
+    def test_async(self):
+        api = AsyncScoopItAPI(CONSUMER_KEY, CONSUMER_SECRET,
+                              base_url=self.server.base_url,
+                              hooks=[self.events.append])
+        api.oauth.token = oauth2.Token(OAUTH_TOKEN, OAUTH_TOKEN_SECRET)
+        self.assertEqual(api.run(api.post(1)).id, 1)
+        api.async_transport.close()
+        event, = self.events
+        self.assertEqual((event.status, event.attempts), ('200', 1))
+        self.assertEqual(sorted(event.phases), ['build', 'decode', 'network', 'sign'])
@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.transport
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+"""
+
+import httplib
+import socket
+import threading
+import zlib
+from collections import deque
+from time import time
+from urlparse import urlsplit
+
+__all__ = [
+    'TransportError',
+    'Response',
+    'Transport',
+    'ConnectionPool',
+    'PooledTransport',
+    'Httplib2Transport',
+]
+
+# methods a request can be sent again with, if it may have been received
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+
+
+class TransportError(Exception):
+    """
+    Exception raised when a request can't be sent or its
+    response can't be read.
+    """
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+class Response(dict):
+    """
+    Headers of an HTTP response, with lowercased names.
+
+    Mimics the response objects returned by :mod:`httplib2`, the
+    status code is available both as the ``'status'`` key (as a string)
+    and as the :attr:`status` attribute (as an int).
+    """
+    def __init__(self, status, reason, headers):
+        super(Response, self).__init__(headers)
+        self.status = status
+        self.reason = reason
+        self['status'] = str(status)
+
+
+def decode_content(response, content):
+    """
+    Decompress a response body according to its content-encoding, the
+    'content-encoding' header is renamed to '-content-encoding' once
+    the body has been decoded (same behaviour as :mod:`httplib2`).
+    """
+    encoding = response.get('content-encoding')
+    if encoding not in ('gzip', 'deflate'):
+        return content
+    try:
+        if encoding == 'gzip':
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+        else:
+            content = zlib.decompress(content, -zlib.MAX_WBITS)
+    except zlib.error:
+        raise TransportError("failed to decode %s response body" % encoding)
+    response['-content-encoding'] = response.pop('content-encoding')
+    response['content-length'] = str(len(content))
+    return content
+
+
+def iter_content(response, raw, chunk_size=65536):
+    """
+    Read a response body chunk by chunk, decompressing it on the fly
+    according to its content-encoding.
+    """
+    encoding = response.get('content-encoding')
+    decompressor = None
+    if encoding == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == 'deflate':
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    while True:
+        chunk = raw.read(chunk_size)
+        if not chunk:
+            break
+        if decompressor is not None:
+            try:
+                chunk = decompressor.decompress(chunk)
+            except zlib.error:
+                raise TransportError("failed to decode %s response body" % encoding)
+        if chunk:
+            yield chunk
+    if decompressor is not None:
+        chunk = decompressor.flush()
+        if chunk:
+            yield chunk
+
+
+class Transport(object):
+    """
+    Base class for HTTP transports.
+
+    A transport only has to send an already signed request and return
+    a ``(response, content)`` tuple, where ``response`` is a
+    :class:`Response` object and ``content`` the decoded body.
+    """
+
+    def request(self, uri, method='GET', body=None, headers=None):
+        raise NotImplementedError
+
+    def timed_request(self, uri, method, body, headers, event):
+        """
+        Same as :meth:`request`, recording its duration as the 'network'
+        phase of an :class:`scoopy.instrumentation.CallEvent`.
+        """
+        start = time()
+        try:
+            return self.request(uri, method, body, headers)
+        finally:
+            event.timed('network', start)
+
+    def close(self):
+        pass
+
+
+class _PooledConnection(object):
+    """
+    A persistent connection along with its usage bookkeeping.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.requests = 0
+        self.last_used = time()
+
+
+class ConnectionPool(object):
+    """
+    A bounded pool of persistent HTTP/1.1 connections to a single host.
+    """
+
+    def __init__(self, scheme, host, port, size=4, idle_timeout=60,
+                 max_requests=100, timeout=None):
+        """
+        :param scheme: 'http' or 'https'.
+        :type scheme: str.
+        :param host: The remote host name.
+        :type host: str.
+        :param port: The remote port (defaults to the scheme's one).
+        :type port: int or None.
+        :param size: Maximum number of simultaneous connections.
+        :type size: int.
+        :param idle_timeout: Seconds after which an idle connection is
+                             discarded instead of being reused.
+        :type idle_timeout: int.
+        :param max_requests: Number of requests after which a connection
+                             is closed (None for unlimited).
+        :type max_requests: int or None.
+        :param timeout: Socket timeout in seconds.
+        :type timeout: int or None.
+        """
+        if scheme == 'https':
+            self.connection_class = httplib.HTTPSConnection
+        else:
+            self.connection_class = httplib.HTTPConnection
+        self.host = host
+        self.port = port
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.idle = deque()
+        self.in_use = 0
+        self.created = 0
+        self.lock = threading.Condition()
+
+    def acquire(self):
+        """
+        Get a connection from the pool, waits if all of them are in use.
+        """
+        self.lock.acquire()
+        try:
+            while (not self.idle) and (self.in_use >= self.size):
+                self.lock.wait()
+            now = time()
+            while self.idle:
+                pooled = self.idle.pop()
+                if now - pooled.last_used < self.idle_timeout:
+                    self.in_use += 1
+                    return pooled
+                pooled.connection.close()
+            self.in_use += 1
+            self.created += 1
+        finally:
+            self.lock.release()
+        return _PooledConnection(self.connection_class(
+            self.host, self.port, timeout=self.timeout
+        ))
+
+    def release(self, pooled, reusable=True):
+        """
+        Give a connection back to the pool, it is closed if it can't
+        be reused or served too many requests.
+        """
+        if (self.max_requests is not None) and \
+                (pooled.requests >= self.max_requests):
+            reusable = False
+        self.lock.acquire()
+        try:
+            self.in_use -= 1
+            if reusable:
+                pooled.last_used = time()
+                self.idle.append(pooled)
+            self.lock.notify()
+        finally:
+            self.lock.release()
+        if not reusable:
+            pooled.connection.close()
+
+    def close(self):
+        """
+        Close every idle connection of the pool.
+        """
+        self.lock.acquire()
+        try:
+            while self.idle:
+                self.idle.pop().connection.close()
+        finally:
+            self.lock.release()
+
+
+class PooledTransport(Transport):
+    """
+    Transport keeping a bounded pool of persistent connections per host,
+    connections are reused across requests and across token changes.
+    """
+    pool_class = ConnectionPool
+
+    def __init__(self, pool_size=4, idle_timeout=60, max_requests=100,
+                 timeout=None):
+        """
+        :param pool_size: Maximum number of connections per host.
+        :type pool_size: int.
+        :param idle_timeout: Seconds after which an idle connection is
+                             discarded instead of being reused.
+        :type idle_timeout: int.
+        :param max_requests: Number of requests after which a connection
+                             is closed (None for unlimited).
+        :type max_requests: int or None.
+        :param timeout: Socket timeout in seconds.
+        :type timeout: int or None.
+        """
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def get_pool(self, scheme, host, port):
+        """
+        Get the connection pool for the given host, creating it if needed.
+        """
+        key = (scheme, host, port)
+        self.lock.acquire()
+        try:
+            pool = self.pools.get(key)
+            if pool is None:
+                pool = self.pool_class(
+                    scheme, host, port,
+                    size=self.pool_size,
+                    idle_timeout=self.idle_timeout,
+                    max_requests=self.max_requests,
+                    timeout=self.timeout,
+                )
+                self.pools[key] = pool
+            return pool
+        finally:
+            self.lock.release()
+
+    def open(self, uri, method='GET', body=None, headers=None):
+        """
+        Send a request and return its response without reading the body.
+
+        :returns: tuple -- (:class:`Response`, :class:`httplib.HTTPResponse`,
+                  release function), the release function must be called
+                  once the body has been fully read (or with False to
+                  drop the connection).
+        """
+        parsed = urlsplit(uri)
+        if parsed.scheme not in ('http', 'https'):
+            raise TransportError("unsupported URL scheme: %s" % parsed.scheme)
+        pool = self.get_pool(parsed.scheme, parsed.hostname, parsed.port)
+        path = parsed.path or '/'
+        if parsed.query:
+            path = '%s?%s' % (path, parsed.query)
+        headers = dict(headers or {})
+        if body and 'Content-Length' not in headers:
+            headers['Content-Length'] = str(len(body))
+        # a kept-alive connection may have been closed by the server
+        # in the meantime, in which case the request is sent again once
+        # on a fresh connection: always if it couldn't be sent, only for
+        # idempotent methods if the response couldn't be read (the
+        # server may have got the request)
+        for attempt in (0, 1):
+            pooled = pool.acquire()
+            reused = pooled.requests > 0
+            sent = False
+            try:
+                pooled.connection.request(method, path, body, headers)
+                sent = True
+                raw = pooled.connection.getresponse()
+            except (socket.error, httplib.HTTPException) as e:
+                pool.release(pooled, reusable=False)
+                if reused and (attempt == 0) and \
+                        ((not sent) or (method in IDEMPOTENT_METHODS)):
+                    continue
+                raise TransportError("%s %s failed: %s" % (method, uri, e))
+            pooled.requests += 1
+            break
+        response = Response(
+            raw.status, raw.reason,
+            [(k.lower(), v) for k, v in raw.getheaders()]
+        )
+        def release(reusable=True):
+            pool.release(pooled, reusable and not raw.will_close)
+        return response, raw, release
+
+    def request(self, uri, method='GET', body=None, headers=None):
+        response, raw, release = self.open(uri, method, body, headers)
+        content = self.read(uri, method, raw, release)
+        return response, decode_content(response, content)
+
+    def timed_request(self, uri, method, body, headers, event):
+        """
+        Same as :meth:`request`, recording the 'network' and 'decompress'
+        phases of an :class:`scoopy.instrumentation.CallEvent`.
+        """
+        start = time()
+        try:
+            response, raw, release = self.open(uri, method, body, headers)
+            content = self.read(uri, method, raw, release)
+        finally:
+            event.timed('network', start)
+        start = time()
+        content = decode_content(response, content)
+        event.timed('decompress', start)
+        return response, content
+
+    def read(self, uri, method, raw, release):
+        """
+        Read the whole body of a response returned by :meth:`open`.
+        """
+        try:
+            content = raw.read()
+        except (socket.error, httplib.HTTPException) as e:
+            release(False)
+            raise TransportError("%s %s failed: %s" % (method, uri, e))
+        release()
+        return content
+
+    def stream(self, uri, method='GET', body=None, headers=None, chunk_size=65536):
+        """
+        Send a request and return its response along with an iterator
+        over the decoded body chunks. The connection goes back to the
+        pool once the body has been fully read, and is dropped if the
+        iterator is closed before that.
+
+        :returns: tuple -- (:class:`Response`, iterator)
+        """
+        response, raw, release = self.open(uri, method, body, headers)
+        def chunks():
+            complete = False
+            try:
+                for chunk in iter_content(response, raw, chunk_size):
+                    yield chunk
+                complete = True
+            except (socket.error, httplib.HTTPException) as e:
+                raise TransportError("%s %s failed: %s" % (method, uri, e))
+            finally:
+                release(complete)
+        return response, chunks()
+
+    def close(self):
+        """
+        Close every idle connection of every pool.
+        """
+        self.lock.acquire()
+        try:
+            for pool in self.pools.values():
+                pool.close()
+        finally:
+            self.lock.release()
+
+
+class Httplib2Transport(Transport):
+    """
+    Transport delegating to :class:`httplib2.Http`, this is what
+    :class:`oauth2.Client` uses internally.
+    """
+
+    def __init__(self, **kwargs):
+        import httplib2
+        self.http = httplib2.Http(**kwargs)
+
+    def request(self, uri, method='GET', body=None, headers=None):
+        return self.http.request(uri, method=method, body=body, headers=headers)
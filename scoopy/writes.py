@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+#
+#    This file is part of scoopy.
+#
+#    Scoopy is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Scoopy is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Scoopy.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+.. module:: scoopy.writes
+
+.. moduleauthor:: Mathieu D. (MatToufoutu) <mattoufootu[at]gmail.com>
+
+Queue of the write actions (accept, refuse, edit, pin, ...) on posts
+and topics, which the write methods of
+:class:`scoopy.client.ScoopItAPI` go through::
+
+    futures = [api.post_accept(post_id) for post_id in accepted]
+    futures += [api.post_refuse(post_id, 'off-topic') for post_id in refused]
+    api.writes.join()
+
+Actions on the same post (or topic) are sent one after the other in the
+order they were queued, actions on different ones are sent in parallel.
+While an action waits, a later one can make it redundant (eg: an edit
+followed by a delete), in which case it's dropped and its future gets
+the result of the later action. Waiting edits of the same target are
+merged into one, the later values of a parameter winning.
+"""
+
+import threading
+from collections import deque
+from time import time
+
+from scoopy.futures import Future, ThreadPool
+from scoopy.instrumentation import CallEvent
+
+__all__ = [
+    'MERGED',
+    'SUPERSEDES',
+    'WritePipeline',
+]
+
+# action -> queued actions on the same target it makes redundant,
+# besides identical ones
+SUPERSEDES = {
+    'accept': ('accept',),
+    'refuse': ('refuse',),
+    'pin': ('pin',),
+    'thank': ('thank',),
+    'delete': ('edit', 'pin', 'thank'),
+    'reorder': ('reorder',),
+}
+# actions merged with the queued ones of the same kind on the same target
+MERGED = frozenset(['edit'])
+
+
+class _Action(object):
+    __slots__ = ('url', 'action', 'params', 'futures')
+
+    def __init__(self, url, action, params):
+        self.url = url
+        self.action = action
+        self.params = params
+        self.futures = [Future()]
+
+
+class WritePipeline(object):
+    """
+    Queue of write actions sent over POST by a bounded number of worker
+    threads, see :attr:`scoopy.client.ScoopItAPI.writes`.
+    """
+
+    def __init__(self, api, workers=4):
+        """
+        :param api: The API instance sending the actions.
+        :type api: :class:`scoopy.client.ScoopItAPI`.
+        :param workers: Maximum number of actions sent at once.
+        :type workers: int.
+        """
+        self.api = api
+        self.pool = ThreadPool(workers)
+        # target -> queued actions
+        self.queues = {}
+        # targets with an action being sent
+        self.active = set()
+        self.pending = 0
+        self.sent = 0
+        self.collapsed = 0
+        self.condition = threading.Condition()
+
+    def submit(self, url, target, params):
+        """
+        Queue an action.
+
+        :param url: The end-point url.
+        :type url: str.
+        :param target: Key of the object the action applies to, actions
+                       on the same target are sent in order.
+        :type target: tuple.
+        :param params: Parameters of the request, with the 'action' one.
+        :type params: dict.
+        :returns: :class:`scoopy.futures.Future` -- The decoded response.
+        """
+        new = _Action(url, params['action'], params)
+        superseded = SUPERSEDES.get(new.action, ())
+        merged = new.action in MERGED
+        self.condition.acquire()
+        try:
+            queue = self.queues.get(target)
+            if queue is None:
+                queue = self.queues[target] = deque()
+            for queued in list(queue):
+                if merged and (queued.action == new.action):
+                    # parameters only set by the queued action are kept
+                    combined = dict(queued.params)
+                    combined.update(new.params)
+                    new.params = combined
+                elif (queued.action not in superseded) and (queued.params != params):
+                    continue
+                queue.remove(queued)
+                new.futures.extend(queued.futures)
+                self.collapsed += 1
+                self.pending -= 1
+            queue.append(new)
+            self.pending += 1
+            if target not in self.active:
+                self.active.add(target)
+                self.pool.submit(self._send_next, target)
+        finally:
+            self.condition.release()
+        return new.futures[0]
+
+    def _send_next(self, target):
+        self.condition.acquire()
+        try:
+            action = self.queues[target].popleft()
+        finally:
+            self.condition.release()
+        try:
+            result = self.send(action)
+        except Exception as e:
+            for future in action.futures:
+                future.set_exception(e)
+        else:
+            for future in action.futures:
+                future.set_result(result)
+        self.condition.acquire()
+        try:
+            self.pending -= 1
+            self.sent += 1
+            if self.queues[target]:
+                # back in line, so that busy targets don't hold a worker
+                self.pool.submit(self._send_next, target)
+            else:
+                del self.queues[target]
+                self.active.discard(target)
+            self.condition.notify_all()
+        finally:
+            self.condition.release()
+
+    def send(self, action):
+        """
+        Send an action and return the decoded response.
+        """
+        api = self.api
+        def request(event=None):
+            status, content = api.send(action.url, action.params, 'POST', event=event)
+            return api.handle_response(status, content, event)
+        if not api.hooks:
+            return request()
+        event = CallEvent(action.url, 'POST')
+        return api.hooks.track(event, lambda: request(event))
+
+    def join(self, timeout=None):
+        """
+        Wait until every queued action has been sent.
+
+        :returns: bool -- False if some were still pending after
+                  ``timeout`` seconds.
+        """
+        if timeout is not None:
+            deadline = time() + timeout
+        self.condition.acquire()
+        try:
+            while self.pending:
+                if timeout is None:
+                    self.condition.wait()
+                    continue
+                remaining = deadline - time()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+        finally:
+            self.condition.release()
+
+    def close(self):
+        """
+        Wait for the queued actions and stop the workers.
+        """
+        self.join()
+        self.pool.shutdown()